@@ -0,0 +1,216 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import pandas as pd
+from tqdm import tqdm
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BackfillJob:
+    pair: str
+    timeframe: str
+    interval: int          # Minutes per candle
+    cursor: int            # Timestamp of the last committed candle
+    end: Optional[int] = None  # Gap fill: last candle to fetch; None follows the live tail
+    chunks: int = 0
+    candles: int = 0
+    done: bool = False
+
+    @property
+    def key(self) -> str:
+        if self.end is not None:
+            # A gap's end is a stored candle; its start may move with the scan window
+            return f"{self.pair}|{self.timeframe}|{self.end}"
+        return f"{self.pair}|{self.timeframe}"
+
+    def missing(self, now: float) -> int:
+        """Candles between the cursor and now (or the end of the gap)"""
+        until = now if self.end is None else min(now, self.end + self.interval * 60)
+        return max(0, int((until - self.cursor) // (self.interval * 60)))
+
+
+@dataclass
+class BackfillStats:
+    started_at: float = field(default_factory=time.monotonic)
+    requests: int = 0
+    candles: int = 0
+    failures: int = 0
+
+    def throughput(self) -> Dict:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            'elapsed': elapsed,
+            'requests': self.requests,
+            'candles': self.candles,
+            'failures': self.failures,
+            'requests_per_second': self.requests / elapsed,
+            'candles_per_second': self.candles / elapsed
+        }
+
+
+class BackfillScheduler:
+    """Concurrent OHLC backfill across pairs and timeframes.
+
+    Jobs are kept in a max-heap on missing candles, so workers always pull
+    the (pair, timeframe) with the largest remaining gap. Each worker fetches
+    one chunk, commits it and re-queues the job with its new gap. All
+    requests go through the feed's REST client, whose token bucket is the
+    shared rate budget; `concurrency` only bounds requests in flight. The
+    cursor of every committed chunk is written to `state_file`, so an
+    interrupted run resumes from there.
+
+    Gap fills (`add_range`) are bounded jobs for holes inside stored
+    history. Their chunks are trimmed to the hole and committed through
+    `commit_range`, which may return the number of rows it actually added.
+    A range that yields no new candles (the exchange does not serve it, or
+    there were no trades) is remembered in the state file by its end and
+    not requested again; `prune_ranges` forgets those that left the window.
+    """
+
+    def __init__(self, fetch_chunk: Callable[[str, int, int], Awaitable[pd.DataFrame]],
+                 commit_chunk: Callable[[str, str, pd.DataFrame], None],
+                 state_file: str, concurrency: int = 6, recent_seconds: int = 300,
+                 commit_range: Callable[[str, str, pd.DataFrame], Optional[int]] = None):
+        self.fetch_chunk = fetch_chunk      # async (pair, interval, since) -> DataFrame
+        self.commit_chunk = commit_chunk    # (pair, timeframe, DataFrame) -> None
+        self.commit_range = commit_range or commit_chunk  # Same, for rows inside stored history; -> rows added
+        self.state_file = state_file
+        self.concurrency = concurrency
+        self.recent_seconds = recent_seconds  # A job is done once its cursor is this close to now
+        self.state = self._load_state()
+        self.stats = BackfillStats()
+        self._heap: List = []
+        self._seq = 0
+
+    def _load_state(self) -> Dict[str, int]:
+        try:
+            with open(self.state_file, 'r') as f:
+                return {key: int(cursor) for key, cursor in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable backfill state: {e}")
+            return {}
+
+    def _save_state(self):
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    def add_job(self, pair: str, timeframe: str, interval: int, start: int,
+                cached_until: Optional[int] = None) -> BackfillJob:
+        """Queue a job starting at the latest of `start`, the cache and the saved cursor"""
+        job = BackfillJob(pair, timeframe, interval, start)
+        job.cursor = max(start, cached_until or 0, self.state.get(job.key, 0))
+        self._push(job)
+        return job
+
+    def add_range(self, pair: str, timeframe: str, interval: int, since: int, until: int) -> Optional[BackfillJob]:
+        """Queue a gap fill for candles after `since` up to `until`; skipped if known unavailable"""
+        job = BackfillJob(pair, timeframe, interval, since, end=until)
+        if job.key in self.state:
+            return None
+        self._push(job)
+        return job
+
+    def prune_ranges(self, pair: str, timeframe: str, before: int):
+        """Forget unavailable gap fills ending before `before`; they are no longer planned"""
+        prefix = f"{pair}|{timeframe}|"
+        stale = [key for key, end in self.state.items() if key.startswith(prefix) and end < before]
+        for key in stale:
+            del self.state[key]
+        if stale:
+            self._save_state()
+
+    def _push(self, job: BackfillJob):
+        self._seq += 1
+        heapq.heappush(self._heap, (-job.missing(time.time()), self._seq, job))
+
+    async def run(self) -> BackfillStats:
+        now = time.time()
+        total = sum(job.missing(now) for _, _, job in self._heap)
+        logger.info(f"Backfilling {len(self._heap)} series, ~{total} candles missing")
+        self.stats = BackfillStats()
+
+        with tqdm(total=total, desc="Backfilling", unit="candles") as progress:
+            workers = [asyncio.create_task(self._worker(progress)) for _ in range(self.concurrency)]
+            await asyncio.gather(*workers)
+
+        stats = self.stats.throughput()
+        logger.info(f"Backfill complete: {stats['candles']} candles in {stats['requests']} requests, "
+                    f"{stats['elapsed']:.1f}s ({stats['candles_per_second']:.0f} candles/s, "
+                    f"{stats['requests_per_second']:.2f} req/s, {stats['failures']} failures)")
+        return self.stats
+
+    async def _worker(self, progress: tqdm):
+        while self._heap:
+            _, _, job = heapq.heappop(self._heap)
+            before = job.missing(time.time())
+            await self._fetch_next(job)
+            progress.update(max(0, before - job.missing(time.time())) if not job.done else before)
+            stats = self.stats.throughput()
+            progress.set_postfix(req_s=f"{stats['requests_per_second']:.2f}",
+                                 candles_s=f"{stats['candles_per_second']:.0f}")
+            if not job.done:
+                self._push(job)
+
+    async def _fetch_next(self, job: BackfillJob):
+        """Fetch and commit one chunk, advancing the job's cursor"""
+        self.stats.requests += 1
+        try:
+            chunk = await self.fetch_chunk(job.pair, job.interval, job.cursor)
+        except Exception as e:
+            logger.error(f"Error fetching {job.key} from {job.cursor}: {e}")
+            self.stats.failures += 1
+            chunk = None
+        if chunk is None or chunk.empty:
+            job.done = True  # Resumed from the saved cursor on the next run
+            return
+
+        timestamps = (chunk['timestamp'] - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+        if job.end is not None:
+            return self._commit_range(job, chunk, timestamps)
+
+        last = int(timestamps.max())
+        if last <= job.cursor:
+            job.done = True  # No progress: the exchange has nothing newer
+            return
+
+        self.commit_chunk(job.pair, job.timeframe, chunk)
+        job.cursor = last
+        job.chunks += 1
+        job.candles += len(chunk)
+        self.stats.candles += len(chunk)
+        self.state[job.key] = last
+        self._save_state()
+
+        if last > time.time() - self.recent_seconds:
+            job.done = True
+
+    def _commit_range(self, job: BackfillJob, chunk: pd.DataFrame, timestamps: pd.Series):
+        """Commit the part of a chunk that falls inside the gap"""
+        inside = chunk[(timestamps > job.cursor) & (timestamps <= job.end)]
+        if not inside.empty:
+            written = self.commit_range(job.pair, job.timeframe, inside)
+            written = len(inside) if written is None else written
+            job.chunks += 1
+            job.candles += written
+            self.stats.candles += written
+            job.cursor = int(timestamps.max())
+        if inside.empty or job.cursor >= job.end:
+            job.done = True
+            if job.candles == 0:
+                # Merged ranges also return the stored candles between their holes: only
+                # new rows count. Nothing new now means nothing new on later runs either
+                logger.debug(f"Gap {job.key} is not available")
+                self.state[job.key] = job.end
+                self._save_state()
@@ -5,23 +5,19 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.indicators import Indicators
+from core.labels import RESEARCH_BARRIERS, label_series
 import asyncio
 import logging
 import torch
 
+# Candles after an entry at which the forward return is reported
+FORWARD_HORIZONS = (1, 5, 15, 60)
+
 class Backtester:
     def __init__(self):
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.logger = logging.getLogger(__name__)
         
-    def _prepare_batch_data(self, df: pd.DataFrame, window_size: int):
-        # Convert to tensors with batch processing
-        closes = torch.tensor(df['close'].values, device=self.device, dtype=torch.float32)
-        opens = torch.tensor(df['open'].values, device=self.device, dtype=torch.float32)
-        highs = torch.tensor(df['high'].values, device=self.device, dtype=torch.float32)
-        lows = torch.tensor(df['low'].values, device=self.device, dtype=torch.float32)
-        return closes, opens, highs, lows
-
     async def run_backtest(self, symbol: str, data: Dict[str, pd.DataFrame]):
         try:
             results = {}
@@ -41,12 +37,6 @@ class Backtester:
     async def _test_timeframe(self, timeframe: str, df: pd.DataFrame):
         window_size = 500
         signals = []
-        equity = 1000
-        position = 0
-        entry_price = 0
-        
-        # Batch process data
-        closes, opens, highs, lows = self._prepare_batch_data(df, window_size)
         
         # Create signal masks using vectorized operations
         rsi_buy_mask = torch.tensor([indicators['rsi'] < 30 for indicators in 
@@ -57,30 +47,37 @@ class Backtester:
                                     [Indicators.calculate_all(df.iloc[i-window_size:i], timeframe) 
                                      for i in range(window_size, len(df))]], device=self.device)
         
-        buy_signals = torch.logical_and(rsi_buy_mask, macd_buy_mask)
+        buy_signals = torch.logical_and(rsi_buy_mask, macd_buy_mask).cpu().numpy()
+        
+        # Long outcome (take-profit / stop-loss / timeout) and forward returns of every candle in one pass
+        labels = label_series(df.reset_index(drop=True), RESEARCH_BARRIERS, FORWARD_HORIZONS)
+        outcome, bars, returns = (labels[name].to_numpy() for name in ('label', 'bars', 'return'))
+        
+        # One position at a time: a signal enters at the close and exits at its barrier or timeout
+        entries = []
+        next_entry = window_size
+        for i in np.flatnonzero(buy_signals) + window_size:
+            if i < next_entry or np.isnan(outcome[i]):
+                continue
+            entries.append(i)
+            signals.append({
+                'type': 'SELL',
+                'outcome': int(outcome[i]),
+                'profit': float(returns[i])
+            })
+            next_entry = i + int(bars[i])
         
-        # Process signals in batches
-        for i in range(window_size, len(df)):
-            if buy_signals[i-window_size]:
-                if position == 0:
-                    position = equity / closes[i].item()
-                    entry_price = closes[i].item()
-                elif position > 0:
-                    equity = position * closes[i].item()
-                    signals.append({
-                        'type': 'SELL',
-                        'profit': (closes[i].item() - entry_price) / entry_price
-                    })
-                    position = 0
-                    
         win_rate = len([s for s in signals if s['profit'] > 0]) / len(signals) if signals else 0
         avg_profit = sum(s['profit'] for s in signals) / len(signals) if signals else 0
         
+        forward = labels[[f'fwd_ret_{h}' for h in FORWARD_HORIZONS]].iloc[entries]
+        
         return {
             'signals': signals,
             'win_rate': win_rate,
             'avg_profit': avg_profit,
-            'total_trades': len(signals)
+            'total_trades': len(signals),
+            'forward_returns': forward.mean().fillna(0).to_dict()  # Mean return h candles after entry
         }
 
     def _combine_results(self, results):
@@ -93,9 +90,14 @@ class Backtester:
             
         weighted_win_rate = sum(r['win_rate'] * r['total_trades'] for r in results.values()) / total_trades
         weighted_profit = sum(r['avg_profit'] * r['total_trades'] for r in results.values()) / total_trades
+        forward_returns = {
+            name: sum(r['forward_returns'][name] * r['total_trades'] for r in results.values()) / total_trades
+            for name in next(iter(results.values()))['forward_returns']
+        }
             
         return {
             'win_rate': weighted_win_rate,
             'avg_profit': weighted_profit,
-            'total_trades': total_trades
+            'total_trades': total_trades,
+            'forward_returns': forward_returns
         }
\ No newline at end of file
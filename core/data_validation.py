@@ -0,0 +1,205 @@
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from database.candle_archive import CandleArchive
+from database.ohlcv_store import to_epoch_seconds
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+SAMPLE_SIZE = 10     # Timestamps kept per issue type in a report
+RECENT_GAPS = 50     # Gaps kept in the persisted validation state
+
+TIMEFRAME_UNITS = {'m': 60, 'h': 3600, 'd': 86400}
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    """'5m' -> 300, '1h' -> 3600"""
+    return int(timeframe[:-1]) * TIMEFRAME_UNITS[timeframe[-1]]
+
+
+@dataclass
+class ValidationReport:
+    """What a validation pass found; rejected rows are counted, never silently kept"""
+    pair: str
+    timeframe: str
+    rows: int = 0
+    accepted: int = 0
+    nan_rows: int = 0
+    bad_bars: int = 0        # high < low, open/close outside [low, high], negative volume
+    duplicates: int = 0      # Repeated timestamps within the batch (the last one is kept)
+    stale_rows: int = 0      # Older than the last stored candle
+    first: Optional[int] = None
+    last: Optional[int] = None
+    gaps: List[Dict] = field(default_factory=list)            # {'start', 'end', 'missing'}
+    samples: Dict[str, List[int]] = field(default_factory=dict)
+
+    @property
+    def rejected(self) -> int:
+        return self.rows - self.accepted
+
+    @property
+    def missing_candles(self) -> int:
+        return sum(gap['missing'] for gap in self.gaps)
+
+    @property
+    def ok(self) -> bool:
+        return self.rejected == 0 and not self.gaps
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    def summary(self) -> str:
+        return (f"{self.pair}_{self.timeframe}: {self.accepted}/{self.rows} rows accepted, "
+                f"{self.nan_rows} NaN, {self.bad_bars} bad bars, {self.duplicates} duplicates, "
+                f"{self.stale_rows} stale, {len(self.gaps)} gaps ({self.missing_candles} candles missing)")
+
+
+def validate_columns(columns: Dict[str, np.ndarray], interval: int, last_timestamp: int = None,
+                     pair: str = '', timeframe: str = '') -> Tuple[np.ndarray, np.ndarray, ValidationReport]:
+    """Vectorized checks over one batch of candles.
+
+    Returns the sort order, a keep mask over the sorted rows and the report.
+    `last_timestamp` is the last stored candle: older rows are stale, a row
+    at the same time replaces it, and the distance to the first new candle
+    is checked for a gap. Cost depends only on the batch size.
+    """
+    timestamps = np.asarray(columns['timestamp'], dtype=np.int64)
+    report = ValidationReport(pair, timeframe, rows=len(timestamps))
+    order = np.argsort(timestamps, kind='stable')
+    ts = timestamps[order]
+    if not len(ts):
+        return order, np.zeros(0, bool), report
+
+    values = {name: np.asarray(columns[name], dtype=np.float64)[order]
+              for name in REQUIRED_COLUMNS if name in columns}
+    missing = [name for name in REQUIRED_COLUMNS if name not in values]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+
+    nan = np.zeros(len(ts), bool)
+    for name in REQUIRED_COLUMNS:
+        nan |= np.isnan(values[name])
+    high, low = values['high'], values['low']
+    with np.errstate(invalid='ignore'):
+        bad = ~nan & ((high < low) | (values['close'] < low) | (values['close'] > high) |
+                      (values['open'] < low) | (values['open'] > high) | (values['volume'] < 0))
+    # Keep the last occurrence of each timestamp, as the store does
+    duplicate = np.append(ts[1:] == ts[:-1], False)
+    stale = ts < last_timestamp if last_timestamp is not None else np.zeros(len(ts), bool)
+
+    keep = ~(nan | bad | duplicate | stale)
+    report.nan_rows = int(nan.sum())
+    report.bad_bars = int(bad.sum())
+    report.duplicates = int(duplicate.sum())
+    report.stale_rows = int(stale.sum())
+    report.accepted = int(keep.sum())
+    for name, mask in (('nan', nan), ('bad_bars', bad), ('duplicates', duplicate), ('stale', stale)):
+        if mask.any():
+            report.samples[name] = ts[mask][:SAMPLE_SIZE].tolist()
+
+    kept = ts[keep]
+    if len(kept):
+        report.first, report.last = int(kept[0]), int(kept[-1])
+        if last_timestamp is not None:
+            kept = np.concatenate([[last_timestamp], kept])
+        steps = np.diff(kept)
+        for i in np.flatnonzero(steps > interval):
+            report.gaps.append({'start': int(kept[i]), 'end': int(kept[i + 1]),
+                                'missing': int(steps[i] // interval) - 1})
+    return order, keep, report
+
+
+def validate_candles(data: pd.DataFrame, interval: int, last_timestamp: int = None,
+                     pair: str = '', timeframe: str = '') -> Tuple[pd.DataFrame, ValidationReport]:
+    """Validate a DataFrame batch; returns the accepted rows (sorted) and the report"""
+    if data is None or data.empty:
+        return pd.DataFrame(), ValidationReport(pair, timeframe)
+    if 'timestamp' not in data.columns:
+        raise ValueError("Missing required column: timestamp")
+    columns = {name: data[name].to_numpy() for name in REQUIRED_COLUMNS if name in data.columns}
+    columns['timestamp'] = to_epoch_seconds(data['timestamp'])
+    order, keep, report = validate_columns(columns, interval, last_timestamp, pair, timeframe)
+    return data.iloc[order[keep]].reset_index(drop=True), report
+
+
+class ValidationState:
+    """Persisted "validated up to" watermark and running totals per series.
+
+    Stored next to the series in ``validation.json`` rather than in the
+    archive manifest, so recording a validation does not change the
+    series version seen by readers.
+    """
+
+    def __init__(self, archive: CandleArchive):
+        self.archive = archive
+
+    def _path(self, pair: str, timeframe: str) -> str:
+        return os.path.join(self.archive.root, f"{pair}_{timeframe}", 'validation.json')
+
+    def read(self, pair: str, timeframe: str) -> Dict:
+        try:
+            with open(self._path(pair, timeframe), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'until': None}
+
+    def validated_until(self, pair: str, timeframe: str) -> Optional[int]:
+        return self.read(pair, timeframe).get('until')
+
+    def record(self, pair: str, timeframe: str, report: ValidationReport, until: Optional[int]):
+        """Advance the watermark to `until` and add the report to the running totals"""
+        state = self.read(pair, timeframe)
+        for key in ('rows', 'accepted', 'nan_rows', 'bad_bars', 'duplicates', 'stale_rows'):
+            state[key] = state.get(key, 0) + getattr(report, key)
+        state['missing_candles'] = state.get('missing_candles', 0) + report.missing_candles
+        state['gaps'] = (state.get('gaps', []) + report.gaps)[-RECENT_GAPS:]
+        if until is not None:
+            state['until'] = until
+
+        path = self._path(pair, timeframe)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def validate_append(self, pair: str, timeframe: str,
+                        data: pd.DataFrame) -> Tuple[pd.DataFrame, ValidationReport, Optional[int]]:
+        """Check a batch before it is appended to the archive.
+
+        Returns the accepted rows, the report and the stored tail the batch
+        was checked against; pass that to `commit_append` once written.
+        """
+        last = self.archive.last_timestamp(pair, timeframe)
+        clean, report = validate_candles(data, timeframe_seconds(timeframe), last, pair, timeframe)
+        return clean, report, last
+
+    def commit_append(self, pair: str, timeframe: str, report: ValidationReport, previous_last: Optional[int]):
+        """Record an appended batch; the watermark only moves if it was already at the old tail"""
+        until = self.validated_until(pair, timeframe)
+        contiguous = previous_last is None or until == previous_last
+        self.record(pair, timeframe, report,
+                    self.archive.last_timestamp(pair, timeframe) if contiguous else None)
+
+    def validate_series(self, pair: str, timeframe: str) -> ValidationReport:
+        """Validate stored candles past the watermark (e.g. CSV imports) and advance it.
+
+        Stored rows are only reported, not removed.
+        """
+        until = self.validated_until(pair, timeframe)
+        columns = self.archive.load_columns(pair, timeframe, until)
+        if not columns or len(columns['timestamp']) == 0:
+            return ValidationReport(pair, timeframe)
+        if until is not None and columns['timestamp'][0] == until:
+            columns = {name: values[1:] for name, values in columns.items()}
+        _, _, report = validate_columns(columns, timeframe_seconds(timeframe), until, pair, timeframe)
+        if report.rows:
+            self.record(pair, timeframe, report, int(columns['timestamp'][-1]))
+        return report
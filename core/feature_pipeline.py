@@ -0,0 +1,156 @@
+import hashlib
+import inspect
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.data_validation import timeframe_seconds
+
+RETURN_LAGS = (1, 2, 3, 5, 10, 20)
+
+# Output columns, in order; the model's feature list is saved from this
+FEATURE_COLUMNS = [
+    # Indicators, same definitions as core.indicators.Indicators but for every row
+    'rsi', 'macd', 'macd_signal', 'macd_hist', 'bb_upper', 'bb_lower', 'bb_mid', 'bb_width', 'bb_position',
+    'ema_short', 'ema_long', 'ema_spread', 'tenkan_sen', 'kijun_sen', 'ichimoku_spread', 'atr', 'atr_pct',
+    'obv_slope',
+    # Candlestick patterns, same rules as core.pattern_recognition.PatternRecognizer
+    'doji', 'hammer', 'engulfing', 'three_line_strike',
+    # Returns and volume
+    *[f'ret_{lag}' for lag in RETURN_LAGS], 'volatility_20', 'volume_ratio', 'range_pct',
+    'volume', 'close', 'high', 'low', 'tf_minutes'
+]
+
+# Candles before a tail that reproduce its features: rolling windows are at most 26 long and
+# the EMA terms decay below float precision well within this many rows
+WARMUP_ROWS = 1000
+
+SeriesKey = Tuple[str, str]
+
+
+class FeaturePipeline:
+    """Per-row feature matrix for every candle of a series.
+
+    Every column comes from one vectorized pass over the whole history
+    (rolling/ewm windows, shifted NumPy arrays), so row i only depends on
+    candles up to i. `transform` processes pairs/timeframes in a process
+    pool once there is enough data to pay for the worker start-up.
+    """
+
+    def __init__(self, max_workers: int = None, min_parallel_rows: int = 200_000):
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.min_parallel_rows = min_parallel_rows
+
+    @staticmethod
+    def compute(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+        """Feature columns for every row of `df` (NaN during indicator warm-up)"""
+        close, high, low, open_ = df['close'], df['high'], df['low'], df['open']
+        volume = df['volume']
+        out = {}
+
+        delta = close.diff()
+        gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+        out['rsi'] = 100 - (100 / (1 + gain / loss))
+
+        macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+        signal = macd.ewm(span=9, adjust=False).mean()
+        out['macd'], out['macd_signal'], out['macd_hist'] = macd, signal, macd - signal
+
+        sma = close.rolling(window=20).mean()
+        std = close.rolling(window=20).std()
+        out['bb_upper'], out['bb_lower'], out['bb_mid'] = sma + std * 2, sma - std * 2, sma
+        out['bb_width'] = (std * 4) / sma
+        out['bb_position'] = (close - out['bb_lower']) / (std * 4)
+
+        ema_short, ema_long = close.ewm(span=12).mean(), close.ewm(span=26).mean()
+        out['ema_short'], out['ema_long'] = ema_short, ema_long
+        out['ema_spread'] = ema_short / ema_long - 1
+
+        tenkan = (high.rolling(window=9).max() + low.rolling(window=9).min()) / 2
+        kijun = (high.rolling(window=26).max() + low.rolling(window=26).min()) / 2
+        out['tenkan_sen'], out['kijun_sen'] = tenkan, kijun
+        out['ichimoku_spread'] = tenkan / kijun - 1
+
+        prev_close = close.shift()
+        true_range = np.maximum(high - low, np.maximum((high - prev_close).abs(), (low - prev_close).abs()))
+        out['atr'] = true_range.rolling(14).mean()
+        out['atr_pct'] = out['atr'] / close
+        obv = (np.sign(delta) * volume).fillna(0).cumsum()
+        out['obv_slope'] = obv.diff(20) / volume.rolling(20).sum()
+
+        out.update(FeaturePipeline.patterns(open_.to_numpy(float), high.to_numpy(float),
+                                            low.to_numpy(float), close.to_numpy(float)))
+
+        for lag in RETURN_LAGS:
+            out[f'ret_{lag}'] = close.pct_change(lag)
+        out['volatility_20'] = out['ret_1'].rolling(20).std()
+        out['volume_ratio'] = volume / volume.rolling(20).mean()
+        out['range_pct'] = (high - low) / close
+        out['volume'], out['close'], out['high'], out['low'] = volume, close, high, low
+        out['tf_minutes'] = timeframe_seconds(timeframe) // 60
+
+        # One (columns x rows) block filled in place; building from a dict of Series
+        # would make pandas consolidate every column again
+        values = np.empty((len(FEATURE_COLUMNS), len(df)))
+        for i, name in enumerate(FEATURE_COLUMNS):
+            values[i] = np.asarray(out[name], dtype=np.float64)
+        values[np.isinf(values)] = np.nan
+        return pd.DataFrame(values.T, index=df.index, columns=FEATURE_COLUMNS, copy=False)
+
+    @staticmethod
+    def patterns(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+        """Candlestick pattern flags for every candle (engulfing: +1 bullish, -1 bearish)"""
+        body = np.abs(close - open_)
+        candle_range = high - low
+        upper_wick = high - np.maximum(open_, close)
+        lower_wick = np.minimum(open_, close) - low
+        bullish = close > open_
+        bearish = close < open_
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            doji = (candle_range > 0) & (body / candle_range < 0.1)
+            hammer = (body > 0) & (lower_wick / body > 2) & (upper_wick / body < 0.5)
+
+            prev = np.s_[:-1]
+            cur = np.s_[1:]
+            engulfing = np.zeros(len(close), np.int8)
+            engulf = ((body[prev] > 0) & (body[cur] / body[prev] > 1) & (bullish[cur] != bullish[prev]) &
+                      ((bullish[cur] & (open_[cur] < close[prev])) | (~bullish[cur] & (open_[cur] > close[prev]))))
+            engulfing[1:] = np.where(engulf, np.where(bullish[cur], 1, -1), 0)
+
+        # Three falling bearish candles, then a bullish close above the first one's open
+        strike = np.zeros(len(close), bool)
+        if len(close) >= 4:
+            b1, b2, b3 = bearish[:-3], bearish[1:-2], bearish[2:-1]
+            falling = (close[:-3] > close[1:-2]) & (close[1:-2] > close[2:-1])
+            strike[3:] = b1 & b2 & b3 & falling & bullish[3:] & (close[3:] > open_[:-3])
+
+        return {'doji': doji.astype(np.int8), 'hammer': hammer.astype(np.int8),
+                'engulfing': engulfing, 'three_line_strike': strike.astype(np.int8)}
+
+    def transform(self, data: Dict[str, Dict[str, pd.DataFrame]]) -> Dict[SeriesKey, pd.DataFrame]:
+        """Features for every {pair: {timeframe: candles}} series"""
+        tasks = [(pair, tf, df) for pair, timeframes in data.items()
+                 for tf, df in timeframes.items() if df is not None and not df.empty]
+        total_rows = sum(len(df) for _, _, df in tasks)
+        if self.max_workers <= 1 or len(tasks) < 2 or total_rows < self.min_parallel_rows:
+            return {(pair, tf): self.compute(df, tf) for pair, tf, df in tasks}
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            results = pool.map(_compute_task, tasks)
+            return {(pair, tf): features for (pair, tf, _), features in zip(tasks, results)}
+
+
+def _compute_task(task) -> pd.DataFrame:
+    _, timeframe, df = task
+    return FeaturePipeline.compute(df, timeframe)
+
+
+def feature_spec_hash() -> str:
+    """Changes whenever the feature definitions or columns change"""
+    source = inspect.getsource(FeaturePipeline.compute) + inspect.getsource(FeaturePipeline.patterns)
+    return hashlib.sha1((source + repr(FEATURE_COLUMNS)).encode()).hexdigest()[:16]
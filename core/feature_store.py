@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.feature_pipeline import FEATURE_COLUMNS, WARMUP_ROWS, FeaturePipeline, SeriesKey, feature_spec_hash
+from database.ohlcv_store import to_epoch_seconds
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEATURE_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'features')
+
+
+class _Plan:
+    """How one series' request is served: cached rows plus a computed tail"""
+
+    def __init__(self, df: pd.DataFrame, timestamps: np.ndarray, cached: Optional[Dict[str, np.ndarray]] = None,
+                 offset: int = 0, reuse: int = 0):
+        self.df = df
+        self.timestamps = timestamps
+        self.cached = cached      # Memory-mapped feature columns reused from disk
+        self.offset = offset      # File row of the first requested candle
+        self.reuse = reuse        # Requested rows served from the cache
+        # The tail is computed with up to WARMUP_ROWS earlier candles in front of it
+        self.compute_from = max(0, reuse - WARMUP_ROWS)
+
+
+class FeatureStore:
+    """On-disk cache of FeaturePipeline output, keyed by series, watermark and spec.
+
+    Each series directory holds one raw column file per feature (like
+    OHLCVStore, so new rows are appended bytes) and a ``meta.json`` with
+    the feature-spec hash and the watermark (last candle). A request
+    reuses the cached rows whose timestamps and closes still match the
+    candles, and computes features only for the rest: the last cached
+    candle (it may have been stored while open) onwards, using
+    `WARMUP_ROWS` earlier candles as indicator warm-up. A spec change or
+    rewritten history recomputes the series.
+
+    Rows are only overwritten after the meta has been cut back to the
+    rows that stay, and files are never truncated, so an interrupted write
+    leaves a shorter but intact cache rather than one that cannot be
+    mapped.
+    """
+
+    def __init__(self, pipeline: FeaturePipeline = None, root: str = DEFAULT_FEATURE_ROOT):
+        self.pipeline = pipeline or FeaturePipeline()
+        self.root = root
+        self.spec = feature_spec_hash()
+        self.computed_rows = 0
+        self.reused_rows = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _series_dir(self, pair: str, timeframe: str) -> str:
+        return os.path.join(self.root, f"{pair}_{timeframe}")
+
+    def read_meta(self, pair: str, timeframe: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self._series_dir(pair, timeframe), 'meta.json'), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, pair: str, timeframe: str, meta: Dict):
+        path = os.path.join(self._series_dir(pair, timeframe), 'meta.json')
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    def _load(self, pair: str, timeframe: str, meta: Dict) -> Optional[Dict[str, np.ndarray]]:
+        """Memory-mapped columns, or None when a file is shorter than the committed rows"""
+        series_dir = self._series_dir(pair, timeframe)
+        paths = {name: os.path.join(series_dir, f"{name}.bin") for name in ['timestamp'] + meta['columns']}
+        for path in paths.values():
+            if not os.path.exists(path) or os.path.getsize(path) < meta['rows'] * 8:
+                return None
+        return {name: np.memmap(path, dtype='<i8' if name == 'timestamp' else '<f8', mode='r', shape=(meta['rows'],))
+                for name, path in paths.items()}
+
+    def _plan(self, pair: str, timeframe: str, df: pd.DataFrame) -> _Plan:
+        timestamps = to_epoch_seconds(df['timestamp'])
+        meta = self.read_meta(pair, timeframe)
+        if not meta or not meta['rows'] or meta['spec'] != self.spec or meta['columns'] != FEATURE_COLUMNS:
+            return _Plan(df, timestamps)
+
+        columns = self._load(pair, timeframe, meta)
+        if columns is None:
+            logger.warning(f"Feature cache of {pair}_{timeframe} is incomplete, recomputing features")
+            return _Plan(df, timestamps)
+        cached_ts = columns['timestamp']
+        lo = int(np.searchsorted(cached_ts, timestamps[0]))
+        if timestamps[0] < cached_ts[0] or lo == len(cached_ts):
+            return _Plan(df, timestamps)
+        overlap = min(len(cached_ts) - lo, len(timestamps))
+        close = columns['close'][lo:lo + overlap]
+        if not (np.array_equal(cached_ts[lo:lo + overlap], timestamps[:overlap]) and
+                np.array_equal(close, df['close'].to_numpy(np.float64)[:overlap])):
+            logger.info(f"Candle history of {pair}_{timeframe} changed, recomputing features")
+            return _Plan(df, timestamps)
+
+        # The last cached candle may have been stored while still open: recompute it
+        reuse = overlap if lo + overlap < len(cached_ts) else overlap - 1
+        return _Plan(df, timestamps, {name: columns[name][lo:lo + reuse] for name in FEATURE_COLUMNS}, lo, reuse)
+
+    def transform(self, data: Dict[str, Dict[str, pd.DataFrame]]) -> Dict[SeriesKey, pd.DataFrame]:
+        """Features for every {pair: {timeframe: candles}} series, computing only what is not cached"""
+        plans = {(pair, tf): self._plan(pair, tf, df) for pair, timeframes in data.items()
+                 for tf, df in timeframes.items() if df is not None and not df.empty}
+
+        pending = {}
+        for (pair, tf), plan in plans.items():
+            if plan.reuse < len(plan.df):
+                pending.setdefault(pair, {})[tf] = plan.df.iloc[plan.compute_from:]
+        computed = self.pipeline.transform(pending)
+
+        results = {}
+        for key, plan in plans.items():
+            pair, tf = key
+            # (columns x rows) block, filled column by column with contiguous copies
+            values = np.empty((len(FEATURE_COLUMNS), len(plan.df)))
+            tail = computed[key].to_numpy()[plan.reuse - plan.compute_from:] if key in computed else None
+            for i, name in enumerate(FEATURE_COLUMNS):
+                if plan.reuse:
+                    values[i, :plan.reuse] = plan.cached[name]
+                if tail is not None:
+                    values[i, plan.reuse:] = tail[:, i]
+            plan.cached = None  # Release the memory maps before the files are rewritten
+            if tail is not None:
+                self._write(pair, tf, plan.offset + plan.reuse, plan.timestamps[plan.reuse:], values[:, plan.reuse:])
+                self.computed_rows += len(tail)
+            self.reused_rows += plan.reuse
+            results[key] = pd.DataFrame(values.T, index=plan.df.index, columns=FEATURE_COLUMNS, copy=False)
+
+        logger.info(f"Features: {self.reused_rows} rows from cache, {self.computed_rows} computed")
+        return results
+
+    def _write(self, pair: str, timeframe: str, offset: int, timestamps: np.ndarray, values: np.ndarray):
+        """Write rows (`values` is columns x rows) from file row `offset` on; later rows are dropped"""
+        series_dir = self._series_dir(pair, timeframe)
+        os.makedirs(series_dir, exist_ok=True)
+        meta = self.read_meta(pair, timeframe)
+        if meta and meta['rows'] > offset:
+            # Uncommit the rows about to be overwritten before touching them
+            meta['rows'] = offset
+            meta['last'] = self._timestamp_at(series_dir, offset - 1) if offset else None
+            self._write_meta(pair, timeframe, meta)
+
+        arrays = [('timestamp', np.asarray(timestamps, dtype='<i8'))]
+        arrays += [(name, np.asarray(values[i], dtype='<f8')) for i, name in enumerate(FEATURE_COLUMNS)]
+        for name, array in arrays:
+            path = os.path.join(series_dir, f"{name}.bin")
+            # No truncation: bytes past the committed rows are ignored, and open maps keep working
+            with open(path, 'r+b' if os.path.exists(path) else 'w+b') as f:
+                f.seek(offset * array.itemsize)
+                array.tofile(f)
+
+        first = meta['first'] if offset and meta else int(timestamps[0])
+        self._write_meta(pair, timeframe, {'spec': self.spec, 'columns': FEATURE_COLUMNS,
+                                           'rows': offset + len(timestamps), 'first': first,
+                                           'last': int(timestamps[-1])})
+
+    @staticmethod
+    def _timestamp_at(series_dir: str, row: int) -> int:
+        with open(os.path.join(series_dir, 'timestamp.bin'), 'rb') as f:
+            f.seek(row * 8)
+            return int(np.frombuffer(f.read(8), dtype='<i8')[0])
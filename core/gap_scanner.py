@@ -0,0 +1,92 @@
+import time
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+from database.candle_archive import CandleArchive
+
+# Kraken's OHLC endpoint only returns the most recent 720 candles, whatever `since` asks for
+SERVED_CANDLES = 720
+
+
+def served_from(interval: int, now: float = None) -> int:
+    """Oldest candle start the exchange still serves for an `interval`-minute timeframe"""
+    now = time.time() if now is None else now
+    return int(now) - SERVED_CANDLES * interval * 60
+
+
+@dataclass
+class Gap:
+    start: int     # Last candle before the hole (or the scan start)
+    end: int       # First candle after the hole (or the scan end)
+    missing: int   # Candles expected strictly between start and end
+
+
+@dataclass
+class FetchRange:
+    pair: str
+    timeframe: str
+    interval: int  # Minutes per candle
+    since: int     # Fetch candles after this timestamp...
+    until: int     # ...up to and including this one
+    missing: int
+
+
+def scan_gaps(timestamps: np.ndarray, interval_seconds: int, start: int = None, end: int = None) -> List[Gap]:
+    """Holes in a sorted timestamp array, found with one vectorized diff.
+
+    `start`/`end` bound the expected range: history missing before the
+    first stored candle or after the last one is reported as a gap too.
+    """
+    ts = np.asarray(timestamps, dtype=np.int64)
+    if start is not None:
+        ts = ts[np.searchsorted(ts, start, side='left'):]
+        # Anchor the first expected candle on the series' own cadence
+        anchor = start if not len(ts) else int(ts[0] - ((ts[0] - start) // interval_seconds) * interval_seconds)
+        ts = np.concatenate([[anchor - interval_seconds], ts])
+    if end is not None:
+        ts = np.concatenate([ts[:np.searchsorted(ts, end, side='right')], [end + interval_seconds]])
+    if len(ts) < 2:
+        return []
+
+    steps = np.diff(ts)
+    holes = np.flatnonzero(steps > interval_seconds)
+    missing = steps[holes] // interval_seconds - 1
+    return [Gap(int(ts[i]), int(ts[i + 1]), int(n)) for i, n in zip(holes, missing) if n > 0]
+
+
+def plan_fetch_ranges(gaps: List[Gap], pair: str, timeframe: str, interval: int,
+                      chunk_size: int = 720) -> List[FetchRange]:
+    """Minimal set of requests covering the gaps.
+
+    One OHLC request returns up to `chunk_size` candles from `since`, so
+    gaps closer together than that are merged into one range; the
+    scheduler splits a range that is still longer into consecutive chunks.
+    """
+    span = chunk_size * interval * 60
+    ranges: List[FetchRange] = []
+    for gap in sorted(gaps, key=lambda gap: gap.start):
+        until = gap.end - interval * 60
+        if ranges and gap.start - ranges[-1].since < span:
+            ranges[-1].until = max(ranges[-1].until, until)
+            ranges[-1].missing += gap.missing
+        else:
+            ranges.append(FetchRange(pair, timeframe, interval, gap.start, until, gap.missing))
+    return ranges
+
+
+def scan_series(archive: CandleArchive, pair: str, timeframe: str, interval: int, start: int,
+                chunk_size: int = 720, now: float = None) -> List[FetchRange]:
+    """Fetch ranges that complete one stored series from `start` to its last candle.
+
+    The tail after the last stored candle is left to the regular cursor
+    job, so only holes before it are planned here. Holes older than the
+    exchange serves cannot be filled and are not planned.
+    """
+    start = max(start, served_from(interval, now))
+    columns = archive.load_columns(pair, timeframe, start)
+    if not columns or not len(columns['timestamp']):
+        return []
+    gaps = scan_gaps(columns['timestamp'], interval * 60, start)
+    return plan_fetch_ranges(gaps, pair, timeframe, interval, chunk_size)
@@ -0,0 +1,111 @@
+from typing import Dict, Iterable, Union
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+TAKE_PROFIT, STOP_LOSS, TIMEOUT = 1, -1, 0
+
+# Rows per vectorized block; bounds the (rows x horizon) comparison matrices
+BLOCK_ROWS = 65_536
+
+# Barrier settings used for model training and indicator research
+TRAINING_BARRIERS = {'horizon': 20, 'take_profit': 2.0, 'stop_loss': 2.0, 'atr_period': 14}
+RESEARCH_BARRIERS = {'horizon': 10, 'take_profit': 1.5, 'stop_loss': 1.0, 'atr_period': 14}
+
+
+def forward_returns(close: pd.Series, horizons: Iterable[int] = (1, 5, 15, 60)) -> pd.DataFrame:
+    """Return from each close to the close `h` candles later, for every horizon (NaN at the end)"""
+    values = close.to_numpy(np.float64)
+    out = {}
+    for h in horizons:
+        future = np.full(len(values), np.nan)
+        if h < len(values):
+            future[:len(values) - h] = values[h:]
+        out[f'fwd_ret_{h}'] = future / values - 1
+    return pd.DataFrame(out, index=close.index)
+
+
+def average_true_range(df: pd.DataFrame, period: int = 14) -> np.ndarray:
+    """Same definition as Indicators.calculate_atr, for every row"""
+    prev_close = df['close'].shift()
+    true_range = np.maximum(df['high'] - df['low'],
+                            np.maximum((df['high'] - prev_close).abs(), (df['low'] - prev_close).abs()))
+    return true_range.rolling(period).mean().to_numpy(np.float64)
+
+
+def _first_hit(hits: np.ndarray) -> np.ndarray:
+    """Column of the first True per row, or the width when there is none"""
+    return np.where(hits.any(axis=1), hits.argmax(axis=1), hits.shape[1])
+
+
+def triple_barrier(df: pd.DataFrame, horizon: int = 20, take_profit: float = 2.0, stop_loss: float = 2.0,
+                   atr_period: int = 14, side: Union[int, np.ndarray] = 1) -> pd.DataFrame:
+    """Take-profit / stop-loss / timeout outcome of entering at every close.
+
+    Barriers are `take_profit` and `stop_loss` ATRs away from the entry
+    (pass ``atr_period=None`` for fractions of the price, e.g. 0.01 = 1%).
+    `side` is +1 (long) or -1 (short), per row or for all rows. The next
+    `horizon` candles' highs and lows are checked with a sliding window
+    view, one block of rows at a time; when both barriers fall inside the
+    same candle the stop is assumed to come first.
+
+    Columns: ``label`` (1 take-profit, -1 stop-loss, 0 timeout; NaN when
+    the horizon runs past the data without a hit or the ATR is still
+    warming up), ``bars`` (candles until the exit) and ``return`` (the
+    side-adjusted return at the exit).
+    """
+    close = df['close'].to_numpy(np.float64)
+    high = df['high'].to_numpy(np.float64)
+    low = df['low'].to_numpy(np.float64)
+    n = len(close)
+    side = np.broadcast_to(np.asarray(side, dtype=np.float64), (n,))
+
+    width = average_true_range(df, atr_period) if atr_period else close
+    upper = close + np.where(side > 0, take_profit, stop_loss) * width
+    lower = close - np.where(side > 0, stop_loss, take_profit) * width
+
+    # Candle j + 1 .. j + horizon of entry j; padded so every entry has a full window
+    future_high = sliding_window_view(np.concatenate([high[1:], np.full(horizon, np.nan)]), horizon)
+    future_low = sliding_window_view(np.concatenate([low[1:], np.full(horizon, np.nan)]), horizon)
+
+    up_at = np.empty(n, np.int64)
+    down_at = np.empty(n, np.int64)
+    for start in range(0, n, BLOCK_ROWS):
+        rows = slice(start, min(start + BLOCK_ROWS, n))
+        up_at[rows] = _first_hit(future_high[rows] >= upper[rows, None])
+        down_at[rows] = _first_hit(future_low[rows] <= lower[rows, None])
+
+    profit_at = np.where(side > 0, up_at, down_at)
+    stop_at = np.where(side > 0, down_at, up_at)
+    label = np.where(stop_at <= profit_at, STOP_LOSS, TAKE_PROFIT).astype(np.float64)
+    exit_at = np.minimum(profit_at, stop_at)
+    timeout = exit_at == horizon
+    label[timeout] = TIMEOUT
+
+    exit_price = np.where(label == TAKE_PROFIT, np.where(side > 0, upper, lower),
+                          np.where(side > 0, lower, upper))
+    timeout_index = np.minimum(np.arange(n) + horizon, n - 1)
+    exit_price = np.where(timeout, close[timeout_index], exit_price)
+    returns = side * (exit_price / close - 1)
+
+    # Undecided: the horizon runs past the last candle, or no barrier could be placed yet
+    undecided = (timeout & (np.arange(n) + horizon >= n)) | np.isnan(width)
+    label[undecided] = np.nan
+    returns[undecided] = np.nan
+    bars = np.minimum(exit_at + 1, horizon).astype(np.float64)
+    bars[undecided] = np.nan
+    return pd.DataFrame({'label': label, 'bars': bars, 'return': returns}, index=df.index)
+
+
+def label_series(df: pd.DataFrame, barriers: Dict = None, horizons: Iterable[int] = (1, 5, 15, 60)) -> pd.DataFrame:
+    """Triple-barrier outcome of a long entry plus multi-horizon forward returns for every candle"""
+    labels = triple_barrier(df, **(barriers or TRAINING_BARRIERS))
+    return pd.concat([labels, forward_returns(df['close'], horizons)], axis=1)
+
+
+def signal_outcomes(signals: pd.Series, df: pd.DataFrame, barriers: Dict = None) -> pd.DataFrame:
+    """Triple-barrier outcome of trading every non-zero signal in its direction (1 long, -1 short)"""
+    side = np.sign(signals.to_numpy(np.float64))
+    outcomes = triple_barrier(df, side=np.where(side == 0, 1, side), **(barriers or RESEARCH_BARRIERS))
+    return outcomes[side != 0]
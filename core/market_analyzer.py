@@ -17,7 +17,9 @@ class IntegratedMarketAnalyzer:
         self.llm_analyzer = LLMAnalyzer(config)
         self.indicator_analyzer = LLMIndicatorAnalyzer()
 
-    async def analyze_market(self, symbol: str, timeframe_data: Dict[str, pd.DataFrame]) -> Dict:
+    async def analyze_market(self, symbol: str, timeframe_data: Dict[str, pd.DataFrame],
+                             orderbook: Optional[Dict] = None,
+                             order_flow: Optional[Dict] = None) -> Dict:
         """Perform comprehensive market analysis"""
         try:
             # Get structured indicator data
@@ -39,7 +41,7 @@ class IntegratedMarketAnalyzer:
 
             # Get market context
             logger.info("Analyzing market context")
-            market_state = await self._analyze_market_context(timeframe_data)
+            market_state = await self._analyze_market_context(timeframe_data, orderbook, order_flow)
 
             # Prepare market data for LLM analysis
             market_data = self._prepare_market_data(
@@ -70,10 +72,17 @@ class IntegratedMarketAnalyzer:
             logger.error(f"Error in market analysis: {str(e)}")
             return self._default_analysis()
 
-    async def _analyze_market_context(self, timeframe_data: Dict[str, pd.DataFrame]) -> Dict:
+    async def _analyze_market_context(self, timeframe_data: Dict[str, pd.DataFrame],
+                                      orderbook: Optional[Dict] = None,
+                                      order_flow: Optional[Dict] = None) -> Dict:
         """Analyze market context with error handling"""
         try:
-            return self.market_context.analyze_market_context(timeframe_data)
+            market_state = self.market_context.analyze_market_context(timeframe_data)
+            market_state['liquidity'] = self.market_context.analyze_liquidity(orderbook)
+            market_state['order_flow'] = self.market_context.analyze_order_flow(order_flow)
+            if orderbook:
+                market_state['orderbook'] = orderbook
+            return market_state
         except Exception as e:
             logger.error(f"Error in market context analysis: {str(e)}")
             return self._default_market_context()
@@ -172,6 +181,7 @@ class IntegratedMarketAnalyzer:
                     'volatility': market_state.get('volatility', 'HIGH'),
                     'liquidity': market_state.get('liquidity', 'UNKNOWN'),
                     'trend_strength': market_state.get('trend_strength', 0.0),
+                    'order_flow': market_state.get('order_flow', {}),
                     'risk_level': risk_assessment.get('trade_risk', 'HIGH')
                 },
                 'technical_indicators': processed_indicators,
@@ -32,6 +32,49 @@ class MarketContextAnalyzer:
 
         return self._combine_timeframe_analyses(tf_analyses)
 
+    def analyze_liquidity(self, book_metrics: Optional[Dict]) -> str:
+        """Classify liquidity from order book spread and near-mid depth"""
+        if not book_metrics or book_metrics.get('spread_bps') is None:
+            return 'UNKNOWN'
+        
+        spread_bps = book_metrics['spread_bps']
+        depth = book_metrics.get('depth_notional', 0)
+        
+        if spread_bps <= 5 and depth >= 50000:
+            return 'HIGH'
+        elif spread_bps > 20 or depth < 5000:
+            return 'LOW'
+        return 'MEDIUM'
+
+    def analyze_order_flow(self, order_flow: Optional[Dict]) -> Dict:
+        """Summarize trade-tape aggregates into buy/sell pressure"""
+        if not order_flow:
+            return {'pressure': 'UNKNOWN', 'imbalance': 0.0, 'trade_count': 0}
+        
+        # Use the shortest window that actually has trades
+        for window in sorted(order_flow):
+            flow = order_flow[window]
+            if flow['trade_count'] > 0:
+                break
+        else:
+            return {'pressure': 'NEUTRAL', 'imbalance': 0.0, 'trade_count': 0}
+        
+        imbalance = flow['imbalance']
+        if imbalance > 0.2:
+            pressure = 'BUY'
+        elif imbalance < -0.2:
+            pressure = 'SELL'
+        else:
+            pressure = 'NEUTRAL'
+        
+        return {
+            'pressure': pressure,
+            'imbalance': float(imbalance),
+            'trade_count': int(flow['trade_count']),
+            'vwap': flow['vwap'],
+            'window': window
+        }
+
     def _analyze_timeframe(self, df: pd.DataFrame) -> Dict:
         volatility = self._analyze_volatility(df)
         trend = self._analyze_trend(df)
@@ -6,6 +6,9 @@ import pandas as pd
 import json
 import logging
 import os
+from core.feature_pipeline import FEATURE_COLUMNS, FeaturePipeline
+from core.labels import TAKE_PROFIT, TRAINING_BARRIERS, triple_barrier
+from core.window_dataset import WindowDataset
 
 class MLModel(nn.Module):
     def __init__(self, input_size):
@@ -24,12 +27,13 @@ class MLModel(nn.Module):
         return self.network(x)
 
 class MarketClassifier:
-    def __init__(self, model_path="models/crypto_model.pt"):
+    def __init__(self, model_path="models/crypto_model.pt", lookback=1):
         self.model_path = model_path
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model = None
         self.feature_names = None
         self.scaler = None
+        self.lookback = lookback  # Candles per sample; the MLP sees them flattened
         try:
             self._load_model()
         except Exception as e:
@@ -42,13 +46,13 @@ class MarketClassifier:
             self.model.load_state_dict(checkpoint['model_state'])
             self.feature_names = checkpoint['feature_names']
             self.scaler = checkpoint['scaler']
+            self.lookback = checkpoint.get('lookback', 1)
 
-    def train(self, data: pd.DataFrame) -> None:
-        features, labels = self._prepare_features(data)
-        input_size = features.shape[1]
-        
-        X = torch.FloatTensor(features).to(self.device)
-        y = torch.LongTensor(labels).to(self.device)
+    def train(self, data: pd.DataFrame, timeframe: str = None) -> None:
+        dataset = self._prepare_features(data, timeframe)
+        self.scaler = {name: values.tolist() for name, values in dataset.fit_scaler().items()}
+        dataset.standardize(self.scaler)
+        input_size = self.lookback * len(self.feature_names)
         
         self.model = MLModel(input_size).to(self.device)
         criterion = nn.CrossEntropyLoss()
@@ -58,9 +62,10 @@ class MarketClassifier:
         epochs = 50
         
         for epoch in range(epochs):
-            for i in range(0, len(X), batch_size):
-                batch_X = X[i:i+batch_size]
-                batch_y = y[i:i+batch_size]
+            # Windows are views of the feature rows; only each batch is materialized
+            for windows, labels in dataset.batches(batch_size, shuffle=True, seed=epoch):
+                batch_X = torch.from_numpy(windows.reshape(len(windows), -1)).to(self.device)
+                batch_y = torch.from_numpy(labels.astype(np.int64)).to(self.device)
                 
                 optimizer.zero_grad()
                 outputs = self.model(batch_X)
@@ -73,23 +78,79 @@ class MarketClassifier:
             'model_state': self.model.state_dict(),
             'input_size': input_size,
             'feature_names': self.feature_names,
-            'scaler': self.scaler
+            'scaler': self.scaler,
+            'lookback': self.lookback
         }, self.model_path)
 
-    def predict(self, data: pd.DataFrame) -> float:
+    def predict(self, data: pd.DataFrame, timeframe: str = None) -> float:
         if self.model is None or data.empty:
             return 0.5
         try:
-            features = self._prepare_prediction_features(data)
-            X = torch.FloatTensor(features).to(self.device)
+            dataset = self._prepare_prediction_features(data, timeframe)
+            if len(dataset) == 0:
+                return 0.5
+            windows, _ = dataset[[-1]]  # Most recent complete window
+            X = torch.from_numpy(windows.reshape(1, -1)).to(self.device)
+            self.model.eval()
             with torch.no_grad():
-                outputs = self.model(X)
-                probabilities = torch.softmax(outputs, dim=1)
+                probabilities = torch.softmax(self.model(X), dim=1)
                 return probabilities[0][1].item()
         except Exception as e:
             logging.error(f"Prediction error: {e}")
             return 0.5
 
-    def _prepare_features(self, data):
-        # Your existing feature preparation code
-        pass
\ No newline at end of file
+    def predict_batch(self, data: pd.DataFrame, batch_size: int = 4096, timeframe: str = None) -> np.ndarray:
+        """Up-probability for every complete window of `data`, in batches (0.5 without a model)"""
+        if data.empty:
+            return np.zeros(0)
+        dataset = self._prepare_prediction_features(data, timeframe)
+        if self.model is None:
+            return np.full(len(dataset), 0.5)
+        probabilities = []
+        self.model.eval()
+        with torch.no_grad():
+            for windows, _ in dataset.batches(batch_size):
+                X = torch.from_numpy(windows.reshape(len(windows), -1)).to(self.device)
+                probabilities.append(torch.softmax(self.model(X), dim=1)[:, 1].cpu().numpy())
+        return np.concatenate(probabilities) if probabilities else np.zeros(0)
+
+    def _feature_frame(self, data: pd.DataFrame, timeframe: str = None) -> pd.DataFrame:
+        """Per-row features; candles are run through FeaturePipeline unless already features.
+
+        Without an explicit `timeframe` it is inferred from the candle spacing
+        (the `timestamp` column or a datetime index), else 1m is assumed.
+        """
+        if all(name in data.columns for name in FEATURE_COLUMNS):
+            return data
+        if timeframe is None:
+            if 'timestamp' in data.columns:
+                timestamps = pd.Series(pd.to_datetime(data['timestamp']))
+            elif isinstance(data.index, pd.DatetimeIndex):
+                timestamps = data.index.to_series()
+            else:
+                timestamps = None
+            step = timestamps.diff().median() if timestamps is not None and len(timestamps) > 1 else None
+            if step is None or pd.isna(step):
+                logging.warning("No candle timestamps to infer the timeframe from, assuming 1m")
+                timeframe = '1m'
+            else:
+                timeframe = f"{max(1, int(step / pd.Timedelta(minutes=1)))}m"
+        return FeaturePipeline.compute(data, timeframe)
+
+    def _prepare_features(self, data, timeframe: str = None):
+        """Lookback windows with labels: take-profit hit first (or a `label` column)"""
+        features = self._feature_frame(data, timeframe)
+        if 'label' in data.columns:
+            labels = data['label'].astype(float)
+        else:
+            outcome = triple_barrier(data, **TRAINING_BARRIERS)['label']
+            labels = (outcome == TAKE_PROFIT).astype(float).where(outcome.notna())
+        self.feature_names = list(FEATURE_COLUMNS)
+        return WindowDataset.from_frames([features], self.lookback, [labels], self.feature_names)
+
+    def _prepare_prediction_features(self, data, timeframe: str = None):
+        features = self._feature_frame(data, timeframe)
+        dataset = WindowDataset.from_frames([features], self.lookback, feature_names=self.feature_names)
+        if self.scaler is not None:
+            dataset.standardize(self.scaler)
+        return dataset
\ No newline at end of file
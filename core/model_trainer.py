@@ -1,31 +1,41 @@
-import asyncio
 import pandas as pd
-import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 import joblib
 import os
-import time
 from market_data.kraken_feed import KrakenFeed
-from core.indicators import Indicators
+from core.backfill import BackfillScheduler
+from core.data_validation import ValidationState, timeframe_seconds, validate_candles
+from core.gap_scanner import scan_series, served_from
+from core.feature_pipeline import FeaturePipeline
+from core.feature_store import FeatureStore
+from core.labels import TAKE_PROFIT, TRAINING_BARRIERS, triple_barrier
+from database.historical_store import HistoricalDataStore
+from database.ohlcv_store import read_candle_csv
 import logging
 from datetime import datetime, timedelta
 import json
 from dotenv import load_dotenv
 
 class ModelTrainer:
-    def __init__(self, market_type="crypto"):
+    def __init__(self, market_type="crypto", config: dict = None):
         load_dotenv()
         self.feed = KrakenFeed(
             api_key=os.getenv('KRAKEN_API_KEY'),
-            secret_key=os.getenv('KRAKEN_SECRET_KEY')
+            secret_key=os.getenv('KRAKEN_SECRET_KEY'),
+            rest_limits=(config or {}).get('feed', {}).get('rest_limits')
         )
         script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.data_dir = os.path.join(script_dir, 'data', 'historical')
         self.model_dir = os.path.join(script_dir, 'models')
         self.market_type = market_type
+        self.backfill_concurrency = 6
         os.makedirs(self.data_dir, exist_ok=True)
         os.makedirs(self.model_dir, exist_ok=True)
+        self.history = HistoricalDataStore(self.data_dir)
+        self.store = self.history.archive
+        self.validation = ValidationState(self.store)
+        self.features = FeatureStore(FeaturePipeline(), os.path.join(script_dir, 'data', 'features'))
         
         # Configure logging
         logging.basicConfig(level=logging.INFO)
@@ -34,172 +44,72 @@ class ModelTrainer:
         """Generate standardized filepath for historical data"""
         return os.path.join(self.data_dir, f"{pair}_{timeframe}_historical.csv")
         
-    def _validate_ohlc_data(self, df: pd.DataFrame) -> bool:
-        """Validate OHLC data for common issues"""
-        if df.empty:
-            return False
-            
-        required_columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
-        if not all(col in df.columns for col in required_columns):
-            logging.error(f"Missing required columns. Found: {df.columns.tolist()}")
-            return False
-            
-        # Check for NaN values
-        nan_counts = df[required_columns].isna().sum()
-        if nan_counts.any():
-            logging.error(f"Found NaN values: {nan_counts[nan_counts > 0]}")
-            return False
-            
-        # Validate price relationships
-        invalid_prices = df[
-            (df['high'] < df['low']) | 
-            (df['close'] < df['low']) | 
-            (df['close'] > df['high']) |
-            (df['open'] < df['low']) |
-            (df['open'] > df['high'])
-        ]
-        if not invalid_prices.empty:
-            logging.error(f"Found {len(invalid_prices)} rows with invalid price relationships")
-            return False
-            
-        # Check for duplicates
-        duplicates = df[df.duplicated(subset=['timestamp'])]
-        if not duplicates.empty:
-            logging.error(f"Found {len(duplicates)} duplicate timestamps")
-            return False
-            
-        return True
-
     async def _fetch_chunk(self, pair: str, interval: int, chunk_size: int, since_timestamp: int) -> pd.DataFrame:
-        """Fetch a single chunk of historical data with validation"""
+        """Fetch a single chunk of historical data (validated when committed)"""
         try:
             ohlc = await self.feed.get_historical_data(pair, interval, chunk_size, since_timestamp)
             if ohlc is not None and not ohlc.empty:
-                if self._validate_ohlc_data(ohlc):
-                    return ohlc
-                else:
-                    logging.error(f"Invalid data received for {pair} from timestamp {since_timestamp}")
-                    return pd.DataFrame()
+                return ohlc
         except Exception as e:
             logging.error(f"Error fetching chunk for {pair}: {e}")
         return pd.DataFrame()
 
-    def load_cached_data(self, pair: str, timeframe: str) -> pd.DataFrame:
-        """Load historical data from cache if it exists"""
+    def _migrate_csv(self, pair: str, timeframe: str):
+        """Import a legacy CSV cache into the columnar store once"""
         filepath = self._get_data_filepath(pair, timeframe)
-        if os.path.exists(filepath):
-            try:
-                df = pd.read_csv(filepath)
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                if self._validate_ohlc_data(df):
-                    return df.sort_values('timestamp')
-                else:
-                    logging.error(f"Cached data validation failed for {pair}_{timeframe}")
-                    # Backup invalid data before returning empty DataFrame
-                    backup_path = filepath + f".invalid_{int(time.time())}"
-                    df.to_csv(backup_path, index=False)
-                    logging.info(f"Backed up invalid data to {backup_path}")
-            except Exception as e:
-                logging.error(f"Error loading cached data for {pair}_{timeframe}: {e}")
+        if self.store.exists(pair, timeframe) or not os.path.exists(filepath):
+            return
+        try:
+            df, report, previous_last = self.validation.validate_append(pair, timeframe, read_candle_csv(filepath))
+            if not report.ok:
+                logging.warning(f"Cached data issues: {report.summary()}")
+            self.store.append(pair, timeframe, df)
+            self.validation.commit_append(pair, timeframe, report, previous_last)
+            logging.info(f"Imported {len(df)} candles for {pair}_{timeframe} from {filepath}")
+        except Exception as e:
+            logging.error(f"Error importing cached data for {pair}_{timeframe}: {e}")
+
+    def load_cached_data(self, pair: str, timeframe: str, start=None, end=None) -> pd.DataFrame:
+        """Load candles in [start, end] from the archive (validated when appended)"""
+        self._migrate_csv(pair, timeframe)
+        try:
+            return self.history.get(pair, timeframe, start, end)
+        except Exception as e:
+            logging.error(f"Error loading cached data for {pair}_{timeframe}: {e}")
         return pd.DataFrame()
 
     def append_to_cache(self, pair: str, timeframe: str, new_data: pd.DataFrame):
-        """Append new data to cache, maintaining uniqueness and sorting"""
+        """Validate new candles against the stored tail and append the accepted rows"""
         if new_data.empty:
             return
-            
-        filepath = self._get_data_filepath(pair, timeframe)
         try:
-            # Load existing data if any
-            existing_data = self.load_cached_data(pair, timeframe)
-            
-            if existing_data.empty:
-                # No existing data, just save new data
-                new_data.to_csv(filepath, index=False)
-                logging.info(f"Saved {len(new_data)} new candles to {filepath}")
-            else:
-                # Combine existing and new data
-                combined_data = pd.concat([existing_data, new_data])
-                # Remove duplicates keeping the newer data
-                combined_data = combined_data.drop_duplicates(
-                    subset=['timestamp'], 
-                    keep='last'
-                ).sort_values('timestamp')
-                
-                if self._validate_ohlc_data(combined_data):
-                    # Create a backup of the old file
-                    backup_path = filepath + f".backup_{int(time.time())}"
-                    os.rename(filepath, backup_path)
-                    
-                    # Save the new combined data
-                    combined_data.to_csv(filepath, index=False)
-                    logging.info(f"Appended {len(new_data)} candles to {filepath}")
-                    logging.info(f"Total records: {len(combined_data)}")
-                    
-                    # Remove backup if save was successful
-                    os.remove(backup_path)
-                else:
-                    logging.error("Failed to validate combined data, keeping existing data")
-                    
+            new_data, report, previous_last = self.validation.validate_append(pair, timeframe, new_data)
+            if not report.ok:
+                logging.warning(f"Candle issues: {report.summary()}")
+            written = self.store.append(pair, timeframe, new_data)
+            self.validation.commit_append(pair, timeframe, report, previous_last)
+            logging.info(f"Appended {written} candles to {pair}_{timeframe} "
+                         f"(total records: {self.store.rows(pair, timeframe)})")
         except Exception as e:
             logging.error(f"Error appending data to cache for {pair}_{timeframe}: {e}")
 
-    async def update_historical_data(self, pair: str, timeframe_info: dict) -> pd.DataFrame:
-        """Update historical data, fetching only new data if cache exists"""
-        tf_name = f"{timeframe_info['interval']}m"
-        cached_data = self.load_cached_data(pair, tf_name)
-        
-        # Calculate the timestamp to start fetching from
-        if not cached_data.empty:
-            last_timestamp = cached_data['timestamp'].max()
-            start_timestamp = int(last_timestamp.timestamp())
-            logging.info(f"Found cached data for {pair}_{tf_name} up to {last_timestamp}")
-        else:
-            # If no cached data, fetch the full historical period
-            start_timestamp = int((datetime.now() - timedelta(days=timeframe_info['days'])).timestamp())
-        
-        # Fetch new data in chunks
-        chunk_size = 5000
-        new_chunks = []
-        current_timestamp = start_timestamp
-
-        while True:
-            chunk = await self._fetch_chunk(pair, timeframe_info['interval'], chunk_size, current_timestamp)
-            if chunk.empty:
-                break
-                
-            new_chunks.append(chunk)
-            logging.info(f"Downloaded chunk of {len(chunk)} candles for {pair}_{tf_name}")
-            
-            # Update timestamp for next chunk
-            current_timestamp = int(chunk['timestamp'].max().timestamp())
-            
-            # Rate limiting
-            await asyncio.sleep(1)
-            
-            # Break if we've reached recent data
-            if current_timestamp > int(datetime.now().timestamp() - 300):  # 5 minutes ago
-                break
-        
-        if new_chunks:
-            # Combine new chunks
-            new_data = pd.concat(new_chunks)
-            new_data = new_data.drop_duplicates(subset=['timestamp']).sort_values('timestamp')
-            
-            # Append to cache
-            self.append_to_cache(pair, tf_name, new_data)
-            
-            # Return combined data for training
-            if not cached_data.empty:
-                return pd.concat([cached_data, new_data]).drop_duplicates(
-                    subset=['timestamp']
-                ).sort_values('timestamp')
-            return new_data
-        
-        return cached_data
+    def fill_gap(self, pair: str, timeframe: str, new_data: pd.DataFrame):
+        """Merge candles for a hole inside stored history; returns rows added, None on error"""
+        try:
+            new_data, report = validate_candles(new_data, timeframe_seconds(timeframe), pair=pair, timeframe=timeframe)
+            written = self.store.append(pair, timeframe, new_data)
+            self.validation.record(pair, timeframe, report, None)
+            if written:
+                # Rows landed inside stored history: a resident copy would keep serving the hole
+                self.history.invalidate(pair, timeframe)
+            logging.info(f"Filled {written} missing candles in {pair}_{timeframe}")
+            return written
+        except Exception as e:
+            logging.error(f"Error filling gap in {pair}_{timeframe}: {e}")
 
     async def download_training_data(self):
         """Download historical data for all major pairs with improved caching"""
+        await self.feed.ensure_session()
         pairs = await self.feed.get_active_pairs()
         pairs = pairs[:14]  # Top pairs only
         
@@ -210,72 +120,73 @@ class ModelTrainer:
             '15m': {'interval': 15, 'days': 180}  # 6 months of 15m data
         }
         
-        all_data = {}
+        # All pairs and timeframes are fetched concurrently, largest gaps first,
+        # sharing the feed's REST rate budget
+        scheduler = BackfillScheduler(
+            fetch_chunk=lambda pair, interval, since: self._fetch_chunk(pair, interval, 5000, since),
+            commit_chunk=self.append_to_cache,
+            commit_range=self.fill_gap,
+            state_file=os.path.join(self.data_dir, 'backfill_state.json'),
+            concurrency=self.backfill_concurrency
+        )
         for pair in pairs:
-            try:
-                pair_data = {}
-                for tf_name, tf_info in timeframes.items():
-                    logging.info(f"Processing {tf_name} data for {pair}...")
-                    
-                    # Update historical data with caching
-                    data = await self.update_historical_data(pair, tf_info)
-                    
-                    if not data.empty:
-                        pair_data[tf_name] = data
-                        logging.info(f"Successfully processed {len(data)} candles for {pair} {tf_name}")
-                
-                if pair_data:
-                    all_data[pair] = pair_data
-                    logging.info(f"Completed downloading data for {pair}")
-                
-            except Exception as e:
-                logging.error(f"Error processing data for {pair}: {e}")
-                continue
-                
+            for tf_name, tf_info in timeframes.items():
+                self._migrate_csv(pair, tf_name)
+                cached_until = self.store.last_timestamp(pair, tf_name)
+                start = int((datetime.now() - timedelta(days=tf_info['days'])).timestamp())
+                scheduler.add_job(pair, tf_name, tf_info['interval'], start, cached_until)
+                # Holes inside the stored window are fetched as bounded ranges alongside the tails
+                scheduler.prune_ranges(pair, tf_name, served_from(tf_info['interval']))
+                for fetch in scan_series(self.store, pair, tf_name, tf_info['interval'], start):
+                    scheduler.add_range(pair, tf_name, fetch.interval, fetch.since, fetch.until)
+        
+        try:
+            await scheduler.run()
+        except Exception as e:
+            logging.error(f"Error during backfill: {e}")
+
+        # Rows that reached the archive without passing through append_to_cache (CSV
+        # imports) are validated once, from each series' watermark onwards
+        for pair in pairs:
+            for tf_name in timeframes:
+                report = self.validation.validate_series(pair, tf_name)
+                if not report.ok:
+                    logging.warning(f"Stored candle issues: {report.summary()}")
+        
+        # Training only reads each timeframe's window, i.e. the partitions it overlaps;
+        # all series are loaded concurrently
+        now = pd.Timestamp.now(tz='UTC')
+        frames = self.history.load_many(
+            (pair, tf_name, now - pd.Timedelta(days=tf_info['days']))
+            for pair in pairs for tf_name, tf_info in timeframes.items()
+        )
+        all_data = {}
+        for (pair, tf_name), data in frames.items():
+            if not data.empty:
+                all_data.setdefault(pair, {})[tf_name] = data
+                logging.info(f"Successfully processed {len(data)} candles for {pair} {tf_name}")
+        
+        await self.feed.close()
         return all_data
                 
     def prepare_features(self, data):
-        """Create features from OHLC data with technical indicators"""
+        """Per-row indicator, pattern and return features; only candles not in the feature store are computed"""
         features = []
         labels = []
         
-        for pair, timeframes in data.items():
-            for tf, df in timeframes.items():
-                if df is None or df.empty:
-                    continue
-                    
-                # Calculate technical indicators
-                indicators = Indicators.calculate_all(df, tf)
-                
-                # Create feature set
-                feature_set = pd.DataFrame({
-                    'rsi': indicators['rsi'],
-                    'macd': indicators['macd'],
-                    'macd_signal': indicators['macd_signal'],
-                    'bb_upper': indicators['bb_upper'],
-                    'bb_lower': indicators['bb_lower'],
-                    'ema_short': indicators['ema_short'],
-                    'ema_long': indicators['ema_long'],
-                    'tenkan_sen': indicators['tenkan_sen'],
-                    'kijun_sen': indicators['kijun_sen'],
-                    'volume': df['volume'],
-                    'close': df['close'],
-                    'high': df['high'],
-                    'low': df['low']
-                })
-                
-                # Calculate future returns for labels
-                future_returns = df['close'].pct_change(5).shift(-5)  # 5-period future returns
-                
-                # Create labels: 1 for positive returns, 0 for negative
-                labels_array = (future_returns > 0).astype(int)
-                
-                # Remove rows with NaN values
-                valid_idx = ~(feature_set.isna().any(axis=1) | labels_array.isna())
-                features.append(feature_set[valid_idx])
-                labels.append(labels_array[valid_idx])
+        for (pair, tf), feature_set in self.features.transform(data).items():
+            df = data[pair][tf]
+            
+            # Label: 1 when the take-profit barrier is hit before the stop-loss or the timeout
+            outcome = triple_barrier(df, **TRAINING_BARRIERS)['label']
+            labels_array = (outcome == TAKE_PROFIT).astype(int)
+            
+            # Remove indicator warm-up rows and the last rows, whose outcome is unknown
+            valid_idx = ~(feature_set.isna().any(axis=1) | outcome.isna())
+            features.append(feature_set[valid_idx])
+            labels.append(labels_array[valid_idx])
                 
-        return pd.concat(features), pd.concat(labels)
+        return pd.concat(features, ignore_index=True), pd.concat(labels, ignore_index=True)
         
     def train_model(self, features, labels):
         """Train and save the model"""
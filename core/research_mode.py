@@ -1,8 +1,19 @@
 import pandas as pd
 import asyncio
 from core.db_manager import DatabaseManager
+from core.labels import TAKE_PROFIT, signal_outcomes
+from database.shared_dataset import SharedDataset
 import logging
 
+
+def _backtest_shared(dataset: SharedDataset, pair: str, timeframe: str):
+    """Process pool task: backtest one series straight from the shared memory map"""
+    df = dataset.frame(pair, timeframe)
+    if df.empty:
+        return pair, timeframe, None
+    return pair, timeframe, ResearchMode(None).backtest_indicators(df, pair, timeframe)
+
+
 class ResearchMode:
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
@@ -17,6 +28,15 @@ class ResearchMode:
                 
         await asyncio.gather(*tasks)
         
+    def research_dataset(self, dataset: SharedDataset, pairs: list = None, max_workers: int = None):
+        """Backtest every pair/timeframe of a shared dataset across processes; results stored here"""
+        tasks = [(pair, timeframe) for timeframe in self.timeframes
+                 for pair in dataset.pairs(timeframe) if pairs is None or pair in pairs]
+        for pair, timeframe, results in dataset.map(_backtest_shared, tasks, max_workers=max_workers):
+            if results is not None:
+                self.store_results(results, pair, timeframe)
+        return len(tasks)
+
     async def analyze_timeframe(self, symbol: str, timeframe: str, data: pd.DataFrame):
         try:
             results = self.backtest_indicators(data, symbol, timeframe)
@@ -108,9 +128,11 @@ class ResearchMode:
         if len(signals) == 0:
             return 0, 0
             
-        future_returns = df['close'].pct_change().shift(-1)
-        correct_predictions = ((signals == 1) & (future_returns > 0)) | ((signals == -1) & (future_returns < 0))
-        success_rate = correct_predictions.mean()
-        total_trades = len(signals[signals != 0])
+        # A signal succeeds when a trade in its direction reaches take-profit before stop-loss/timeout
+        outcomes = signal_outcomes(signals, df)['label'].dropna()
+        total_trades = len(outcomes)
+        if total_trades == 0:
+            return 0, 0
+        success_rate = (outcomes == TAKE_PROFIT).mean()
         
         return float(success_rate), total_trades
\ No newline at end of file
@@ -0,0 +1,99 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class WindowDataset:
+    """Lookback windows over per-row features without copying them.
+
+    Rows of one or more series are stored once, as a contiguous float32
+    (rows x features) array; ``windows`` is a read-only
+    ``sliding_window_view`` of it shaped (rows - lookback + 1, lookback,
+    features), so window i is rows i..i+lookback-1. Only windows that stay
+    inside one series and contain no NaN (and have a label, when labels
+    are given) are samples. Indexing a batch of samples is the only copy,
+    and it is batch-sized.
+    """
+
+    def __init__(self, features: np.ndarray, lookback: int, labels: np.ndarray = None,
+                 segments: np.ndarray = None, feature_names: List[str] = None):
+        self.values = np.ascontiguousarray(features, dtype=np.float32)
+        self.lookback = lookback
+        self.feature_names = feature_names
+        self.labels = None if labels is None else np.asarray(labels, dtype=np.float64)
+        if len(self.values) < lookback:
+            self.values = np.empty((0, self.values.shape[1] if self.values.ndim == 2 else 0), np.float32)
+            self.windows = self.values.reshape(0, lookback, self.values.shape[1])
+            self.index = np.zeros(0, np.int64)
+            return
+        self.windows = sliding_window_view(self.values, lookback, axis=0).transpose(0, 2, 1)
+        self.index = self._valid_windows(segments)
+
+    def _valid_windows(self, segments: Optional[np.ndarray]) -> np.ndarray:
+        """Window start offsets whose rows are complete and belong to a single series"""
+        bad = np.isnan(self.values).any(axis=1).astype(np.int64)
+        # Windows with no bad row: difference of a running count over the window
+        running = np.concatenate([[0], np.cumsum(bad)])
+        valid = running[self.lookback:] - running[:-self.lookback] == 0
+        if segments is not None:
+            segments = np.asarray(segments)
+            valid &= segments[self.lookback - 1:] == segments[:len(segments) - self.lookback + 1]
+        if self.labels is not None:
+            # A window's label is the one of its last row
+            valid &= ~np.isnan(self.labels[self.lookback - 1:])
+        return np.flatnonzero(valid)
+
+    @classmethod
+    def from_frames(cls, frames: List[pd.DataFrame], lookback: int, labels: List[pd.Series] = None,
+                    feature_names: List[str] = None) -> 'WindowDataset':
+        """One dataset over several series; windows never span two of them"""
+        feature_names = feature_names or list(frames[0].columns)
+        rows = sum(len(frame) for frame in frames)
+        values = np.empty((rows, len(feature_names)), np.float32)
+        segments = np.empty(rows, np.int32)
+        label_values = None if labels is None else np.empty(rows)
+        offset = 0
+        for i, frame in enumerate(frames):
+            end = offset + len(frame)
+            values[offset:end] = frame[feature_names].to_numpy(np.float32)
+            segments[offset:end] = i
+            if labels is not None:
+                label_values[offset:end] = np.asarray(labels[i], dtype=np.float64)
+            offset = end
+        return cls(values, lookback, label_values, segments, feature_names)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, i) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Sample(s) `i`: windows (.., lookback, features) and their labels"""
+        starts = self.index[i]
+        label = None if self.labels is None else self.labels[starts + self.lookback - 1]
+        return self.windows[starts], label
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return len(self.index), self.lookback, self.values.shape[1]
+
+    def fit_scaler(self) -> Dict[str, np.ndarray]:
+        """Per-feature mean/std over the rows that appear in any sample"""
+        used = np.zeros(len(self.values), bool)
+        for offset in range(self.lookback):
+            used[self.index + offset] = True
+        rows = self.values[used]
+        std = rows.std(axis=0)
+        return {'mean': rows.mean(axis=0), 'std': np.where(std > 0, std, 1.0)}
+
+    def standardize(self, scaler: Dict[str, np.ndarray]):
+        """Scale the underlying rows in place: every window sees it, nothing is copied per window"""
+        self.values -= np.asarray(scaler['mean'], dtype=np.float32)
+        self.values /= np.asarray(scaler['std'], dtype=np.float32)
+
+    def batches(self, batch_size: int, shuffle: bool = False,
+                seed: int = None) -> Iterator[Tuple[np.ndarray, Optional[np.ndarray]]]:
+        """(batch, lookback, features) windows with labels; each batch is the only copy"""
+        order = np.random.default_rng(seed).permutation(len(self.index)) if shuffle else np.arange(len(self.index))
+        for start in range(0, len(order), batch_size):
+            yield self[order[start:start + batch_size]]
@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from database.ohlcv_store import (COLUMNS, DEFAULT_ROOT, OHLCVStore, epoch_seconds, read_candle_csv,
+                                  to_epoch_seconds)
+
+
+def month_keys(timestamps: np.ndarray) -> np.ndarray:
+    """'YYYY-MM' partition key for each epoch-second timestamp"""
+    return np.datetime_as_string(timestamps.astype('datetime64[s]').astype('datetime64[M]'), unit='M')
+
+
+class CandleArchive:
+    """Month-partitioned candle history with a per-series manifest.
+
+    Every pair/timeframe directory holds one columnar partition per
+    calendar month (see OHLCVStore) and a ``manifest.json`` with each
+    partition's row count and time range. Appends only write the
+    partitions their rows fall in, which for live data is just the open
+    month. The manifest also counts `rewrites`: appends that inserted rows
+    before the last stored candle, which invalidate in-memory copies. Range loads consult the manifest and memory-map only the
+    partitions that overlap the requested window.
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._manifests: Dict[str, Dict] = {}
+
+    def _series_dir(self, pair: str, timeframe: str) -> str:
+        return os.path.join(self.root, f"{pair}_{timeframe}")
+
+    def _partitions(self, pair: str, timeframe: str) -> OHLCVStore:
+        return OHLCVStore(self._series_dir(pair, timeframe))
+
+    def manifest(self, pair: str, timeframe: str) -> Dict:
+        """{'partitions': {'YYYY-MM': {'rows', 'first', 'last'}}, ...}"""
+        path = os.path.join(self._series_dir(pair, timeframe), 'manifest.json')
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {'partitions': {}}
+        cached = self._manifests.get(path)
+        if cached is None or cached[0] != mtime:
+            with open(path, 'r') as f:
+                cached = (mtime, json.load(f))
+            self._manifests[path] = cached
+        return cached[1]
+
+    def _write_manifest(self, pair: str, timeframe: str, manifest: Dict):
+        path = os.path.join(self._series_dir(pair, timeframe), 'manifest.json')
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+        self._manifests[path] = (os.stat(path).st_mtime_ns, manifest)
+
+    def series(self) -> List[tuple]:
+        """(pair, timeframe) of every series directory under the root"""
+        found = []
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name)
+            if '_' in name and os.path.exists(os.path.join(path, 'manifest.json')):
+                found.append(tuple(name.rsplit('_', 1)))
+        return found
+
+    def version(self, pair: str, timeframe: str) -> Optional[int]:
+        """Changes whenever the series is written (manifest modification time)"""
+        self.manifest(pair, timeframe)
+        try:
+            return os.stat(os.path.join(self._series_dir(pair, timeframe), 'manifest.json')).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def rewrites(self, pair: str, timeframe: str) -> int:
+        """Number of appends that inserted candles before the series' last one"""
+        return self.manifest(pair, timeframe).get('rewrites', 0)
+
+    def exists(self, pair: str, timeframe: str) -> bool:
+        return bool(self.manifest(pair, timeframe)['partitions'])
+
+    def rows(self, pair: str, timeframe: str) -> int:
+        return sum(p['rows'] for p in self.manifest(pair, timeframe)['partitions'].values())
+
+    def first_timestamp(self, pair: str, timeframe: str) -> Optional[int]:
+        partitions = self.manifest(pair, timeframe)['partitions']
+        return partitions[min(partitions)]['first'] if partitions else None
+
+    def last_timestamp(self, pair: str, timeframe: str) -> Optional[int]:
+        partitions = self.manifest(pair, timeframe)['partitions']
+        return partitions[max(partitions)]['last'] if partitions else None
+
+    def append(self, pair: str, timeframe: str, data: pd.DataFrame) -> int:
+        """Write candles into their monthly partitions; returns rows added"""
+        if data is None or data.empty:
+            return 0
+        timestamps = to_epoch_seconds(data['timestamp'])
+        keys = month_keys(timestamps)
+        partitions = self._partitions(pair, timeframe)
+        manifest = self.manifest(pair, timeframe)
+        entries = dict(manifest['partitions'])
+        last = self.last_timestamp(pair, timeframe)
+        if last is not None and timestamps.min() < last:
+            manifest = {**manifest, 'rewrites': manifest.get('rewrites', 0) + 1}
+
+        written = 0
+        for key in map(str, np.unique(keys)):
+            part = data[keys == key]
+            written += partitions.append(key, timeframe, part)
+            meta = partitions.read_meta(key, timeframe)
+            entries[key] = {'rows': meta['rows'], 'first': meta['first'], 'last': meta['last']}
+
+        self._write_manifest(pair, timeframe, {**manifest, 'partitions': entries})
+        return written
+
+    def overlapping(self, pair: str, timeframe: str, start: Optional[int], end: Optional[int]) -> List[str]:
+        """Partition keys whose time range intersects [start, end]"""
+        return sorted(
+            key for key, entry in self.manifest(pair, timeframe)['partitions'].items()
+            if (start is None or entry['last'] >= start) and (end is None or entry['first'] <= end)
+        )
+
+    def load_columns(self, pair: str, timeframe: str, start=None, end=None) -> Dict[str, np.ndarray]:
+        """Columns for candles with start <= timestamp <= end, reading only overlapping partitions"""
+        start, end = epoch_seconds(start), epoch_seconds(end)
+        partitions = self._partitions(pair, timeframe)
+        pieces = []
+        for key in self.overlapping(pair, timeframe, start, end):
+            columns = partitions.load(key, timeframe)
+            if not columns:
+                continue
+            timestamps = columns['timestamp']
+            lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+            hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side='right'))
+            if hi > lo:
+                pieces.append({name: values[lo:hi] for name, values in columns.items()})
+
+        if not pieces:
+            return {}
+        if len(pieces) == 1:
+            return pieces[0]
+        return {name: np.concatenate([piece[name] for piece in pieces]) for name in COLUMNS}
+
+    def load_frame(self, pair: str, timeframe: str, start=None, end=None) -> pd.DataFrame:
+        """Candles in [start, end] as a DataFrame with a datetime `timestamp` column"""
+        columns = self.load_columns(pair, timeframe, start, end)
+        if not columns:
+            return pd.DataFrame()
+        frame = pd.DataFrame({name: np.asarray(values) for name, values in columns.items()})
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='s')
+        return frame
+
+    def import_csv(self, pair: str, timeframe: str, csv_path: str) -> int:
+        """Load new rows from a CSV export; unchanged files are skipped"""
+        stat = os.stat(csv_path)
+        source = {'path': os.path.basename(csv_path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+        if self.manifest(pair, timeframe).get('source') == source:
+            return 0
+
+        data = read_candle_csv(csv_path)
+        if 'timestamp' not in data.columns:
+            return 0
+        last = self.last_timestamp(pair, timeframe)
+        if last is not None:
+            data = data[to_epoch_seconds(data['timestamp']) >= last]
+        written = self.append(pair, timeframe, data)
+
+        manifest = self.manifest(pair, timeframe)
+        if manifest['partitions']:
+            self._write_manifest(pair, timeframe, {**manifest, 'source': source})
+        logging.debug(f"Imported {written} rows into {pair}_{timeframe} from {csv_path}")
+        return written
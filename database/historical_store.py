@@ -0,0 +1,170 @@
+import glob
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from database.candle_archive import CandleArchive
+from database.ohlcv_store import COLUMNS, DEFAULT_ROOT, epoch_seconds
+
+SeriesKey = Tuple[str, str]
+
+
+class _Resident:
+    """In-memory columns of one series covering [start, last]"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], start: Optional[int], version: int, rewrites: int):
+        self.columns = columns
+        self.start = start  # None: covers the whole series
+        self.version = version  # Archive version the copy was loaded from
+        self.rewrites = rewrites  # Archive rewrite count at load time: a change means rows moved
+        self.last = int(columns['timestamp'][-1]) if len(columns['timestamp']) else None
+        self.nbytes = sum(values.nbytes for values in columns.values())
+
+
+class HistoricalDataStore:
+    """Single read API for historical candles.
+
+    Series come from the month-partitioned CandleArchive and are kept
+    resident in a memory-bounded LRU, so repeated reads in the same
+    process are in-memory binary searches. A resident series is extended
+    with just the new rows when the archive grows at its end; a request
+    for an earlier start than the resident copy covers, or candles merged
+    into stored history, reload it. `load_many` fetches several series concurrently in a thread
+    pool (NumPy/pandas release the GIL for the heavy parts).
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT, max_bytes: int = 512 * 1024 * 1024,
+                 max_workers: int = 8):
+        self.archive = CandleArchive(root)
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self._lru: 'OrderedDict[SeriesKey, _Resident]' = OrderedDict()
+        self._resident_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, pair: str, timeframe: str, start=None, end=None) -> pd.DataFrame:
+        """Candles with start <= timestamp <= end as a DataFrame"""
+        columns = self.get_columns(pair, timeframe, start, end)
+        if not columns:
+            return pd.DataFrame()
+        frame = pd.DataFrame(columns)
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='s')
+        return frame
+
+    def get_columns(self, pair: str, timeframe: str, start=None, end=None) -> Dict[str, np.ndarray]:
+        """Column arrays for the range, sliced from the resident copy with searchsorted"""
+        start, end = epoch_seconds(start), epoch_seconds(end)
+        resident = self._resident(pair, timeframe, start)
+        if resident is None:
+            return {}
+        timestamps = resident.columns['timestamp']
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side='right'))
+        return {name: values[lo:hi] for name, values in resident.columns.items()}
+
+    def load_many(self, requests: Iterable[tuple]) -> Dict[SeriesKey, pd.DataFrame]:
+        """Load (pair, timeframe[, start[, end]]) requests concurrently"""
+        requests = [tuple(request) + (None,) * (4 - len(request)) for request in requests]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            frames = pool.map(lambda request: self.get(*request), requests)
+            return {(pair, timeframe): frame for (pair, timeframe, _, _), frame in zip(requests, frames)}
+
+    def _resident(self, pair: str, timeframe: str, start: Optional[int]) -> Optional[_Resident]:
+        key = (pair, timeframe)
+        with self._lock:
+            resident = self._lru.get(key)
+            if resident is not None:
+                self._lru.move_to_end(key)
+
+        version = self.archive.version(pair, timeframe)
+        if version is None:
+            return None
+        rewrites = self.archive.rewrites(pair, timeframe)
+        covers_start = resident is not None and (resident.start is None or
+                                                 (start is not None and start >= resident.start))
+        if covers_start and resident.version == version:
+            with self._lock:
+                self.hits += 1
+            return resident
+
+        with self._lock:
+            self.misses += 1
+        if resident is None or not covers_start or resident.rewrites != rewrites:
+            # Load through the archive's tail; the old copy is superseded. A copy that only
+            # went stale because history was rewritten keeps its wider start
+            load_start = resident.start if covers_start else start
+            columns = self.archive.load_columns(pair, timeframe, load_start)
+            columns = {name: np.array(values) for name, values in columns.items()}
+            if not columns:
+                return None
+            resident = _Resident(columns, load_start, version, rewrites)
+        else:
+            # Only the rows added since the resident copy was loaded
+            tail = self.archive.load_columns(pair, timeframe, resident.last)
+            if not tail:
+                self.invalidate(pair, timeframe)
+                return self._resident(pair, timeframe, start)
+            keep = len(resident.columns['timestamp'])
+            if len(tail['timestamp']) and tail['timestamp'][0] == resident.last:
+                keep -= 1  # The tail candle may have been rewritten
+            resident = _Resident({name: np.concatenate([resident.columns[name][:keep], tail[name]])
+                                  for name in COLUMNS}, resident.start, version, rewrites)
+        self._store(key, resident)
+        return resident
+
+    def _store(self, key: SeriesKey, resident: _Resident):
+        with self._lock:
+            previous = self._lru.pop(key, None)
+            if previous is not None:
+                self._resident_bytes -= previous.nbytes
+            self._lru[key] = resident
+            self._resident_bytes += resident.nbytes
+            while self._resident_bytes > self.max_bytes and len(self._lru) > 1:
+                _, evicted = self._lru.popitem(last=False)
+                self._resident_bytes -= evicted.nbytes
+
+    def invalidate(self, pair: str = None, timeframe: str = None):
+        """Drop resident series (all, one pair, or one pair/timeframe)"""
+        with self._lock:
+            for key in [k for k in self._lru if (pair is None or k[0] == pair) and
+                        (timeframe is None or k[1] == timeframe)]:
+                self._resident_bytes -= self._lru.pop(key).nbytes
+
+    def import_csv_dir(self, data_dir: str) -> Dict[str, int]:
+        """Import every *_historical.csv in `data_dir` concurrently; returns rows added per file"""
+        def import_file(path):
+            pair, timeframe = os.path.basename(path)[:-len('_historical.csv')].rsplit('_', 1)
+            written = self.archive.import_csv(pair, timeframe, path)
+            if written:
+                self.invalidate(pair, timeframe)
+            return written
+
+        files = sorted(glob.glob(os.path.join(data_dir, '*_historical.csv')))
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {os.path.basename(path): pool.submit(import_file, path) for path in files}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    logging.error(f"Error importing {name}: {e}")
+                    results[name] = None
+        return results
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'resident_series': len(self._lru),
+                'resident_bytes': self._resident_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -0,0 +1,242 @@
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'historical')
+
+# Column name -> on-disk dtype; every column is a raw little-endian array file
+COLUMNS = {
+    'timestamp': '<i8',  # Candle start, seconds since the epoch
+    'open': '<f8',
+    'high': '<f8',
+    'low': '<f8',
+    'close': '<f8',
+    'vwap': '<f8',
+    'volume': '<f8',
+    'count': '<i8'
+}
+
+# Explicit CSV dtypes skip pandas' per-column type inference
+CSV_DTYPES = {name: ('float64' if dtype == '<f8' else 'int64')
+              for name, dtype in COLUMNS.items() if name != 'timestamp'}
+CSV_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def to_epoch_seconds(timestamps) -> np.ndarray:
+    """int64 epoch seconds from datetimes, datetime strings or numbers"""
+    values = pd.Series(timestamps)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.int64)
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, format=CSV_TIMESTAMP_FORMAT, errors='coerce').fillna(
+            pd.to_datetime(values, errors='coerce'))
+    if values.dt.tz is not None:
+        values = values.dt.tz_convert('UTC').dt.tz_localize(None)
+    return ((values - pd.Timestamp(0)) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+
+def epoch_seconds(value) -> Optional[int]:
+    """One timestamp (datetime, string or number) as epoch seconds; None passes through"""
+    if value is None:
+        return None
+    return int(to_epoch_seconds([value])[0])
+
+
+def read_candle_csv(path: str) -> pd.DataFrame:
+    """Read a candle CSV export with explicit dtypes and a fixed-format timestamp parse"""
+    header = pd.read_csv(path, nrows=0).columns
+    data = pd.read_csv(path, dtype={k: v for k, v in CSV_DTYPES.items() if k in header})
+    if 'timestamp' in data.columns:
+        try:
+            data['timestamp'] = pd.to_datetime(data['timestamp'], format=CSV_TIMESTAMP_FORMAT)
+        except (ValueError, TypeError):
+            data['timestamp'] = pd.to_datetime(data['timestamp'])
+    return data
+
+
+class OHLCVStore:
+    """Append-only columnar candle store, one directory per pair/timeframe.
+
+    CandleArchive keeps one of these per series, keyed by month, as its
+    partitions.
+
+    Each series is a set of raw column files (int64 timestamps, float64
+    prices and volumes) plus a small ``meta.json`` holding the committed
+    row count. Appends write only the new rows to the end of each column
+    and then commit the row count, so their cost does not depend on how
+    much history exists; bytes past the committed count (an interrupted
+    append) are truncated on the next write. Loads are read-only memory
+    maps. A merge of out-of-order candles writes a new generation of column
+    files and switches to it with the meta commit, so neither a crash nor a
+    reader mapping the old files sees a half-rewritten series.
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _series_dir(self, pair: str, timeframe: str) -> str:
+        return os.path.join(self.root, f"{pair}_{timeframe}")
+
+    def _column_path(self, series_dir: str, name: str, generation: int = 0) -> str:
+        return os.path.join(series_dir, f"{name}.{generation}.bin" if generation else f"{name}.bin")
+
+    def _meta_path(self, pair: str, timeframe: str) -> str:
+        return os.path.join(self._series_dir(pair, timeframe), 'meta.json')
+
+    def read_meta(self, pair: str, timeframe: str) -> Optional[Dict]:
+        try:
+            with open(self._meta_path(pair, timeframe), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, pair: str, timeframe: str, meta: Dict):
+        path = self._meta_path(pair, timeframe)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    def exists(self, pair: str, timeframe: str) -> bool:
+        meta = self.read_meta(pair, timeframe)
+        return bool(meta and meta['rows'])
+
+    def rows(self, pair: str, timeframe: str) -> int:
+        meta = self.read_meta(pair, timeframe)
+        return meta['rows'] if meta else 0
+
+    def last_timestamp(self, pair: str, timeframe: str) -> Optional[int]:
+        meta = self.read_meta(pair, timeframe)
+        return meta['last'] if meta and meta['rows'] else None
+
+    def load(self, pair: str, timeframe: str) -> Dict[str, np.ndarray]:
+        """Read-only memory-mapped columns; empty dict when the series does not exist"""
+        meta = self.read_meta(pair, timeframe)
+        if not meta or not meta['rows']:
+            return {}
+        series_dir = self._series_dir(pair, timeframe)
+        generation = meta.get('generation', 0)
+        return {
+            name: np.memmap(self._column_path(series_dir, name, generation), dtype=dtype, mode='r',
+                            shape=(meta['rows'],))
+            for name, dtype in COLUMNS.items()
+        }
+
+    def load_frame(self, pair: str, timeframe: str) -> pd.DataFrame:
+        """Series as a DataFrame with a datetime `timestamp` column"""
+        columns = self.load(pair, timeframe)
+        if not columns:
+            return pd.DataFrame()
+        frame = pd.DataFrame({name: np.asarray(values) for name, values in columns.items()})
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='s')
+        return frame
+
+    def append(self, pair: str, timeframe: str, data: pd.DataFrame) -> int:
+        """Append candles newer than the stored tail; returns the number of rows written.
+
+        A candle with the same timestamp as the last stored one replaces it
+        in place (the tail candle may have been fetched while still open).
+        Data that starts before the stored tail falls back to a full merge.
+        """
+        if data is None or data.empty:
+            return 0
+        new = self._normalize(data)
+        if len(new['timestamp']) == 0:
+            return 0
+
+        meta = self.read_meta(pair, timeframe)
+        if meta and meta['rows'] and new['timestamp'][0] < meta['last']:
+            return self._merge(pair, timeframe, new)
+
+        series_dir = self._series_dir(pair, timeframe)
+        os.makedirs(series_dir, exist_ok=True)
+        rows = meta['rows'] if meta else 0
+        generation = meta.get('generation', 0) if meta else 0
+
+        if rows and new['timestamp'][0] == meta['last']:
+            self._write_rows(series_dir, rows - 1, {name: values[:1] for name, values in new.items()}, rows,
+                             generation)
+            new = {name: values[1:] for name, values in new.items()}
+
+        written = len(new['timestamp'])
+        if written:
+            self._write_rows(series_dir, rows, new, rows, generation)
+        self._commit(pair, timeframe, rows + written,
+                     meta['first'] if rows else int(new['timestamp'][0]),
+                     int(new['timestamp'][-1]) if written else meta['last'])
+        return written
+
+    def _normalize(self, data: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Typed, sorted, de-duplicated columns (later duplicates win)"""
+        timestamps = to_epoch_seconds(data['timestamp'])
+        columns = {'timestamp': timestamps}
+        for name, dtype in COLUMNS.items():
+            if name == 'timestamp':
+                continue
+            if name in data:
+                columns[name] = np.asarray(data[name], dtype=np.dtype(dtype).newbyteorder('='))
+            else:
+                columns[name] = np.zeros(len(timestamps), dtype=np.dtype(dtype).newbyteorder('='))
+
+        order = np.argsort(timestamps, kind='stable')
+        sorted_ts = timestamps[order]
+        # Keep the last occurrence of each timestamp
+        keep = np.append(sorted_ts[1:] != sorted_ts[:-1], True) if len(sorted_ts) else np.array([], bool)
+        index = order[keep]
+        return {name: values[index] for name, values in columns.items()}
+
+    def _write_rows(self, series_dir: str, offset: int, columns: Dict[str, np.ndarray],
+                    committed_rows: int, generation: int = 0):
+        """Write rows at `offset` in every column, first dropping bytes past `committed_rows`"""
+        for name, dtype in COLUMNS.items():
+            path = self._column_path(series_dir, name, generation)
+            values = np.ascontiguousarray(columns[name], dtype=dtype)
+            itemsize = values.dtype.itemsize
+            with open(path, 'r+b' if os.path.exists(path) else 'w+b') as f:
+                # Only truncate when needed: open memory maps may pin the file size
+                if os.fstat(f.fileno()).st_size > committed_rows * itemsize:
+                    f.truncate(committed_rows * itemsize)
+                f.seek(offset * itemsize)
+                f.write(values.tobytes())
+
+    def _commit(self, pair: str, timeframe: str, rows: int, first: int, last: int, generation: int = None):
+        meta = self.read_meta(pair, timeframe) or {}
+        meta.update({'rows': rows, 'first': first, 'last': last,
+                     'columns': COLUMNS})
+        if generation is not None:
+            meta['generation'] = generation
+        self._write_meta(pair, timeframe, meta)
+
+    def _merge(self, pair: str, timeframe: str, new: Dict[str, np.ndarray]) -> int:
+        """Rewrite the series with out-of-order data merged in.
+
+        The merged rows go to a new generation of column files; the meta
+        commit switches readers over, and only then are the old files
+        removed (open memory maps of them stay valid).
+        """
+        meta = self.read_meta(pair, timeframe)
+        existing = {name: np.array(values) for name, values in self.load(pair, timeframe).items()}
+        before = len(existing['timestamp'])
+        combined = self._normalize(pd.DataFrame({
+            name: np.concatenate([existing[name], new[name]]) for name in COLUMNS
+        }))
+        series_dir = self._series_dir(pair, timeframe)
+        previous = meta.get('generation', 0)
+        self._write_rows(series_dir, 0, combined, 0, previous + 1)
+        self._commit(pair, timeframe, len(combined['timestamp']),
+                     int(combined['timestamp'][0]), int(combined['timestamp'][-1]), previous + 1)
+        self._remove_columns(series_dir, previous)
+        logging.info(f"Merged out-of-order candles into {pair}_{timeframe}")
+        return len(combined['timestamp']) - before
+
+    def _remove_columns(self, series_dir: str, generation: int):
+        for name in COLUMNS:
+            try:
+                os.remove(self._column_path(series_dir, name, generation))
+            except OSError:
+                pass  # Already gone, or still open elsewhere on platforms that lock mapped files
@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from database.candle_archive import CandleArchive
+from database.ohlcv_store import COLUMNS, DEFAULT_ROOT, epoch_seconds
+
+DEFAULT_SHARED_ROOT = os.path.join(os.path.dirname(DEFAULT_ROOT), 'shared')
+
+# Value for a (pair, timestamp) cell the pair has no candle for
+FILL_VALUES = {name: (np.nan if dtype == '<f8' else 0) for name, dtype in COLUMNS.items() if name != 'timestamp'}
+
+_WORKER_DATASET = None
+
+
+def _attach_worker(root: str):
+    """Process pool initializer: attach once per worker process"""
+    global _WORKER_DATASET
+    _WORKER_DATASET = SharedDataset(root)
+
+
+def _run_task(args):
+    fn, task = args
+    return fn(_WORKER_DATASET, *task)
+
+
+class SharedDataset:
+    """Aligned, read-only candle arrays shared by memory map across processes.
+
+    `build` writes one 2-D ``.npy`` array per column and timeframe, shaped
+    (pairs, timestamps) on the union timestamp grid of that timeframe, with
+    NaN prices (zero volume/count) where a pair has no candle. Any process
+    can then open the dataset with ``np.load(mmap_mode='r')``: pages come
+    from the OS page cache, so N workers share one physical copy and
+    nothing is pickled. The dataset itself pickles as just its root path.
+
+    Builds go into a fresh version directory and the top-level
+    ``manifest.json`` is switched atomically, so readers never see a
+    partial build.
+    """
+
+    def __init__(self, root: str = DEFAULT_SHARED_ROOT):
+        self.root = root
+        self.manifest = self._read_manifest()
+        self._arrays: Dict[tuple, np.ndarray] = {}
+
+    def __getstate__(self):
+        return {'root': self.root}
+
+    def __setstate__(self, state):
+        self.__init__(state['root'])
+
+    def _read_manifest(self) -> Dict:
+        try:
+            with open(os.path.join(self.root, 'manifest.json'), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'version': None, 'timeframes': {}, 'sources': {}}
+
+    @property
+    def timeframes(self) -> List[str]:
+        return list(self.manifest['timeframes'])
+
+    def pairs(self, timeframe: str) -> List[str]:
+        return self.manifest['timeframes'].get(timeframe, {}).get('pairs', [])
+
+    def array(self, timeframe: str, name: str) -> np.ndarray:
+        """Read-only memory map of one column: (pairs, timestamps), or (timestamps,) for 'timestamp'"""
+        key = (timeframe, name)
+        if key not in self._arrays:
+            path = os.path.join(self.root, self.manifest['version'], timeframe, f"{name}.npy")
+            self._arrays[key] = np.load(path, mmap_mode='r')
+        return self._arrays[key]
+
+    def columns(self, pair: str, timeframe: str, start=None, end=None) -> Dict[str, np.ndarray]:
+        """Zero-copy views of one pair's row, trimmed to its own history and [start, end]"""
+        info = self.manifest['timeframes'].get(timeframe)
+        if not info or pair not in info['bounds']:
+            return {}
+        row = info['pairs'].index(pair)
+        lo, hi = info['bounds'][pair]
+        timestamps = self.array(timeframe, 'timestamp')
+        start, end = epoch_seconds(start), epoch_seconds(end)
+        if start is not None:
+            lo = max(lo, int(np.searchsorted(timestamps, start, side='left')))
+        if end is not None:
+            hi = min(hi, int(np.searchsorted(timestamps, end, side='right')))
+        columns = {'timestamp': timestamps[lo:hi]}
+        for name in FILL_VALUES:
+            columns[name] = self.array(timeframe, name)[row, lo:hi]
+        return columns
+
+    def frame(self, pair: str, timeframe: str, start=None, end=None, dropna: bool = True) -> pd.DataFrame:
+        """One pair as a DataFrame; grid rows without a candle are dropped unless dropna=False"""
+        columns = self.columns(pair, timeframe, start, end)
+        if not columns:
+            return pd.DataFrame()
+        frame = pd.DataFrame({name: np.asarray(values) for name, values in columns.items()})
+        if dropna:
+            frame = frame[frame['close'].notna()].reset_index(drop=True)
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='s')
+        return frame
+
+    def map(self, fn: Callable, tasks: Iterable[tuple], max_workers: int = None, chunksize: int = 1) -> List:
+        """Run fn(dataset, *task) for every task in a process pool attached to this dataset.
+
+        `fn` must be a module-level function. Workers attach once at start-up,
+        so only the task tuples and results cross process boundaries.
+        """
+        tasks = [tuple(task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach_worker,
+                                 initargs=(self.root,)) as pool:
+            return list(pool.map(_run_task, [(fn, task) for task in tasks], chunksize=chunksize))
+
+    @classmethod
+    def build(cls, archive: CandleArchive, root: str = DEFAULT_SHARED_ROOT, pairs: List[str] = None,
+              timeframes: List[str] = None, start=None) -> 'SharedDataset':
+        """Write aligned arrays for the selected series; a no-op when no source series changed"""
+        series = [(pair, tf) for pair, tf in archive.series()
+                  if (pairs is None or pair in pairs) and (timeframes is None or tf in timeframes)]
+        sources = {f"{pair}|{tf}": archive.version(pair, tf) for pair, tf in series}
+        start = epoch_seconds(start)
+
+        current = cls(root)
+        if current.manifest['version'] and current.manifest['sources'] == sources and \
+                current.manifest.get('start') == start:
+            return current
+
+        version = f"v{time.time_ns()}"
+        version_dir = os.path.join(root, version)
+        manifest = {'version': version, 'start': start, 'sources': sources, 'timeframes': {}}
+        by_timeframe: Dict[str, List[str]] = {}
+        for pair, tf in series:
+            by_timeframe.setdefault(tf, []).append(pair)
+
+        for tf, tf_pairs in by_timeframe.items():
+            loaded = {pair: archive.load_columns(pair, tf, start) for pair in tf_pairs}
+            loaded = {pair: columns for pair, columns in loaded.items() if columns}
+            if not loaded:
+                continue
+            manifest['timeframes'][tf] = cls._write_timeframe(os.path.join(version_dir, tf), loaded)
+
+        os.makedirs(root, exist_ok=True)
+        os.makedirs(version_dir, exist_ok=True)
+        tmp_path = os.path.join(root, 'manifest.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(root, 'manifest.json'))
+        cls._remove_old_versions(root, version)
+
+        cells = sum(len(info['pairs']) * info['rows'] for info in manifest['timeframes'].values())
+        logging.info(f"Built shared dataset {version}: {len(series)} series, {cells} aligned cells")
+        return cls(root)
+
+    @staticmethod
+    def _write_timeframe(tf_dir: str, loaded: Dict[str, Dict[str, np.ndarray]]) -> Dict:
+        """Align every pair on the union timestamp grid and write one array per column"""
+        os.makedirs(tf_dir, exist_ok=True)
+        pairs = sorted(loaded)
+        grid = np.unique(np.concatenate([loaded[pair]['timestamp'] for pair in pairs]))
+        np.save(os.path.join(tf_dir, 'timestamp.npy'), grid.astype(np.int64))
+
+        positions = {pair: np.searchsorted(grid, loaded[pair]['timestamp']) for pair in pairs}
+        for name, fill in FILL_VALUES.items():
+            dtype = np.dtype(COLUMNS[name]).newbyteorder('=')
+            out = np.lib.format.open_memmap(os.path.join(tf_dir, f"{name}.npy"), mode='w+',
+                                            dtype=dtype, shape=(len(pairs), len(grid)))
+            out[:] = fill
+            for row, pair in enumerate(pairs):
+                out[row, positions[pair]] = loaded[pair][name]
+            out.flush()
+            del out
+
+        bounds = {pair: [int(positions[pair][0]), int(positions[pair][-1]) + 1] for pair in pairs}
+        return {'pairs': pairs, 'rows': int(len(grid)), 'bounds': bounds}
+
+    @staticmethod
+    def _remove_old_versions(root: str, keep: str):
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if name != keep and name.startswith('v') and os.path.isdir(path):
+                try:
+                    shutil.rmtree(path)
+                except OSError as e:
+                    # Still memory-mapped by a reader on platforms that lock open files
+                    logging.debug(f"Could not remove old shared dataset {name}: {e}")
@@ -1,18 +1,18 @@
 import asyncio
 import json
 import os
-import glob
 from datetime import datetime
 from dotenv import load_dotenv
 from market_data.kraken_feed import KrakenFeed
 from trading.paper_trader import PaperTrader
 from trading.crypto_strategy import CryptoStrategy
 from database.db_manager import DatabaseManager
+from database.historical_store import HistoricalDataStore
+from database.shared_dataset import SharedDataset
 from core.model_trainer import ModelTrainer
 from utils.error_handler import setup_logging
 from trading.trading_manager import TradingManager
 import logging
-import pandas as pd
 
 def print_menu():
     print("\nCrypto Trading Options:")
@@ -21,8 +21,9 @@ def print_menu():
     print("3. LLM Review of Indicators")
     print("4. Reset Balance")
     print("5. Update Database")
-    print("6. Exit")
-    return input("\nSelect option (1-6): ")
+    print("6. Replay Recorded Stream")
+    print("7. Exit")
+    return input("\nSelect option (1-7): ")
 
 async def update_database():
     data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'historical')
@@ -30,18 +31,20 @@ async def update_database():
         print("No data directory found")
         return
 
-    csv_files = glob.glob(os.path.join(data_dir, '*.csv'))
-    for file in csv_files:
-        try:
-            print(f"Processing {os.path.basename(file)}...")
-            df = pd.read_csv(file)
-            if 'timestamp' in df.columns:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                df = df.sort_values('timestamp')
-                df.to_csv(file, index=False)
-                print(f"Updated {os.path.basename(file)}")
-        except Exception as e:
-            print(f"Error processing {os.path.basename(file)}: {e}")
+    # Import new rows from CSV exports into the candle archive in parallel; unchanged files are skipped
+    store = HistoricalDataStore(data_dir)
+    results = await asyncio.to_thread(store.import_csv_dir, data_dir)
+    for name, written in results.items():
+        if written is None:
+            print(f"Error processing {name}")
+        elif written:
+            print(f"Imported {written} candles from {name}")
+        else:
+            print(f"{name} is up to date")
+
+    # Aligned memory-mapped arrays for process-pool research and backtests; skipped when nothing changed
+    dataset = await asyncio.to_thread(SharedDataset.build, store.archive)
+    print(f"Shared dataset {dataset.manifest['version']} ready")
 
 async def handle_menu(config, db):
     manager = None
@@ -63,7 +66,7 @@ async def handle_menu(config, db):
                         manager = None
                     
             elif choice == "2":
-                trainer = ModelTrainer()
+                trainer = ModelTrainer(config=config)
                 try:
                     logging.info("Starting crypto model training...")
                     data = await trainer.download_training_data()
@@ -121,6 +124,23 @@ async def handle_menu(config, db):
                 input("\nPress Enter to continue...")
                     
             elif choice == "6":
+                default_path = os.getenv('KRAKEN_RECORD_PATH', '')
+                path = input(f"\nRecording path [{default_path}]: ").strip() or default_path
+                if not path or not os.path.exists(path):
+                    print("\nRecording not found")
+                    input("\nPress Enter to continue...")
+                    continue
+                speed = input("Speed multiple (blank for max): ").strip()
+                replay_manager = TradingManager(config, db, "crypto")
+                try:
+                    stats = await replay_manager.run_replay(path, float(speed) if speed else None)
+                    print(f"\nReplayed {stats['frames']} frames at {stats['frames_per_second']:.0f} msg/s")
+                finally:
+                    # Close the feed only: cleanup() would save the replay account's balance as the live one
+                    await replay_manager.feed.close()
+                input("\nPress Enter to continue...")
+
+            elif choice == "7":
                 logging.info("Exiting program...")
                 if manager:
                     await manager.cleanup()
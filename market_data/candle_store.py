@@ -0,0 +1,185 @@
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from market_data.ring_buffer import OHLCVRingBuffer, COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Timeframe name -> candle length in seconds
+TIMEFRAMES = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '1h': 3600
+}
+
+# Row layout used internally: [start, open, high, low, close, vwap, volume, count]
+START, OPEN, HIGH, LOW, CLOSE, VWAP, VOLUME, COUNT = range(8)
+
+
+def _merge(base: Optional[list], candle: list) -> list:
+    """Combine an aggregate of finished candles with the next candle"""
+    if base is None:
+        return list(candle)
+    volume = base[VOLUME] + candle[VOLUME]
+    if volume > 0:
+        vwap = (base[VWAP] * base[VOLUME] + candle[VWAP] * candle[VOLUME]) / volume
+    else:
+        vwap = candle[CLOSE]
+    return [
+        base[START],
+        base[OPEN],
+        max(base[HIGH], candle[HIGH]),
+        min(base[LOW], candle[LOW]),
+        candle[CLOSE],
+        vwap,
+        volume,
+        base[COUNT] + candle[COUNT]
+    ]
+
+
+class CandleStore:
+    """In-memory multi-timeframe candle history per pair.
+
+    Seeded once from REST history, then kept current from 1m candle updates
+    (WebSocket ``ohlc`` channel) or individual trades. Higher timeframes are
+    rolled up locally from the 1m stream, so reads never touch the network.
+    """
+
+    def __init__(self, timeframes: Dict[str, int] = None, max_candles: int = 720):
+        self.timeframes = timeframes or TIMEFRAMES
+        self.max_candles = max_candles
+        self._series = {}        # pair -> tf -> OHLCVRingBuffer
+        self._open_minute = {}   # pair -> current 1m row
+        self._bucket_base = {}   # pair -> tf -> aggregate of closed minutes in the open bucket
+
+    def has_pair(self, pair: str) -> bool:
+        return pair in self._series
+
+    def pairs(self) -> List[str]:
+        return list(self._series.keys())
+
+    def remove(self, pair: str):
+        """Drop all candles for a pair we no longer track"""
+        self._series.pop(pair, None)
+        self._open_minute.pop(pair, None)
+        self._bucket_base.pop(pair, None)
+
+    def seed(self, pair: str, timeframe: str, df: pd.DataFrame):
+        """Load historical candles for one timeframe"""
+        if df is None or df.empty:
+            return
+        starts = df['timestamp']
+        if pd.api.types.is_datetime64_any_dtype(starts):
+            starts = (starts - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+        rows = np.column_stack([
+            starts.to_numpy(dtype=np.float64),
+            df[COLUMNS[1:]].to_numpy(dtype=np.float64)
+        ])
+        series = self._get_series(pair, timeframe)
+        series.clear()
+        series.extend(rows)
+
+        if timeframe == '1m':
+            self._open_minute[pair] = series.last_row().tolist()
+            self._rebuild_bucket_bases(pair)
+
+    def apply_candle(self, pair: str, candle: list):
+        """Apply a full update of the currently open 1m candle"""
+        if pair not in self._series:
+            self._series[pair] = {}
+        current = self._open_minute.get(pair)
+        if current is not None and candle[START] < current[START]:
+            return  # Stale update for a minute we already closed
+
+        if current is not None and candle[START] != current[START]:
+            self._close_minute(pair, current)
+        self._open_minute[pair] = list(candle)
+
+        for tf, seconds in self.timeframes.items():
+            bucket_start = candle[START] - candle[START] % seconds
+            base = self._bucket_base.get(pair, {}).get(tf)
+            if base is not None and base[START] != bucket_start:
+                base = None
+            aggregate = _merge(base, candle)
+            aggregate[START] = bucket_start
+            self._upsert(self._get_series(pair, tf), aggregate)
+
+    def apply_trade(self, pair: str, timestamp: float, price: float, volume: float):
+        """Fold a single trade into the open 1m candle"""
+        minute_start = int(timestamp) - int(timestamp) % 60
+        current = self._open_minute.get(pair)
+        if current is None or current[START] != minute_start:
+            candle = [minute_start, price, price, price, price, price, volume, 1]
+        else:
+            total = current[VOLUME] + volume
+            vwap = (current[VWAP] * current[VOLUME] + price * volume) / total if total > 0 else price
+            candle = [
+                minute_start,
+                current[OPEN],
+                max(current[HIGH], price),
+                min(current[LOW], price),
+                price,
+                vwap,
+                total,
+                current[COUNT] + 1
+            ]
+        self.apply_candle(pair, candle)
+
+    def get_frames(self, pair: str) -> Dict[str, pd.DataFrame]:
+        """Return all timeframes for a pair as DataFrames"""
+        return {tf: series.to_frame() for tf, series in self._series.get(pair, {}).items()
+                if len(series)}
+
+    def get_buffer(self, pair: str, timeframe: str) -> Optional[OHLCVRingBuffer]:
+        """Direct access to the ring buffer for zero-copy reads"""
+        return self._series.get(pair, {}).get(timeframe)
+
+    def last_timestamp(self, pair: str, timeframe: str = '1m') -> Optional[int]:
+        series = self._series.get(pair, {}).get(timeframe)
+        return series.last_timestamp() if series is not None else None
+
+    def _get_series(self, pair: str, timeframe: str) -> OHLCVRingBuffer:
+        timeframes = self._series.setdefault(pair, {})
+        if timeframe not in timeframes:
+            timeframes[timeframe] = OHLCVRingBuffer(self.max_candles)
+        return timeframes[timeframe]
+
+    def _upsert(self, series: OHLCVRingBuffer, row: list):
+        last = series.last_timestamp()
+        if last == row[START]:
+            series.update_last(row)
+        elif last is None or last < row[START]:
+            series.append(row)
+
+    def _close_minute(self, pair: str, minute: list):
+        """Fold a finished 1m candle into the open bucket of every higher timeframe"""
+        bases = self._bucket_base.setdefault(pair, {})
+        for tf, seconds in self.timeframes.items():
+            bucket_start = minute[START] - minute[START] % seconds
+            base = bases.get(tf)
+            if base is None or base[START] != bucket_start:
+                base = None
+            merged = _merge(base, minute)
+            merged[START] = bucket_start
+            bases[tf] = merged
+
+    def _rebuild_bucket_bases(self, pair: str):
+        """Recompute open-bucket aggregates from seeded 1m history"""
+        minutes = self._series[pair].get('1m')
+        self._bucket_base[pair] = {}
+        if minutes is None or not len(minutes):
+            return
+        rows = minutes.view()
+        open_start = int(rows[-1, START])
+        for tf, seconds in self.timeframes.items():
+            bucket_start = open_start - open_start % seconds
+            base = None
+            for row in rows[(rows[:, START] >= bucket_start) & (rows[:, START] < open_start)]:
+                base = _merge(base, row.tolist())
+            if base is not None:
+                base[START] = bucket_start
+                self._bucket_base[pair][tf] = base
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PriceDispatcher:
+    """Non-blocking fan-out of price updates to async consumers.
+
+    `publish` never awaits: it stores the update as the latest value for the
+    (consumer, pair) slot and starts a delivery task if none is running.
+    While a consumer is still busy with a pair, newer updates replace the
+    pending one (latest value wins), so a slow consumer sees fewer updates
+    instead of slowing down the WebSocket reader or other consumers.
+    """
+
+    def __init__(self, max_lag: Optional[float] = 30.0):
+        self.max_lag = max_lag  # Updates older than this when picked up are dropped
+        self.consumers: List[Callable] = []
+        self._pending: Dict[Tuple[int, str], Tuple[float, float]] = {}
+        self._inflight: Dict[Tuple[int, str], asyncio.Task] = {}
+
+        self.published = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_observed_lag = 0.0
+        self.avg_lag = 0.0
+
+    def add_consumer(self, callback: Callable):
+        self.consumers.append(callback)
+
+    def publish(self, pair: str, price: float):
+        """Queue a price update for every consumer without blocking"""
+        self.published += 1
+        now = time.monotonic()
+        for index, callback in enumerate(self.consumers):
+            key = (index, pair)
+            if key in self._pending:
+                self.coalesced += 1
+            self._pending[key] = (price, now)
+            if key not in self._inflight:
+                self._inflight[key] = asyncio.create_task(self._deliver(key, callback))
+
+    async def _deliver(self, key: Tuple[int, str], callback: Callable):
+        """Feed pending updates for one (consumer, pair) slot until it is drained"""
+        pair = key[1]
+        try:
+            while True:
+                update = self._pending.pop(key, None)
+                if update is None:
+                    break
+                price, published_at = update
+                lag = time.monotonic() - published_at
+                self._record_lag(lag)
+                if self.max_lag is not None and lag > self.max_lag:
+                    self.dropped += 1
+                    continue
+                try:
+                    await callback(pair, price)
+                    self.delivered += 1
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Price callback error for {pair}: {e}")
+        finally:
+            self._inflight.pop(key, None)
+
+    def _record_lag(self, lag: float):
+        self.last_lag = lag
+        self.max_observed_lag = max(self.max_observed_lag, lag)
+        self.avg_lag = lag if self.delivered == 0 else 0.9 * self.avg_lag + 0.1 * lag
+
+    def stats(self) -> Dict:
+        """Delivery counters and lag between publish and delivery, in seconds"""
+        return {
+            'published': self.published,
+            'delivered': self.delivered,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'pending': len(self._pending),
+            'in_flight': len(self._inflight),
+            'last_lag': self.last_lag,
+            'avg_lag': self.avg_lag,
+            'max_lag': self.max_observed_lag
+        }
+
+    async def drain(self):
+        """Wait until every queued update has been delivered"""
+        while self._inflight:
+            await asyncio.gather(*list(self._inflight.values()), return_exceptions=True)
+
+    async def close(self):
+        """Cancel outstanding deliveries"""
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pending.clear()
+        self._inflight.clear()
@@ -1,174 +1,361 @@
 import asyncio
-import aiohttp
 import logging
 import pandas as pd
 import time
 import json
-import hmac
-import base64
-import hashlib
-import urllib.parse
+import math
 from typing import Dict, List, Optional, Callable
 from datetime import datetime, timezone
+from market_data.candle_store import CandleStore, TIMEFRAMES
+from market_data.dispatcher import PriceDispatcher
+from market_data.order_book import OrderBook
+from market_data.rest_client import KrakenRestClient, create_session
+from market_data.trade_tape import TradeTape
+from market_data.ws_shard import WebSocketShard
+from market_data.subscription_manager import SubscriptionManager
+from market_data.recorder import StreamRecorder, ReplaySource
+from market_data.pair_universe import PairUniverse, DEFAULT_CACHE_FILE
 
 logger = logging.getLogger(__name__)
 
 class KrakenFeed:
-    def __init__(self, api_key: str = None, secret_key: str = None):
-        self.api_url = "https://api.kraken.com"
-        self.ws_url = "wss://ws.kraken.com"
+    def __init__(self, api_key: str = None, secret_key: str = None, book_depth: int = 25,
+                 trade_tape_size: int = 50000, num_shards: int = None, max_pairs: int = 20,
+                 pairs_per_shard: int = 10,
+                 record_path: str = None, api_url: str = "https://api.kraken.com",
+                 ws_url: str = "wss://ws.kraken.com", universe_file: str = None,
+                 rest_limits: Dict = None):
+        self.api_url = api_url
+        self.ws_url = ws_url
         self.api_key = api_key
         self.secret_key = secret_key
         self.session = None
-        self.ws = None
-        self.subscriptions = {}
-        self.price_callbacks = []
+        self.rest = None
+        self.rest_limits = rest_limits or {}  # KrakenRestClient rate settings for the account's tier
+        self.dispatcher = PriceDispatcher()
         self.running = False
         
+        self.max_pairs = max_pairs
+        
+        # Subscriptions are spread over `num_shards` connections, each with its own reader;
+        # by default enough of them to carry the whole pair universe at `pairs_per_shard` each
+        self.channel_options = {
+            'ticker': {"name": "ticker"},
+            'ohlc': {"name": "ohlc", "interval": 1},
+            'book': {"name": "book", "depth": book_depth},
+            'trade': {"name": "trade"}
+        }
+        self.num_shards = max(1, num_shards or math.ceil(max_pairs / pairs_per_shard))
+        self.shards = []
+        self.subscription_manager = None
+        
+        # Optional raw-frame recording, and offline replay of such recordings
+        self.record_path = record_path
+        self.recorder = None
+        self._replay = None
+        
         # Live data storage
         self.live_prices = {}
         self.live_orderbooks = {}
-        self.live_trades = []
+        self.book_depth = book_depth
+        self.live_trades = {}  # pair -> TradeTape
+        self.trade_tape_size = trade_tape_size
+        self.candles = CandleStore()
+        
+        # REST ticker cache: pair -> (fetched_at, ticker), refreshed in batches
+        self.ticker_ttl = 10.0
+        self.live_ticker_max_age = 60.0
+        self._ticker_cache = {}
+        self._ticker_requests = {}  # pair -> batch request covering it
+        self._ticker_batch = None     # Batch still collecting pairs
+        self._ticker_batch_pairs = []
+        
+        # REST pair name <-> WebSocket pair name (e.g. XXBTZUSD <-> XBT/USD)
+        self.ws_names = {}
+        self.rest_names = {}
+        self.altnames = {}
+        
+        # Ranked pair universe, persisted to disk and shared with other feeds
+        self.universe = PairUniverse(self._api_request, universe_file or DEFAULT_CACHE_FILE)
 
     async def start(self):
-        """Start the feed with websocket connection"""
+        """Start the feed and wait for the first WebSocket connections"""
         logger.info("Starting Kraken feed...")
         self.running = True
-        self.session = aiohttp.ClientSession()
-        logger.info("Created HTTP session")
-        await self._start_websocket()
-        logger.info("WebSocket initialized")
+        await self.ensure_session()
+        if self.record_path and self.recorder is None:
+            self.recorder = StreamRecorder(self.record_path)
+            logger.info(f"Recording WebSocket stream to {self.record_path}")
+        
+        pairs = await self.get_active_pairs()
+        if not pairs:
+            logger.error("Failed to get active pairs")
+            return
+        logger.info(f"Retrieved {len(pairs)} active pairs")
+        
+        self.shards = [
+            WebSocketShard(i, self.ws_url, self.channel_options,
+                           on_frame=self.process_frame,
+                           on_reconnect=self._backfill_gaps,
+                           ws_name=lambda pair: self.ws_names.get(pair, pair),
+                           recorder=self.recorder)
+            for i in range(self.num_shards)
+        ]
+        self.subscription_manager = SubscriptionManager(
+            self.shards, self.channel_options, ws_name=lambda pair: self.ws_names.get(pair, pair)
+        )
+        for pair in pairs:
+            self.subscription_manager.assign(pair)
+        
+        for shard in self.shards:
+            shard.start(self.session)
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(shard.connected.wait() for shard in self.shards)), timeout=30
+            )
+            logger.info(f"WebSocket initialized with {len(self.shards)} shard(s)")
+        except asyncio.TimeoutError:
+            logger.warning("Not all shards connected yet, supervisors keep retrying")
+
+    async def ensure_session(self):
+        """Create the HTTP session if it does not exist yet"""
+        if self.session is None:
+            self.session = create_session()
+            self.rest = KrakenRestClient(self.session, self.api_url, **self.rest_limits)
+            logger.info("Created HTTP session")
 
     async def close(self):
         """Cleanup connections"""
         logger.info("Closing Kraken feed connections...")
         self.running = False
-        if self.ws:
-            await self.ws.close()
+        await asyncio.gather(*(shard.close() for shard in self.shards))
+        if self.shards:
             logger.info("WebSocket closed")
+        if self.recorder:
+            # No more frames arrive once the shards are closed: finish the recording first
+            await asyncio.to_thread(self.recorder.close)
+            self.recorder = None
+        await self.dispatcher.close()
+        await self.universe.close()
         if self.session:
             await self.session.close()
             self.session = None
+            self.rest = None
             logger.info("HTTP session closed")
 
-    async def _start_websocket(self):
-        """Initialize websocket connection"""
-        try:
-            logger.info("Attempting WebSocket connection...")
-            
-            # First get active pairs synchronously
-            pairs = await self.get_active_pairs()
-            if not pairs:
-                logger.error("Failed to get active pairs")
+    async def update_pairs(self, pairs) -> Dict[str, List[str]]:
+        """Change the streamed pair set on the live connections without reconnecting"""
+        if self.subscription_manager is None:
+            return {'added': [], 'removed': []}
+        diff = await self.subscription_manager.sync(pairs)
+        for pair in diff['removed']:
+            self.live_prices.pop(pair, None)
+            self.live_orderbooks.pop(pair, None)
+            self.live_trades.pop(pair, None)
+            self.candles.remove(pair)
+        return diff
+
+    def is_connected(self) -> bool:
+        return bool(self.shards) and all(shard.connected.is_set() for shard in self.shards)
+
+    def get_shard_stats(self) -> List[Dict]:
+        """Per-connection throughput and lag metrics"""
+        return [shard.stats() for shard in self.shards]
+
+    async def _backfill_gaps(self, pairs):
+        """Fetch only the 1m candles missed while disconnected"""
+        now = int(time.time())
+        
+        async def backfill_pair(pair):
+            last = self.candles.last_timestamp(pair)
+            if last is None or now - last < 120:
+                return  # The open candle is still the current one; the stream resumes it
+            df = await self.get_historical_data(pair, 1, since=last - 1)
+            if df.empty:
                 return
+            starts = (df['timestamp'] - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+            rows = df[['open', 'high', 'low', 'close', 'vwap', 'volume', 'count']].itertuples(index=False)
+            for start, row in zip(starts, rows):
+                if start >= last:
+                    self.candles.apply_candle(pair, [int(start)] + [float(v) for v in row[:6]] + [int(row[6])])
+        
+        pairs = [pair for pair in pairs if self.candles.has_pair(pair)]
+        await asyncio.gather(*(backfill_pair(pair) for pair in pairs), return_exceptions=True)
+        logger.info(f"Backfilled candle gaps for {len(pairs)} pairs")
             
-            logger.info(f"Retrieved {len(pairs)} active pairs")
-            
-            ws_conn = await self.session.ws_connect(self.ws_url, timeout=30)
-            logger.info("WebSocket connected successfully")
-            
-            # Set the websocket
-            self.ws = ws_conn
-            
-            # Subscribe to ticker updates
-            subscribe_message = {
-                "event": "subscribe",
-                "pair": pairs,
-                "subscription": {
-                    "name": "ticker"
-                }
-            }
-            
-            logger.info("Sending subscription message...")
-            await ws_conn.send_json(subscribe_message)
-            logger.info("Subscription message sent")
+    def process_frame(self, raw: str):
+        """Decode and handle one raw WebSocket frame; returns the decoded data"""
+        try:
+            data = json.loads(raw)
             
-            # Start message handling loop
-            asyncio.create_task(self._handle_websocket_messages(ws_conn))
-            logger.info("WebSocket message handler started")
-                            
+            # Channel messages are [channelID, payload..., channelName, pair]
+            if isinstance(data, list) and len(data) >= 4:
+                self._process_channel_message(data)
+            elif isinstance(data, dict) and data.get('status') == 'error':
+                logger.warning(f"WebSocket {data.get('event')} error: {data.get('errorMessage')}")
+            return data
+        except json.JSONDecodeError:
+            logger.error(f"Invalid JSON in message: {raw[:100]}...")
         except Exception as e:
-            logger.error(f"WebSocket connection error: {e}")
-            if self.running:
-                logger.info("Attempting reconnection in 5 seconds...")
-                await asyncio.sleep(5)
-                await self._start_websocket()
-            
-    async def _handle_websocket_messages(self, ws_conn):
-        """Handle incoming websocket messages"""
-        logger.info("Starting WebSocket message handler")
+            logger.error(f"Error processing message: {e}")
+        return None
+
+    async def replay(self, path: str, speed: Optional[float] = 1.0) -> Dict:
+        """Feed a recorded stream through the normal frame handler.
+        
+        `speed` is a multiple of real time; None replays as fast as possible.
+        """
+        self.running = True
+        self._replay = ReplaySource(path, speed)
         try:
-            async for msg in ws_conn:
-                if msg.type == aiohttp.WSMsgType.TEXT:
-                    try:
-                        data = json.loads(msg.data)
-                        
-                        # Log periodic heartbeats but not every message
-                        if time.time() % 60 < 1:  # Log once per minute
-                            logger.info("WebSocket connection alive")
-                        
-                        # Handle ticker updates
-                        if isinstance(data, list) and len(data) > 2:
-                            pair = data[3]
-                            ticker = data[1]
-                            
-                            price = float(ticker['c'][0])  # Last trade closed price
-                            volume = float(ticker['v'][1])  # 24h volume
-                            high = float(ticker['h'][1])    # 24h high
-                            low = float(ticker['l'][1])     # 24h low
-                            
-                            # Update live price data
-                            self.live_prices[pair] = {
-                                'price': price,
-                                'volume': volume,
-                                'high': high,
-                                'low': low,
-                                'timestamp': datetime.now(timezone.utc)
-                            }
-                            
-                            # Notify callbacks
-                            for callback in self.price_callbacks:
-                                await callback(pair, price)
-                                
-                    except json.JSONDecodeError:
-                        logger.error(f"Invalid JSON in message: {msg.data[:100]}...")
-                    except Exception as e:
-                        logger.error(f"Error processing message: {e}")
-                        
-                elif msg.type == aiohttp.WSMsgType.ERROR:
-                    logger.error(f"WebSocket error: {msg.data}")
-                    break
-                    
-        except Exception as e:
-            logger.error(f"WebSocket message handler error: {e}")
+            stats = await self._replay.run(self.process_frame)
+            await self.dispatcher.drain()
+            stats['dispatcher'] = self.dispatcher.stats()
+            return stats
         finally:
-            logger.info("WebSocket message handler stopped")
-            if self.running:
-                logger.info("Restarting WebSocket connection...")
-                await asyncio.sleep(5)
-                await self._start_websocket()
+            self._replay = None
+
+    @property
+    def replay_mode(self) -> bool:
+        return self._replay is not None
+
+    def now(self) -> float:
+        """Current time, following the recording's clock during a replay"""
+        if self._replay is not None and self._replay.clock is not None:
+            return self._replay.clock
+        return time.time()
+
+    def _process_channel_message(self, data: list):
+        """Route a channel message to its handler"""
+        channel = data[-2]
+        pair = self.rest_names.get(data[-1], data[-1])
+        if self.subscription_manager and pair not in self.subscription_manager.pair_shard:
+            return  # Late frame for a pair we just unsubscribed
+        
+        if channel == 'ticker':
+            self._handle_ticker(pair, data[1])
+        elif channel.startswith('ohlc'):
+            self._handle_ohlc(pair, data[1])
+        elif channel.startswith('book'):
+            self._handle_book(pair, data[1:-2])
+        elif channel == 'trade':
+            self._handle_trades(pair, data[1])
+
+    def _handle_ticker(self, pair: str, ticker: dict):
+        """Update live price data and notify callbacks"""
+        price = float(ticker['c'][0])  # Last trade closed price
+        volume = float(ticker['v'][1])  # 24h volume
+        high = float(ticker['h'][1])    # 24h high
+        low = float(ticker['l'][1])     # 24h low
+        
+        self.live_prices[pair] = {
+            'price': price,
+            'volume': volume,
+            'high': high,
+            'low': low,
+            'timestamp': datetime.now(timezone.utc)
+        }
+        
+        self.dispatcher.publish(pair, price)
+
+    def _handle_ohlc(self, pair: str, candle: list):
+        """Apply an open 1m candle update to the local candle store"""
+        # [time, etime, open, high, low, close, vwap, volume, count]
+        end_time = int(float(candle[1]))
+        self.candles.apply_candle(pair, [
+            end_time - 60,
+            float(candle[2]),
+            float(candle[3]),
+            float(candle[4]),
+            float(candle[5]),
+            float(candle[6]),
+            float(candle[7]),
+            int(candle[8])
+        ])
+
+    def _handle_book(self, pair: str, payloads: list):
+        """Apply a book snapshot or incremental update"""
+        book = self.live_orderbooks.get(pair)
+        if book is None:
+            book = self.live_orderbooks[pair] = OrderBook(self.book_depth)
+        
+        # Updates carry asks and bids in one or two dicts; the checksum is in the last one
+        asks, bids, checksum = [], [], None
+        for payload in payloads:
+            if 'as' in payload or 'bs' in payload:
+                book.apply_snapshot(payload.get('as', []), payload.get('bs', []))
+                return
+            asks.extend(payload.get('a', []))
+            bids.extend(payload.get('b', []))
+            checksum = payload.get('c', checksum)
+        
+        if not book.synced:
+            return  # Waiting for a fresh snapshot
+        if not book.apply_update(asks, bids, checksum):
+            logger.warning(f"Order book checksum mismatch for {pair}, resyncing")
+            asyncio.create_task(self._resync_book(pair))
+
+    async def _resync_book(self, pair: str):
+        """Resubscribe to the book channel to receive a new snapshot"""
+        if self.subscription_manager is None:
+            return
+        shard = self.subscription_manager.pair_shard.get(pair)
+        if shard is None:
+            return
+        try:
+            ws_pair = self.ws_names.get(pair, pair)
+            subscription = self.channel_options['book']
+            if await shard.send_json({"event": "unsubscribe", "pair": [ws_pair], "subscription": subscription}):
+                await shard.send_json({"event": "subscribe", "pair": [ws_pair], "subscription": subscription})
+        except Exception as e:
+            logger.error(f"Error resyncing order book for {pair}: {e}")
+
+    def _handle_trades(self, pair: str, trades: list):
+        """Append trades to the pair's bounded trade tape"""
+        tape = self.live_trades.get(pair)
+        if tape is None:
+            tape = self.live_trades[pair] = TradeTape(self.trade_tape_size)
+        # [price, volume, time, side, orderType, misc]
+        for trade in trades:
+            tape.add(float(trade[2]), float(trade[0]), float(trade[1]), 1 if trade[3] == 'b' else -1)
+
+    def get_order_flow(self, pair: str) -> Optional[Dict]:
+        """Rolling order-flow aggregates keyed by window length in seconds"""
+        tape = self.live_trades.get(pair)
+        if tape is None:
+            return None
+        return tape.all_features(self.now())
+
+    def get_orderbook_metrics(self, pair: str, bps: float = 50) -> Optional[Dict]:
+        """Spread, depth within `bps` of mid and imbalance for a synced book"""
+        book = self.live_orderbooks.get(pair)
+        if book is None or not book.synced:
+            return None
+        return book.metrics(bps)
 
     def add_price_callback(self, callback: Callable):
         """Add callback for price updates"""
-        self.price_callbacks.append(callback)
+        self.dispatcher.add_consumer(callback)
         logger.info("Added new price callback")
 
+    def get_feed_stats(self) -> Dict:
+        """Dispatcher counters (coalesced/dropped updates) and feed lag"""
+        return self.dispatcher.stats()
+
     async def get_active_pairs(self) -> List[str]:
-        """Get most active trading pairs"""
+        """Get the most active USD pairs, ranked by 24h volume"""
         try:
-            logger.info("Fetching active pairs...")
-            async with self.session.get(f"{self.api_url}/0/public/AssetPairs") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if 'result' not in data:
-                        logger.error(f"Invalid API response: {data}")
-                        return []
-                    pairs = [pair for pair in data['result'].keys() 
-                            if '.d' not in pair]  # Filter out dark pool pairs
-                    logger.info(f"Retrieved {len(pairs)} pairs")
-                    return pairs[:20]  # Return top 20 pairs
-                logger.error(f"Failed to fetch pairs: {response.status}")
+            pairs = await self.universe.get_pairs(self.max_pairs)
+            if not pairs:
+                logger.error("Failed to fetch pairs")
                 return []
+            for entry in self.universe.entries:
+                pair = entry['pair']
+                if entry.get('wsname'):
+                    self.ws_names[pair] = entry['wsname']
+                    self.rest_names[entry['wsname']] = pair
+                self.altnames[pair] = entry['altname']
+            return pairs
         except Exception as e:
             logger.error(f"Error getting active pairs: {e}")
             return []
@@ -176,52 +363,148 @@ class KrakenFeed:
     async def get_ticker(self, pair: str) -> Optional[Dict]:
         """Get current ticker data, preferring live data if available"""
         try:
-            # Use live data if available
-            if pair in self.live_prices:
-                live_data = self.live_prices[pair]
-                return {
-                    'price': live_data['price'],
-                    'volume24h': live_data['volume'],
-                    'change24h': ((live_data['price'] - live_data['low']) / 
-                                live_data['low'] * 100 if live_data['low'] > 0 else 0)
-                }
-            
-            # Fallback to REST API
-            logger.info(f"Fetching ticker data for {pair}")
-            result = await self._api_request('public/Ticker', {'pair': pair})
-            if result and pair in result:
-                ticker_data = result[pair]
-                return {
+            return (await self.get_ticker_snapshot([pair])).get(pair)
+        except Exception as e:
+            logger.error(f"Error getting ticker for {pair}: {str(e)}")
+            return None
+
+    async def get_ticker_snapshot(self, pairs: List[str]) -> Dict[str, Dict]:
+        """Tickers for many pairs: live data, else the REST cache, else one batched Ticker call
+        
+        Each ticker carries `source` ('live'/'rest'), `age` in seconds and a
+        `stale` flag set when it is older than its freshness limit (e.g. a
+        cached value served because a refresh failed).
+        """
+        snapshot = {}
+        missing = []
+        for pair in pairs:
+            ticker = self._live_ticker(pair)
+            if ticker is None:
+                ticker = self._cached_ticker(pair)
+            if ticker is not None and not ticker['stale']:
+                snapshot[pair] = ticker
+            else:
+                missing.append(pair)
+        
+        if missing:
+            await self._refresh_tickers(missing)
+            for pair in missing:
+                ticker = self._cached_ticker(pair) or self._live_ticker(pair)
+                if ticker is not None:
+                    snapshot[pair] = ticker
+        return snapshot
+
+    def _live_ticker(self, pair: str) -> Optional[Dict]:
+        live_data = self.live_prices.get(pair)
+        if live_data is None:
+            return None
+        age = (datetime.now(timezone.utc) - live_data['timestamp']).total_seconds()
+        return {
+            'price': live_data['price'],
+            'volume24h': live_data['volume'],
+            'change24h': ((live_data['price'] - live_data['low']) / 
+                        live_data['low'] * 100 if live_data['low'] > 0 else 0),
+            'source': 'live',
+            'age': age,
+            'stale': age > self.live_ticker_max_age
+        }
+
+    def _cached_ticker(self, pair: str) -> Optional[Dict]:
+        entry = self._ticker_cache.get(pair)
+        if entry is None:
+            return None
+        fetched_at, ticker = entry
+        age = time.monotonic() - fetched_at
+        return {**ticker, 'source': 'rest', 'age': age, 'stale': age > self.ticker_ttl}
+
+    async def _refresh_tickers(self, pairs: List[str]):
+        """Fetch tickers in one request; concurrent callers share the same batch"""
+        for pair in pairs:
+            if pair in self._ticker_requests:
+                continue
+            if self._ticker_batch is None:
+                self._ticker_batch = asyncio.ensure_future(self._fetch_ticker_batch())
+            self._ticker_batch_pairs.append(pair)
+            self._ticker_requests[pair] = self._ticker_batch
+        waiting = {self._ticker_requests[pair] for pair in pairs}
+        await asyncio.gather(*waiting, return_exceptions=True)
+
+    async def _fetch_ticker_batch(self):
+        # Yield once so callers arriving in the same loop iteration join this batch
+        await asyncio.sleep(0)
+        pairs, self._ticker_batch_pairs = self._ticker_batch_pairs, []
+        self._ticker_batch = None
+        try:
+            await self._fetch_tickers(pairs)
+        finally:
+            for pair in pairs:
+                self._ticker_requests.pop(pair, None)
+
+    async def _fetch_tickers(self, pairs: List[str]):
+        logger.info(f"Fetching ticker data for {len(pairs)} pairs")
+        result = await self._api_request('public/Ticker', {'pair': ','.join(pairs)})
+        # The response may be keyed by the REST name even when queried by altname
+        requested = {self.altnames.get(pair, pair): pair for pair in pairs}
+        now = time.monotonic()
+        for key, ticker_data in (result or {}).items():
+            pair = key if key in pairs else requested.get(self.altnames.get(key, key), key)
+            try:
+                self._ticker_cache[pair] = (now, {
                     'price': float(ticker_data['c'][0]),
                     'volume24h': float(ticker_data['v'][1]),
                     'change24h': (float(ticker_data['c'][0]) - float(ticker_data['o'])) / 
                                 float(ticker_data['o']) * 100
-                }
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error getting ticker for {pair}: {str(e)}")
-            return None
+                })
+            except (KeyError, ValueError, TypeError, ZeroDivisionError) as e:
+                logger.warning(f"Invalid ticker data for {key}: {e}")
 
     async def _api_request(self, endpoint: str, data: dict = None) -> dict:
-        """Make a request to Kraken API"""
-        if data is None:
-            data = {}
-        url = f"{self.api_url}/0/{endpoint}"
-        
+        """Make a rate-limited, retrying request to Kraken API"""
+        await self.ensure_session()
         try:
-            async with self.session.get(url, params=data) as response:
-                if response.status != 200:
-                    logger.error(f"API request failed: {response.status}")
-                    return {}
-                    
-                result = await response.json()
-                if result.get('error'):
-                    logger.error(f"API error: {result['error']}")
-                    return {}
-                    
-                return result.get('result', {})
-                
+            return await self.rest.request(endpoint, data)
         except Exception as e:
             logger.error(f"API request failed: {str(e)}")
-            return {}
\ No newline at end of file
+            return {}
+
+    async def get_historical_data(self, pair: str, interval: int = 1, count: int = 720,
+                                  since: int = None) -> pd.DataFrame:
+        """Fetch OHLC candles from the REST API"""
+        params = {'pair': pair, 'interval': interval}
+        if since is not None:
+            params['since'] = since
+        result = await self._api_request('public/OHLC', params)
+        candles = next((v for k, v in result.items() if k != 'last'), None)
+        if not candles:
+            return pd.DataFrame()
+        
+        df = pd.DataFrame(candles[-count:], columns=['timestamp', 'open', 'high', 'low',
+                                                     'close', 'vwap', 'volume', 'count'])
+        df = df.astype({'open': float, 'high': float, 'low': float, 'close': float,
+                        'vwap': float, 'volume': float, 'count': int})
+        df['timestamp'] = pd.to_datetime(df['timestamp'].astype(int), unit='s')
+        return df
+
+    async def seed_candles(self, pairs: List[str]):
+        """Load candle history once for pairs not yet in the local store"""
+        pairs = [pair for pair in pairs if not self.candles.has_pair(pair)]
+        if not pairs:
+            return
+        logger.info(f"Seeding candle history for {len(pairs)} pairs")
+        
+        async def seed_pair(pair):
+            # Seed 1m first: higher timeframes resume their open bucket from it
+            for tf in sorted(TIMEFRAMES, key=TIMEFRAMES.get):
+                try:
+                    df = await self.get_historical_data(pair, TIMEFRAMES[tf] // 60)
+                    self.candles.seed(pair, tf, df)
+                except Exception as e:
+                    logger.error(f"Error seeding {tf} candles for {pair}: {e}")
+        
+        await asyncio.gather(*(seed_pair(pair) for pair in pairs))
+
+    async def get_all_timeframe_data(self, pair: str) -> Dict[str, pd.DataFrame]:
+        """Get candles for all timeframes from the local store"""
+        if not self.candles.has_pair(pair) and not self.replay_mode:
+            await self.seed_candles([pair])
+        return self.candles.get_frames(pair)
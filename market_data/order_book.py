@@ -0,0 +1,189 @@
+import zlib
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional
+
+import numpy as np
+
+CHECKSUM_LEVELS = 10  # Kraken checksums cover the top 10 levels of each side
+
+
+def _checksum_token(value: str) -> str:
+    return value.replace('.', '').lstrip('0')
+
+
+class _BookSide:
+    """One side of the book as a sorted key array plus a level map.
+
+    Keys are prices for asks and negated prices for bids, so index 0 is
+    always the best level. Cumulative volumes are rebuilt lazily after a
+    change, which keeps depth queries to a bisect + lookup.
+    """
+
+    def __init__(self, is_bid: bool):
+        self.is_bid = is_bid
+        self.keys: List[float] = []
+        self.levels: Dict[float, tuple] = {}  # key -> (price_str, volume_str, volume)
+        self._cum_volume = None
+        self._cum_notional = None
+
+    def clear(self):
+        self.keys.clear()
+        self.levels.clear()
+        self._cum_volume = None
+        self._cum_notional = None
+
+    def _key(self, price: float) -> float:
+        return -price if self.is_bid else price
+
+    def update(self, price_str: str, volume_str: str):
+        key = self._key(float(price_str))
+        volume = float(volume_str)
+        if volume == 0:
+            if key in self.levels:
+                del self.levels[key]
+                del self.keys[bisect_left(self.keys, key)]
+        else:
+            if key not in self.levels:
+                insort(self.keys, key)
+            self.levels[key] = (price_str, volume_str, volume)
+        self._cum_volume = None
+
+    def truncate(self, depth: int):
+        if len(self.keys) <= depth:
+            return
+        for key in self.keys[depth:]:
+            del self.levels[key]
+        del self.keys[depth:]
+        self._cum_volume = None
+
+    def best(self) -> Optional[float]:
+        return abs(self.keys[0]) if self.keys else None
+
+    def _cumulative(self):
+        if self._cum_volume is None:
+            volumes = np.fromiter((self.levels[k][2] for k in self.keys), dtype=np.float64, count=len(self.keys))
+            prices = np.abs(np.asarray(self.keys, dtype=np.float64))
+            self._cum_volume = np.cumsum(volumes)
+            self._cum_notional = np.cumsum(volumes * prices)
+        return self._cum_volume, self._cum_notional
+
+    def depth_to(self, price: float) -> tuple:
+        """(volume, notional) of all levels at or better than `price`"""
+        cum_volume, cum_notional = self._cumulative()
+        count = bisect_right(self.keys, self._key(price))
+        if count == 0:
+            return 0.0, 0.0
+        return float(cum_volume[count - 1]), float(cum_notional[count - 1])
+
+    def volume_top(self, levels: int) -> float:
+        cum_volume, _ = self._cumulative()
+        count = min(levels, len(cum_volume))
+        return float(cum_volume[count - 1]) if count else 0.0
+
+    def checksum_part(self) -> str:
+        return ''.join(
+            _checksum_token(self.levels[k][0]) + _checksum_token(self.levels[k][1])
+            for k in self.keys[:CHECKSUM_LEVELS]
+        )
+
+
+class OrderBook:
+    """Incrementally maintained L2 book for one pair (Kraken ``book`` channel)"""
+
+    def __init__(self, depth: int = 25):
+        self.depth = depth
+        self.asks = _BookSide(is_bid=False)
+        self.bids = _BookSide(is_bid=True)
+        self.synced = False
+        self.updates = 0
+        self.checksum_failures = 0
+
+    def apply_snapshot(self, asks: list, bids: list):
+        self.asks.clear()
+        self.bids.clear()
+        for level in asks:
+            self.asks.update(level[0], level[1])
+        for level in bids:
+            self.bids.update(level[0], level[1])
+        self.asks.truncate(self.depth)
+        self.bids.truncate(self.depth)
+        self.synced = True
+
+    def apply_update(self, asks: list, bids: list, checksum: str = None) -> bool:
+        """Apply level changes; returns False when the book fails its checksum"""
+        for level in asks:
+            self.asks.update(level[0], level[1])
+        for level in bids:
+            self.bids.update(level[0], level[1])
+        self.asks.truncate(self.depth)
+        self.bids.truncate(self.depth)
+        self.updates += 1
+
+        if checksum is not None and self.checksum() != int(checksum):
+            self.checksum_failures += 1
+            self.synced = False
+            return False
+        return True
+
+    def checksum(self) -> int:
+        return zlib.crc32((self.asks.checksum_part() + self.bids.checksum_part()).encode())
+
+    def best_bid(self) -> Optional[float]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[float]:
+        return self.asks.best()
+
+    def mid(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+    def spread(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return ask - bid
+
+    def spread_bps(self) -> Optional[float]:
+        mid = self.mid()
+        if not mid:
+            return None
+        return self.spread() / mid * 10000
+
+    def depth_within_bps(self, bps: float) -> Dict[str, float]:
+        """Volume and notional resting within `bps` of the mid on each side"""
+        mid = self.mid()
+        if mid is None:
+            return {'bid_volume': 0.0, 'ask_volume': 0.0, 'bid_notional': 0.0, 'ask_notional': 0.0}
+        offset = mid * bps / 10000
+        bid_volume, bid_notional = self.bids.depth_to(mid - offset)
+        ask_volume, ask_notional = self.asks.depth_to(mid + offset)
+        return {
+            'bid_volume': bid_volume,
+            'ask_volume': ask_volume,
+            'bid_notional': bid_notional,
+            'ask_notional': ask_notional
+        }
+
+    def imbalance(self, levels: int = 10) -> float:
+        """(bid - ask) / (bid + ask) volume over the top `levels`, in [-1, 1]"""
+        bid_volume = self.bids.volume_top(levels)
+        ask_volume = self.asks.volume_top(levels)
+        total = bid_volume + ask_volume
+        return (bid_volume - ask_volume) / total if total > 0 else 0.0
+
+    def metrics(self, bps: float = 50) -> Dict:
+        """Summary used by the market analyzers"""
+        depth = self.depth_within_bps(bps)
+        return {
+            'synced': self.synced,
+            'best_bid': self.best_bid(),
+            'best_ask': self.best_ask(),
+            'mid': self.mid(),
+            'spread_bps': self.spread_bps(),
+            'depth_bps': bps,
+            'depth_notional': depth['bid_notional'] + depth['ask_notional'],
+            'imbalance': self.imbalance()
+        }
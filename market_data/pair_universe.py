@@ -0,0 +1,124 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'data', 'pair_universe.json')
+
+
+class PairUniverse:
+    """Volume-ranked USD pair universe, cached on disk and served from memory.
+
+    The ranking needs the full ``AssetPairs`` catalog plus a ``Ticker``
+    call, so it is persisted with a TTL and shared by every process that
+    reads the same cache file. Callers always get the in-memory ranking;
+    once it expires a single background refresh replaces it, and only the
+    very first run (no cache at all) waits for the download.
+    """
+
+    def __init__(self, request: Callable[..., Awaitable[Dict]], cache_file: str = DEFAULT_CACHE_FILE,
+                 ttl: float = 3600.0, quotes=('ZUSD', 'USD')):
+        self.request = request  # async (endpoint, params) -> result dict
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.quotes = tuple(quotes)
+        self.entries: List[Dict] = []
+        self.updated_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loaded = False
+
+    @property
+    def expired(self) -> bool:
+        return time.time() - self.updated_at > self.ttl
+
+    def load(self) -> bool:
+        """Read the persisted ranking; returns False when there is none"""
+        self._loaded = True
+        try:
+            with open(self.cache_file, 'r') as f:
+                cached = json.load(f)
+            self.entries = cached['pairs']
+            self.updated_at = float(cached['updated_at'])
+            return bool(self.entries)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Could not load pair universe cache: {e}")
+            return False
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        tmp_file = f"{self.cache_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({'updated_at': self.updated_at, 'pairs': self.entries}, f, indent=2)
+        os.replace(tmp_file, self.cache_file)
+
+    async def get_pairs(self, limit: int = None) -> List[str]:
+        """Ranked REST pair names; never waits on the network once a ranking exists"""
+        if not self._loaded:
+            self.load()
+        if not self.entries:
+            await self.refresh()
+        elif self.expired:
+            self.refresh_in_background()
+        names = [entry['pair'] for entry in self.entries]
+        return names[:limit] if limit else names
+
+    def refresh_in_background(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.refresh())
+
+    async def refresh(self) -> bool:
+        """Download the catalog and 24h tickers and re-rank; keeps the old ranking on failure"""
+        try:
+            catalog = await self.request('public/AssetPairs')
+            if not catalog:
+                logger.error("Failed to fetch pairs")
+                return False
+            usd_pairs = {name: info for name, info in catalog.items()
+                         if '.d' not in name and info.get('quote') in self.quotes}
+            tickers = await self.request('public/Ticker', {'pair': ','.join(usd_pairs)})
+            if not tickers:
+                logger.error("Failed to fetch tickers for pair ranking")
+                return False
+
+            entries = []
+            for name, info in usd_pairs.items():
+                try:
+                    ticker = tickers[name]
+                    # Rank on 24h quote volume (base volume x 24h VWAP) so assets are comparable
+                    volume_usd = float(ticker['v'][1]) * float(ticker['p'][1])
+                except (KeyError, ValueError, TypeError) as e:
+                    logger.debug(f"No volume for {name}: {e}")
+                    continue
+                entries.append({
+                    'pair': name,
+                    'altname': info.get('altname', name),
+                    'wsname': info.get('wsname'),
+                    'base': info.get('base'),
+                    'quote': info.get('quote'),
+                    'volume_usd_24h': volume_usd
+                })
+
+            if not entries:
+                return False
+            entries.sort(key=lambda entry: entry['volume_usd_24h'], reverse=True)
+            self.entries = entries
+            self.updated_at = time.time()
+            self._save()
+            logger.info(f"Pair universe refreshed: {len(entries)} USD pairs")
+            return True
+        except Exception as e:
+            logger.error(f"Error refreshing pair universe: {e}")
+            return False
+
+    async def close(self):
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+        self._refresh_task = None
@@ -0,0 +1,154 @@
+import asyncio
+import gzip
+import logging
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StreamRecorder:
+    """Append-only, gzip-compressed log of raw WebSocket frames.
+
+    Each line is ``<receive time>\\t<raw frame>``. The file is opened in
+    append mode, so a restarted feed keeps extending the same recording;
+    every session becomes its own gzip member, which readers handle
+    transparently. `write` only buffers the line: batches are compressed
+    and flushed by a single writer thread, so the event loop never pays
+    for zlib.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 5.0, max_pending: int = 1000):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.frames = 0
+        self._file = gzip.open(path, 'ab')
+        self._pending = []
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stream-recorder')
+        self._last_flush = time.monotonic()
+
+    def write(self, raw: str, received_at: float = None):
+        if self._file is None:
+            return
+        received_at = time.time() if received_at is None else received_at
+        self._pending.append(f"{received_at:.6f}\t{raw}\n".encode('utf-8'))
+        self.frames += 1
+        if len(self._pending) >= self.max_pending or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Hand the buffered frames to the writer thread"""
+        if self._file is None or not self._pending:
+            return
+        lines, self._pending = self._pending, []
+        self._writer.submit(self._write_lines, lines)
+        self._last_flush = time.monotonic()
+
+    def _write_lines(self, lines: List[bytes]):
+        try:
+            self._file.write(b''.join(lines))
+            self._file.flush()  # Sync-flushed data stays readable if the process dies before close
+        except Exception as e:
+            logger.error(f"Error writing recording {self.path}: {e}")
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._writer.shutdown(wait=True)
+            self._file.close()
+            self._file = None
+            logger.info(f"Recorded {self.frames} frames to {self.path}")
+
+
+def read_frames(path: str) -> Iterator[Tuple[float, str]]:
+    """Yield (receive time, raw frame) from a recording.
+
+    A recording cut short (the process died before closing it) ends in a
+    truncated gzip member; the frames before the damage are still yielded.
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                if not line.endswith('\n'):
+                    break  # Partial last line of a truncated recording
+                received_at, _, raw = line.rstrip('\n').partition('\t')
+                if raw:
+                    yield float(received_at), raw
+        except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+            logger.warning(f"Recording {path} is truncated, replaying the frames before it: {e}")
+
+
+class ReplaySource:
+    """Plays a recording back through a frame handler.
+
+    `speed` is a multiple of the recorded pace (1.0 = real time, 10.0 = ten
+    times faster); None or 0 replays as fast as the handler allows, which
+    is how the maximum sustainable message rate is measured. `clock` follows
+    the recorded receive times, so time-based logic downstream sees the
+    same timeline on every run.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0, yield_every: int = 100):
+        self.path = path
+        self.speed = speed or None
+        self.yield_every = yield_every  # Frames between yields to the event loop at max speed
+        self.clock = None
+
+    async def run(self, on_frame: Callable) -> Dict:
+        frames = 0
+        first_at = None
+        started = time.perf_counter()
+        handler_time = 0.0
+
+        for received_at, raw in read_frames(self.path):
+            if first_at is None:
+                first_at = received_at
+            if self.speed:
+                delay = (received_at - first_at) / self.speed - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif frames % self.yield_every == 0:
+                await asyncio.sleep(0)
+
+            self.clock = received_at
+            handled_at = time.perf_counter()
+            on_frame(raw)
+            handler_time += time.perf_counter() - handled_at
+            frames += 1
+
+        elapsed = time.perf_counter() - started
+        recorded = (self.clock - first_at) if frames else 0.0
+        return {
+            'frames': frames,
+            'elapsed': elapsed,
+            'recorded_seconds': recorded,
+            'frames_per_second': frames / elapsed if elapsed > 0 else 0.0,
+            'avg_handler_ms': handler_time / frames * 1000 if frames else 0.0,
+            'speedup': recorded / elapsed if elapsed > 0 else 0.0
+        }
+
+
+async def _measure(path: str, speed: Optional[float]):
+    from market_data.kraken_feed import KrakenFeed
+
+    feed = KrakenFeed()
+    try:
+        stats = await feed.replay(path, speed)
+    finally:
+        await feed.close()
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    # python -m market_data.recorder <recording.jsonl.gz> [speed]; omit speed for max rate
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_measure(sys.argv[1], float(sys.argv[2]) if len(sys.argv) > 2 else None))
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import random
+from typing import Dict, Optional
+
+import aiohttp
+
+from utils.rate_limiter import AsyncRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Kraken errors that mean "try again later" rather than "bad request"
+RETRYABLE_ERRORS = (
+    'EAPI:Rate limit exceeded',
+    'EService:Unavailable',
+    'EService:Busy',
+    'EGeneral:Temporary lockout'
+)
+RATE_LIMIT_ERRORS = ('EAPI:Rate limit exceeded', 'EGeneral:Temporary lockout')
+
+
+def create_session(pool_size: int = 10, per_host: int = 6) -> aiohttp.ClientSession:
+    """HTTP session with a bounded, keep-alive connection pool"""
+    connector = aiohttp.TCPConnector(
+        limit=pool_size,
+        limit_per_host=per_host,
+        ttl_dns_cache=300,
+        keepalive_timeout=30
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=30))
+
+
+class KrakenRestClient:
+    """Rate-limited, retrying client for Kraken's public REST API.
+
+    Kraken tracks a per-client call counter that grows with each request and
+    decays over time; requests past the cap are rejected with
+    ``EAPI:Rate limit exceeded``. The limiter models that counter as a token
+    bucket (capacity = counter cap, refill = decay rate), so any number of
+    coroutines can issue requests concurrently and still use the full
+    allowed rate without tripping the limit. Public endpoints are also
+    paced per IP (about one call per second), so bursts are spaced by
+    `max_request_rate`. The defaults are the Starter tier's; higher tiers
+    pass their own counter cap and decay.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, api_url: str = "https://api.kraken.com",
+                 max_counter: int = 15, decay_per_second: float = 0.33, max_request_rate: float = 1.0,
+                 max_retries: int = 4, backoff_base: float = 0.5, backoff_max: float = 15.0):
+        self.session = session
+        self.api_url = api_url
+        self.limiter = AsyncRateLimiter(decay_per_second, burst=max_counter)
+        self.pacer = AsyncRateLimiter(max_request_rate)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def request(self, endpoint: str, params: Optional[Dict] = None, cost: float = 1.0) -> Dict:
+        """GET an endpoint and return its `result`, or {} after exhausting retries"""
+        url = f"{self.api_url}/0/{endpoint}"
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(cost)
+            await self.pacer.acquire()
+            self.requests += 1
+            retry_reason = None
+            try:
+                async with self.session.get(url, params=params or {}) as response:
+                    if response.status == 429 or response.status >= 500:
+                        retry_reason = f"HTTP {response.status}"
+                    elif response.status != 200:
+                        logger.error(f"API request failed: {response.status}")
+                        self.failures += 1
+                        return {}
+                    else:
+                        result = await response.json()
+                        errors = result.get('error') or []
+                        if not errors:
+                            return result.get('result', {})
+                        if any(e.startswith(RETRYABLE_ERRORS) for e in errors):
+                            retry_reason = ', '.join(errors)
+                            if any(e.startswith(RATE_LIMIT_ERRORS) for e in errors):
+                                self.limiter.drain()
+                        else:
+                            logger.error(f"API error: {errors}")
+                            self.failures += 1
+                            return {}
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                retry_reason = str(e) or type(e).__name__
+
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt)
+                self.retries += 1
+                logger.warning(f"Retrying {endpoint} in {delay:.2f}s ({retry_reason})")
+                await asyncio.sleep(delay)
+            else:
+                logger.error(f"API request to {endpoint} failed after {attempt + 1} attempts: {retry_reason}")
+
+        self.failures += 1
+        return {}
+
+    def stats(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'failures': self.failures
+        }
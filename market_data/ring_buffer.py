@@ -0,0 +1,86 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'vwap', 'volume', 'count']
+COLUMN_INDEX = {name: i for i, name in enumerate(COLUMNS)}
+
+
+class OHLCVRingBuffer:
+    """Fixed-capacity candle buffer backed by a preallocated NumPy array.
+
+    Every row is written twice, at ``pos`` and ``pos + capacity``, so the
+    most recent N rows are always one contiguous slice. Reads return views,
+    appends and open-candle updates are O(1), and memory never grows.
+    """
+
+    def __init__(self, capacity: int = 720):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._data = np.zeros((2 * capacity, len(COLUMNS)), dtype=np.float64)
+        self._pos = -1   # Index of the most recent row in [0, capacity)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    def clear(self):
+        self._pos = -1
+        self._size = 0
+
+    def append(self, row):
+        """Add a new candle, overwriting the oldest one when full"""
+        self._pos = (self._pos + 1) % self.capacity
+        self._data[self._pos] = row
+        self._data[self._pos + self.capacity] = row
+        if self._size < self.capacity:
+            self._size += 1
+
+    def update_last(self, row):
+        """Replace the most recent (open) candle in place"""
+        if self._size == 0:
+            self.append(row)
+            return
+        self._data[self._pos] = row
+        self._data[self._pos + self.capacity] = row
+
+    def extend(self, rows: np.ndarray):
+        """Bulk append rows, keeping only the newest `capacity` of them"""
+        rows = np.asarray(rows, dtype=np.float64)[-self.capacity:]
+        for row in rows:
+            self.append(row)
+
+    def last_row(self) -> Optional[np.ndarray]:
+        if self._size == 0:
+            return None
+        return self._data[self._pos]
+
+    def last_timestamp(self) -> Optional[int]:
+        if self._size == 0:
+            return None
+        return int(self._data[self._pos, 0])
+
+    def view(self, n: int = None) -> np.ndarray:
+        """Read-only contiguous view of the last `n` candles, oldest first"""
+        n = self._size if n is None else min(n, self._size)
+        end = self._pos + 1 + self.capacity
+        view = self._data[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def column(self, name: str, n: int = None) -> np.ndarray:
+        """View of a single column for the last `n` candles"""
+        return self.view(n)[:, COLUMN_INDEX[name]]
+
+    def to_frame(self, n: int = None) -> pd.DataFrame:
+        """Copy the last `n` candles into a DataFrame for the analysis code"""
+        df = pd.DataFrame(self.view(n), columns=COLUMNS)
+        df['timestamp'] = pd.to_datetime(df['timestamp'].astype(np.int64), unit='s')
+        df['count'] = df['count'].astype(np.int64)
+        return df
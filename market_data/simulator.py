@@ -0,0 +1,430 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from aiohttp import web
+
+from market_data.order_book import OrderBook
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORICAL_DIR = os.path.join(ROOT_DIR, 'data', 'historical')
+QUOTES = ('USDT', 'ZUSD', 'USD')
+CHANNELS = ('ticker', 'ohlc', 'book', 'trade')
+
+
+def _price_decimals(price: float) -> int:
+    return max(2, min(10, 6 - int(math.floor(math.log10(max(price, 1e-9))))))
+
+
+class _SimPair:
+    """Price path, running candle and order book for one simulated pair"""
+
+    def __init__(self, name: str, path: np.ndarray, book_depth: int = 25):
+        self.name = name
+        quote = next((q for q in QUOTES if name.endswith(q) and len(name) > len(q)), name[-3:])
+        self.wsname = f"{name[:-len(quote)]}/{'USD' if quote == 'ZUSD' else quote}"
+        self.path = path
+        self.index = 0
+        self.price = float(path[0])
+        self.decimals = _price_decimals(self.price)
+        self.volume_24h = float(np.random.uniform(1e3, 1e6))
+        self.book_depth = book_depth
+        self.book = OrderBook(book_depth)
+        self.candle = None
+
+    def step(self):
+        """Advance along the price path with a little noise"""
+        self.index = (self.index + 1) % len(self.path)
+        self.price = float(self.path[self.index]) * (1 + random.gauss(0, 2e-4))
+
+    def fmt(self, price: float) -> str:
+        return f"{price:.{self.decimals}f}"
+
+    def ticker(self) -> Dict:
+        price = self.fmt(self.price)
+        low, high = self.fmt(self.price * 0.97), self.fmt(self.price * 1.03)
+        volume = f"{self.volume_24h:.8f}"
+        return {
+            'a': [self.fmt(self.price * 1.0001), '1', '1.000'],
+            'b': [self.fmt(self.price * 0.9999), '1', '1.000'],
+            'c': [price, '0.10000000'],
+            'v': [volume, volume],
+            'p': [price, price],
+            't': [100, 1000],
+            'l': [low, low],
+            'h': [high, high],
+            'o': self.fmt(float(self.path[self.index - 1]))
+        }
+
+    def ohlc(self, now: float) -> List:
+        """Update and return the open 1m candle in WebSocket format"""
+        start = int(now // 60) * 60
+        if self.candle is None or self.candle[0] != start:
+            self.candle = [start, self.price, self.price, self.price, self.price, 0.0, 0]
+        candle = self.candle
+        candle[2] = max(candle[2], self.price)
+        candle[3] = min(candle[3], self.price)
+        candle[4] = self.price
+        candle[5] += random.uniform(0.01, 1.0)
+        candle[6] += 1
+        return [f"{now:.6f}", f"{start + 60:.6f}", self.fmt(candle[1]), self.fmt(candle[2]),
+                self.fmt(candle[3]), self.fmt(candle[4]), self.fmt(candle[4]),
+                f"{candle[5]:.8f}", candle[6]]
+
+    def trade(self, now: float) -> List:
+        return [[self.fmt(self.price), f"{random.uniform(0.001, 2.0):.8f}", f"{now:.6f}",
+                 random.choice('bs'), random.choice('lm'), '']]
+
+    def book_snapshot(self, now: float) -> Dict:
+        tick = 10 ** -self.decimals * max(1, round(self.price * 1e-4 * 10 ** self.decimals))
+        asks = [[self.fmt(self.price + tick * (i + 1)), f"{random.uniform(0.1, 10):.8f}", f"{now:.6f}"]
+                for i in range(self.book_depth)]
+        bids = [[self.fmt(self.price - tick * (i + 1)), f"{random.uniform(0.1, 10):.8f}", f"{now:.6f}"]
+                for i in range(self.book_depth)]
+        self.book.apply_snapshot(asks, bids)
+        return {'as': asks, 'bs': bids}
+
+    def book_update(self, now: float) -> Dict:
+        """Change the volume of one of the top levels; carries the book checksum"""
+        side, key = ('a', 'asks') if random.random() < 0.5 else ('b', 'bids')
+        levels = getattr(self.book, key)
+        level_key = random.choice(levels.keys[:10])
+        level = [levels.levels[level_key][0], f"{random.uniform(0.1, 10):.8f}", f"{now:.6f}"]
+        if side == 'a':
+            self.book.apply_update([level], [])
+        else:
+            self.book.apply_update([], [level])
+        return {side: [level], 'c': str(self.book.checksum())}
+
+    def ohlc_history(self, interval: int, since: Optional[int], now: float, count: int = 720) -> List:
+        """REST candles aggregated from the price path, ending at the current interval"""
+        period = interval * 60
+        last_start = int(now // period) * period
+        closes = np.resize(self.path, count * interval).reshape(count, interval)
+        opens = closes[:, 0]
+        highs = closes.max(axis=1)
+        lows = closes.min(axis=1)
+        last = closes[:, -1]
+        starts = last_start - period * np.arange(count - 1, -1, -1)
+        rows = []
+        for i in range(count):
+            if since is not None and starts[i] <= since:
+                continue
+            rows.append([int(starts[i]), self.fmt(opens[i]), self.fmt(highs[i]), self.fmt(lows[i]),
+                         self.fmt(last[i]), self.fmt((highs[i] + lows[i] + last[i]) / 3),
+                         f"{random.uniform(1, 100):.8f}", interval * 5])
+        return rows
+
+
+class SimulatedKraken:
+    """Local stand-in for Kraken's public REST and WebSocket v1 APIs.
+
+    Serves ``AssetPairs``, ``Ticker`` and ``OHLC`` plus a WebSocket that
+    streams ticker/ohlc/book/trade messages for the subscribed pairs at a
+    total of `rate` messages per second, which can be changed while clients
+    are connected. Prices follow the 1m closes in data/historical (looped),
+    or synthetic random walks when `synthetic` is set or no CSV is found.
+    Book updates only change volumes at existing levels, but carry valid
+    checksums so the feed's book validation is exercised.
+    """
+
+    def __init__(self, num_pairs: int = 14, rate: float = 100.0, synthetic: bool = False,
+                 data_dir: str = HISTORICAL_DIR, host: str = '127.0.0.1', port: int = 0):
+        self.rate = rate
+        self.host = host
+        self.port = port
+        self.pairs = self._load_pairs(num_pairs, synthetic, data_dir)
+        self.by_wsname = {p.wsname: p for p in self.pairs.values()}
+        self.connections = set()
+        self.sent = 0
+        self._channel_ids = {}
+        self._runner = None
+
+    def _load_pairs(self, num_pairs: int, synthetic: bool, data_dir: str) -> Dict[str, _SimPair]:
+        pairs = {}
+        if not synthetic and os.path.isdir(data_dir):
+            for filename in sorted(os.listdir(data_dir)):
+                if len(pairs) >= num_pairs:
+                    break
+                if not filename.endswith('_1m_historical.csv'):
+                    continue
+                name = filename[:-len('_1m_historical.csv')]
+                try:
+                    closes = pd.read_csv(os.path.join(data_dir, filename), usecols=['close'])['close']
+                    closes = closes.dropna().to_numpy(dtype=np.float64)
+                    if len(closes) > 1 and closes.min() > 0:
+                        pairs[name] = _SimPair(name, closes)
+                except Exception as e:
+                    logger.warning(f"Skipping {filename}: {e}")
+
+        while len(pairs) < num_pairs:
+            name = f"SIM{len(pairs)}USD"
+            start = 10 ** random.uniform(-1, 4)
+            walk = start * np.exp(np.cumsum(np.random.normal(0, 1e-3, 10000)))
+            pairs[name] = _SimPair(name, walk)
+        return pairs
+
+    @property
+    def api_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}/ws"
+
+    def set_rate(self, rate: float):
+        self.rate = rate
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/0/public/AssetPairs', self._asset_pairs)
+        app.router.add_get('/0/public/Ticker', self._ticker)
+        app.router.add_get('/0/public/OHLC', self._ohlc)
+        app.router.add_get('/ws', self._websocket)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        logger.info(f"Simulated Kraken on {self.api_url} with {len(self.pairs)} pairs")
+
+    async def close(self):
+        for ws in list(self.connections):
+            await ws.close()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _lookup(self, names: str) -> List[_SimPair]:
+        return [self.pairs[name] for name in names.split(',') if name in self.pairs]
+
+    async def _asset_pairs(self, request):
+        result = {name: {'altname': name, 'wsname': pair.wsname,
+                         'base': pair.wsname.split('/')[0], 'quote': pair.wsname.split('/')[1]}
+                  for name, pair in self.pairs.items()}
+        return web.json_response({'error': [], 'result': result})
+
+    async def _ticker(self, request):
+        names = request.query.get('pair')
+        pairs = self._lookup(names) if names else list(self.pairs.values())
+        if not pairs:
+            return web.json_response({'error': ['EQuery:Unknown asset pair']})
+        return web.json_response({'error': [], 'result': {p.name: p.ticker() for p in pairs}})
+
+    async def _ohlc(self, request):
+        pairs = self._lookup(request.query.get('pair', ''))
+        if not pairs:
+            return web.json_response({'error': ['EQuery:Unknown asset pair']})
+        interval = int(request.query.get('interval', 1))
+        since = request.query.get('since')
+        now = time.time()
+        rows = pairs[0].ohlc_history(interval, int(since) if since else None, now)
+        last = rows[-2][0] if len(rows) > 1 else int(now)
+        return web.json_response({'error': [], 'result': {pairs[0].name: rows, 'last': last}})
+
+    def _channel_id(self, channel: str, wsname: str) -> int:
+        return self._channel_ids.setdefault((channel, wsname), len(self._channel_ids) + 1)
+
+    async def _websocket(self, request):
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        self.connections.add(ws)
+        subscriptions = []  # (channel, pair) in subscription order
+        await ws.send_json({'event': 'systemStatus', 'status': 'online', 'version': 'sim'})
+        emitter = asyncio.create_task(self._emit(ws, subscriptions))
+        try:
+            async for msg in ws:
+                if msg.type != web.WSMsgType.TEXT:
+                    continue
+                await self._handle_request(ws, json.loads(msg.data), subscriptions)
+        finally:
+            emitter.cancel()
+            self.connections.discard(ws)
+        return ws
+
+    async def _handle_request(self, ws, message: Dict, subscriptions: List):
+        event = message.get('event')
+        if event == 'ping':
+            await ws.send_json({'event': 'pong', 'reqid': message.get('reqid')})
+            return
+        if event not in ('subscribe', 'unsubscribe'):
+            return
+        subscription = message.get('subscription', {})
+        channel = subscription.get('name')
+        for wsname in message.get('pair', []):
+            pair = self.by_wsname.get(wsname)
+            if pair is None or channel not in CHANNELS:
+                await ws.send_json({'event': 'subscriptionStatus', 'status': 'error', 'pair': wsname,
+                                    'errorMessage': 'Currency pair not supported'})
+                continue
+            key = (channel, pair)
+            if event == 'subscribe':
+                if key not in subscriptions:
+                    subscriptions.append(key)
+            elif key in subscriptions:
+                subscriptions.remove(key)
+            name = 'ohlc-1' if channel == 'ohlc' else (f"book-{pair.book_depth}" if channel == 'book' else channel)
+            await ws.send_json({'channelID': self._channel_id(channel, wsname), 'channelName': name,
+                                'event': 'subscriptionStatus', 'pair': wsname,
+                                'status': f"{event}d", 'subscription': subscription})
+            if event == 'subscribe' and channel == 'book':
+                await ws.send_json([self._channel_id(channel, wsname), pair.book_snapshot(time.time()),
+                                    name, wsname])
+
+    def _message(self, channel: str, pair: _SimPair) -> List:
+        now = time.time()
+        channel_id = self._channel_id(channel, pair.wsname)
+        if channel == 'ticker':
+            pair.step()
+            return [channel_id, pair.ticker(), 'ticker', pair.wsname]
+        if channel == 'ohlc':
+            return [channel_id, pair.ohlc(now), 'ohlc-1', pair.wsname]
+        if channel == 'book':
+            return [channel_id, pair.book_update(now), f"book-{pair.book_depth}", pair.wsname]
+        return [channel_id, pair.trade(now), 'trade', pair.wsname]
+
+    async def _emit(self, ws, subscriptions: List):
+        """Stream round-robin over this connection's subscriptions at its share of `rate`"""
+        tick = 0.01
+        budget = 0.0
+        cursor = 0
+        last = time.monotonic()
+        while not ws.closed:
+            await asyncio.sleep(tick)
+            now = time.monotonic()
+            budget += self.rate / max(1, len(self.connections)) * (now - last)
+            last = now
+            if not subscriptions:
+                budget = 0.0
+                continue
+            while budget >= 1 and not ws.closed:
+                channel, pair = subscriptions[cursor % len(subscriptions)]
+                cursor += 1
+                budget -= 1
+                if channel == 'book' and not pair.book.synced:
+                    continue  # Snapshot not sent yet
+                await ws.send_str(json.dumps(self._message(channel, pair)))
+                self.sent += 1
+
+
+async def run_load_test(rates: List[float], step_seconds: float = 10.0, num_pairs: int = 14,
+                        num_shards: int = 1, synthetic: bool = False, trading: bool = False) -> List[Dict]:
+    """Ramp the simulated message rate and report feed throughput, lag and decision latency.
+
+    With `trading`, every price update goes through a TradingManager's
+    `price_update_callback` (analysis and paper orders) on the simulated
+    feed, with the per-pair analysis throttle off so each update is a full
+    decision. Without it, a decision only gathers the callback's inputs
+    from the feed, which isolates the feed's own cost.
+    """
+    from market_data.kraken_feed import KrakenFeed
+
+    sim = SimulatedKraken(num_pairs, rate=0, synthetic=synthetic)
+    await sim.start()
+    workdir = tempfile.mkdtemp()
+    universe_file = os.path.join(workdir, 'pair_universe.json')  # Keep simulated pairs out of data/
+    # The simulated exchange has no rate limit: don't let the Starter-tier pacing skew the numbers
+    feed = KrakenFeed(num_shards=num_shards, max_pairs=num_pairs, api_url=sim.api_url, ws_url=sim.ws_url,
+                      universe_file=universe_file,
+                      rest_limits={'max_counter': 1000, 'decay_per_second': 1000.0, 'max_request_rate': 1000.0})
+    decisions = []
+
+    manager = None
+    previous_cwd = os.getcwd()
+    if trading:
+        from database.db_manager import DatabaseManager
+        from trading.trading_manager import TradingManager
+
+        with open(os.path.join(ROOT_DIR, 'config', 'indicators_config.json'), 'r') as f:
+            config = json.load(f)
+        # PaperTrader keeps its state and trade log under the working directory: keep them out of the repo
+        os.chdir(workdir)
+        manager = TradingManager(config, DatabaseManager(), "crypto")
+        manager.feed = feed
+        manager.analysis_interval = 0
+
+    async def decide(pair: str, price: float):
+        started = time.perf_counter()
+        if manager is not None:
+            await manager.price_update_callback(pair, price)
+        else:
+            # Same inputs TradingManager gathers before each decision
+            await feed.get_all_timeframe_data(pair)
+            feed.get_orderbook_metrics(pair)
+            feed.get_order_flow(pair)
+        decisions.append(time.perf_counter() - started)
+
+    report = []
+    try:
+        await feed.start()
+        await feed.seed_candles(list(feed.subscription_manager.active_pairs))
+        if manager is not None:
+            manager.pairs = set(feed.subscription_manager.active_pairs)
+        feed.add_price_callback(decide)
+
+        for rate in rates:
+            sim.set_rate(rate)
+            decisions.clear()
+            sent_before = sim.sent
+            received_before = sum(shard.messages for shard in feed.shards)
+            before = feed.dispatcher.stats()
+            for shard in feed.shards:
+                shard.max_lag = 0.0
+            feed.dispatcher.max_observed_lag = 0.0
+
+            await asyncio.sleep(step_seconds)
+
+            after = feed.dispatcher.stats()
+            latencies = np.array(decisions) * 1000 if decisions else np.zeros(1)
+            step = {
+                'target_rate': rate,
+                'sent_rate': (sim.sent - sent_before) / step_seconds,
+                'received_rate': (sum(shard.messages for shard in feed.shards) - received_before) / step_seconds,
+                'feed_max_lag_ms': max(shard.max_lag for shard in feed.shards) * 1000,
+                'dispatch_avg_lag_ms': after['avg_lag'] * 1000,
+                'dispatch_max_lag_ms': after['max_lag'] * 1000,
+                'published': after['published'] - before['published'],
+                'coalesced': after['coalesced'] - before['coalesced'],
+                'decisions': len(decisions),
+                'decision_p50_ms': float(np.percentile(latencies, 50)),
+                'decision_p99_ms': float(np.percentile(latencies, 99))
+            }
+            report.append(step)
+            logger.info(
+                f"rate {rate:>8.0f}/s | sent {step['sent_rate']:>8.0f}/s | recv {step['received_rate']:>8.0f}/s | "
+                f"feed lag {step['feed_max_lag_ms']:.1f}ms | dispatch lag {step['dispatch_max_lag_ms']:.1f}ms | "
+                f"decisions {step['decisions']} p50 {step['decision_p50_ms']:.2f}ms p99 {step['decision_p99_ms']:.2f}ms"
+            )
+    finally:
+        await feed.close()
+        await sim.close()
+        os.chdir(previous_cwd)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test KrakenFeed against a simulated exchange")
+    parser.add_argument('--rates', default='100,500,1000,2500,5000', help="Comma-separated msgs/sec steps")
+    parser.add_argument('--step', type=float, default=10.0, help="Seconds per rate step")
+    parser.add_argument('--pairs', type=int, default=14)
+    parser.add_argument('--shards', type=int, default=1)
+    parser.add_argument('--synthetic', action='store_true', help="Random walks instead of data/historical")
+    parser.add_argument('--trading', action='store_true',
+                        help="Drive TradingManager.price_update_callback (analysis + paper orders) per decision")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger('aiohttp.access').setLevel(logging.WARNING)
+
+    asyncio.run(run_load_test([float(r) for r in args.rates.split(',')], args.step,
+                              args.pairs, args.shards, args.synthetic, args.trading))
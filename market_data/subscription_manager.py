@@ -0,0 +1,78 @@
+import logging
+from typing import Callable, Dict, Iterable, List, Set
+
+from market_data.ws_shard import WebSocketShard
+
+logger = logging.getLogger(__name__)
+
+
+class SubscriptionManager:
+    """Keeps the shards' subscriptions equal to the set of pairs we trade.
+
+    `sync` diffs the desired pair set against the active one and sends
+    targeted subscribe/unsubscribe messages on the live connections, so the
+    tracked universe can change without reconnecting. The shard caches are
+    updated first, which means a shard that is currently disconnected picks
+    up the change when it replays its subscriptions.
+    """
+
+    def __init__(self, shards: List[WebSocketShard], channel_options: Dict[str, dict],
+                 ws_name: Callable = None):
+        self.shards = shards
+        self.channel_options = channel_options
+        self.ws_name = ws_name or (lambda pair: pair)
+        self.pair_shard: Dict[str, WebSocketShard] = {}
+
+    @property
+    def active_pairs(self) -> Set[str]:
+        return set(self.pair_shard)
+
+    def assign(self, pair: str) -> WebSocketShard:
+        """Place a pair on the least loaded shard; assignments are sticky"""
+        shard = self.pair_shard.get(pair)
+        if shard is None:
+            shard = min(self.shards, key=lambda s: len(s.pairs))
+            self.pair_shard[pair] = shard
+            for channel_pairs in shard.subscriptions.values():
+                channel_pairs.add(pair)
+        return shard
+
+    async def sync(self, desired: Iterable[str]) -> Dict[str, List[str]]:
+        """Subscribe new pairs and unsubscribe dropped ones; returns the diff"""
+        desired = set(desired)
+        added = sorted(desired - self.active_pairs)
+        removed = sorted(self.active_pairs - desired)
+
+        by_shard = {}
+        for pair in removed:
+            shard = self.pair_shard.pop(pair)
+            for channel_pairs in shard.subscriptions.values():
+                channel_pairs.discard(pair)
+            by_shard.setdefault(shard.index, (shard, [], []))[2].append(pair)
+        for pair in added:
+            shard = self.assign(pair)
+            by_shard.setdefault(shard.index, (shard, [], []))[1].append(pair)
+
+        for shard, subscribe, unsubscribe in by_shard.values():
+            await self._send(shard, 'unsubscribe', unsubscribe)
+            await self._send(shard, 'subscribe', subscribe)
+
+        if added or removed:
+            logger.info(f"Subscriptions updated: +{len(added)} -{len(removed)} pairs")
+        return {'added': added, 'removed': removed}
+
+    async def _send(self, shard: WebSocketShard, event: str, pairs: List[str]):
+        if not pairs:
+            return
+        ws_pairs = [self.ws_name(pair) for pair in pairs]
+        try:
+            for subscription in self.channel_options.values():
+                sent = await shard.send_json({
+                    "event": event,
+                    "pair": ws_pairs,
+                    "subscription": subscription
+                })
+                if not sent:
+                    return  # Disconnected: the updated cache is replayed on reconnect
+        except Exception as e:
+            logger.error(f"Error sending {event} on shard {shard.index}: {e}")
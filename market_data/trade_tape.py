@@ -0,0 +1,115 @@
+import time
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+
+class _RollingWindow:
+    """Running sums over the trades of the last `seconds`"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.tail = 0  # Sequence number of the oldest trade still in the window
+        self.count = 0
+        self.buy_volume = 0.0
+        self.sell_volume = 0.0
+        self.notional = 0.0
+
+    def add(self, price: float, volume: float, side: float):
+        self.count += 1
+        self.notional += price * volume
+        if side > 0:
+            self.buy_volume += volume
+        else:
+            self.sell_volume += volume
+
+    def remove(self, price: float, volume: float, side: float):
+        self.count -= 1
+        if self.count == 0:
+            # Reset instead of subtracting so float error cannot accumulate
+            self.buy_volume = self.sell_volume = self.notional = 0.0
+            return
+        self.notional -= price * volume
+        if side > 0:
+            self.buy_volume = max(0.0, self.buy_volume - volume)
+        else:
+            self.sell_volume = max(0.0, self.sell_volume - volume)
+
+
+class TradeTape:
+    """Bounded, array-backed trade history for one pair.
+
+    Trades live in preallocated NumPy arrays used as a ring. Each rolling
+    window keeps running buy/sell volume, count and notional that are
+    updated as trades enter and age out, so order-flow features are O(1)
+    reads regardless of how many trades have been seen.
+    """
+
+    def __init__(self, capacity: int = 50000, windows: Iterable[float] = (60, 300, 900)):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.prices = np.zeros(capacity, dtype=np.float64)
+        self.volumes = np.zeros(capacity, dtype=np.float64)
+        self.sides = np.zeros(capacity, dtype=np.int8)  # +1 buy, -1 sell
+        self.seq = 0  # Total trades seen; next write goes to seq % capacity
+        self.windows = {int(w): _RollingWindow(w) for w in windows}
+
+    def __len__(self) -> int:
+        return min(self.seq, self.capacity)
+
+    def add(self, timestamp: float, price: float, volume: float, side: int):
+        """Append a trade; `side` is +1 for buyer-initiated, -1 for seller"""
+        if self.seq >= self.capacity:
+            # The slot about to be overwritten must leave every window first
+            self._evict_seq(self.seq - self.capacity)
+
+        i = self.seq % self.capacity
+        self.times[i] = timestamp
+        self.prices[i] = price
+        self.volumes[i] = volume
+        self.sides[i] = side
+        self.seq += 1
+
+        for window in self.windows.values():
+            window.add(price, volume, side)
+        self._expire(timestamp)
+
+    def _evict_seq(self, seq: int):
+        i = seq % self.capacity
+        for window in self.windows.values():
+            if window.tail <= seq:
+                window.remove(self.prices[i], self.volumes[i], self.sides[i])
+                window.tail = seq + 1
+
+    def _expire(self, now: float):
+        for window in self.windows.values():
+            cutoff = now - window.seconds
+            while window.tail < self.seq:
+                i = window.tail % self.capacity
+                if self.times[i] >= cutoff:
+                    break
+                window.remove(self.prices[i], self.volumes[i], self.sides[i])
+                window.tail += 1
+
+    def last_price(self) -> Optional[float]:
+        if self.seq == 0:
+            return None
+        return float(self.prices[(self.seq - 1) % self.capacity])
+
+    def features(self, window: int = 60, now: float = None) -> Dict:
+        """Order-flow aggregates for one rolling window"""
+        self._expire(time.time() if now is None else now)
+        w = self.windows[window]
+        total = w.buy_volume + w.sell_volume
+        return {
+            'window': window,
+            'trade_count': w.count,
+            'buy_volume': float(w.buy_volume),
+            'sell_volume': float(w.sell_volume),
+            'vwap': float(w.notional / total) if total > 0 else self.last_price(),
+            'imbalance': float((w.buy_volume - w.sell_volume) / total) if total > 0 else 0.0
+        }
+
+    def all_features(self, now: float = None) -> Dict[int, Dict]:
+        now = time.time() if now is None else now
+        return {window: self.features(window, now) for window in self.windows}
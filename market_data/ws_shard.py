@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Callable, Dict, Set
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class WebSocketShard:
+    """One WebSocket connection carrying a subset of the feed's subscriptions.
+
+    Each shard owns its own supervisor/reader task: it connects, backfills
+    missed candles after a reconnect, replays its cached subscriptions and
+    hands raw frames to the shared `on_frame` handler (optionally recording
+    them first), reconnecting with jittered exponential backoff when the
+    socket drops. Throughput and lag are tracked per shard.
+    """
+
+    def __init__(self, index: int, ws_url: str, channel_options: Dict[str, dict],
+                 on_frame: Callable, on_reconnect: Callable = None,
+                 ws_name: Callable = None, recorder=None,
+                 reconnect_delay_min: float = 0.1, reconnect_delay_max: float = 30.0,
+                 backfill_timeout: float = 20.0):
+        self.index = index
+        self.ws_url = ws_url
+        self.channel_options = channel_options
+        self.on_frame = on_frame  # Decodes and handles a raw frame, returns the decoded data
+        self.recorder = recorder
+        self.on_reconnect = on_reconnect
+        self.ws_name = ws_name or (lambda pair: pair)
+        self.reconnect_delay_min = reconnect_delay_min
+        self.reconnect_delay_max = reconnect_delay_max
+        self.backfill_timeout = backfill_timeout
+
+        self.subscriptions: Dict[str, Set[str]] = {name: set() for name in channel_options}
+        self.ws = None
+        self.connected = asyncio.Event()
+        self.running = False
+        self._task = None
+        self._disconnected_at = None
+
+        # Metrics
+        self.messages = 0
+        self.bytes = 0
+        self.reconnects = 0
+        self.last_message_at = None
+        self.lag = 0.0          # Exchange trade time -> local processing, seconds
+        self.max_lag = 0.0
+        self.handler_time = 0.0  # Total seconds spent decoding and handling frames
+        self._rate_window_start = time.monotonic()
+        self._rate_window_messages = 0
+        self.message_rate = 0.0
+
+    @property
+    def pairs(self) -> Set[str]:
+        pairs = set()
+        for channel_pairs in self.subscriptions.values():
+            pairs |= channel_pairs
+        return pairs
+
+    def start(self, session: aiohttp.ClientSession):
+        self.running = True
+        self._task = asyncio.create_task(self._run(session))
+
+    async def close(self):
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.ws:
+            await self.ws.close()
+            self.ws = None
+
+    async def send_json(self, message: dict) -> bool:
+        """Send on the live connection; returns False when disconnected"""
+        if self.ws is None or self.ws.closed:
+            return False
+        await self.ws.send_json(message)
+        return True
+
+    async def _run(self, session: aiohttp.ClientSession):
+        """Supervisor loop: connect, replay subscriptions, read until the socket drops"""
+        backoff = self.reconnect_delay_min
+        while self.running:
+            try:
+                ws_conn = await session.ws_connect(self.ws_url, timeout=30, heartbeat=30)
+                self.ws = ws_conn
+                if self._disconnected_at is not None:
+                    # Fill the gap before subscribing: live updates for newer minutes
+                    # would otherwise close the candles the backfill has to insert
+                    await self._backfill()
+                await self._replay_subscriptions(ws_conn)
+                self.connected.set()
+
+                if self._disconnected_at is not None:
+                    self.reconnects += 1
+                    logger.info(f"Shard {self.index} reconnected after "
+                                f"{time.time() - self._disconnected_at:.2f}s")
+                else:
+                    logger.info(f"Shard {self.index} connected ({len(self.pairs)} pairs)")
+
+                connected_at = time.monotonic()
+                await self._read_messages(ws_conn)
+
+                # A connection that stayed up for a while resets the backoff
+                if time.monotonic() - connected_at > 60:
+                    backoff = self.reconnect_delay_min
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Shard {self.index} connection error: {e}")
+            finally:
+                self.connected.clear()
+
+            if not self.running:
+                break
+            if self.ws is not None:
+                # The connection was up: remember when it dropped for gap backfill
+                self._disconnected_at = time.time()
+                self.ws = None
+            delay = random.uniform(0.5, 1.0) * backoff
+            logger.info(f"Shard {self.index} reconnecting in {delay:.2f}s...")
+            await asyncio.sleep(delay)
+            backoff = min(backoff * 2, self.reconnect_delay_max)
+
+    async def _backfill(self):
+        """Run the reconnect handler for this shard's pairs, bounded so the socket is not left idle"""
+        if not self.on_reconnect:
+            return
+        try:
+            await asyncio.wait_for(self.on_reconnect(self.pairs), timeout=self.backfill_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Shard {self.index} gap backfill timed out after {self.backfill_timeout:.0f}s")
+        except Exception as e:
+            logger.error(f"Shard {self.index} gap backfill failed: {e}")
+
+    async def _replay_subscriptions(self, ws_conn):
+        """Send every cached subscription on a fresh connection"""
+        for name, pairs in self.subscriptions.items():
+            if not pairs:
+                continue
+            await ws_conn.send_json({
+                "event": "subscribe",
+                "pair": [self.ws_name(pair) for pair in sorted(pairs)],
+                "subscription": self.channel_options[name]
+            })
+
+    async def _read_messages(self, ws_conn):
+        """Read frames until the connection closes or errors"""
+        async for msg in ws_conn:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                started = time.perf_counter()
+                self._record_frame(len(msg.data))
+                if self.recorder:
+                    self.recorder.write(msg.data)
+                data = self.on_frame(msg.data)
+                if isinstance(data, list) and data[-2] == 'trade' and data[1]:
+                    self._record_lag(time.time() - float(data[1][-1][2]))
+                self.handler_time += time.perf_counter() - started
+
+            elif msg.type == aiohttp.WSMsgType.ERROR:
+                logger.error(f"Shard {self.index} WebSocket error: {msg.data}")
+                break
+
+    def _record_frame(self, size: int):
+        self.messages += 1
+        self.bytes += size
+        self.last_message_at = time.time()
+        self._rate_window_messages += 1
+        elapsed = time.monotonic() - self._rate_window_start
+        if elapsed >= 5:
+            self.message_rate = self._rate_window_messages / elapsed
+            self._rate_window_start = time.monotonic()
+            self._rate_window_messages = 0
+
+    def _record_lag(self, lag: float):
+        self.lag = lag
+        self.max_lag = max(self.max_lag, lag)
+
+    def stats(self) -> Dict:
+        return {
+            'shard': self.index,
+            'connected': self.connected.is_set(),
+            'pairs': len(self.pairs),
+            'messages': self.messages,
+            'bytes': self.bytes,
+            'message_rate': self.message_rate,
+            'lag': self.lag,
+            'max_lag': self.max_lag,
+            'avg_handler_ms': self.handler_time / self.messages * 1000 if self.messages else 0.0,
+            'reconnects': self.reconnects,
+            'last_message_at': self.last_message_at
+        }
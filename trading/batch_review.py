@@ -0,0 +1,245 @@
+import asyncio
+import json
+import logging
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from tqdm import tqdm
+
+from utils.rate_limiter import AsyncRateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class BatchReviewJob:
+    """Review many pairs with bounded parallelism and a resumable checkpoint.
+
+    Data fetching (ticker + OHLCV) and analysis run in separate concurrency
+    pools. Every finished pair is written to the checkpoint file, so an
+    interrupted review picks up where it stopped on the next run.
+    """
+
+    def __init__(self, feed, market_analyzer, output_dir: str = None,
+                 fetch_concurrency: int = 4, analysis_concurrency: int = 2,
+                 requests_per_second: float = 1.0):
+        self.feed = feed
+        self.market_analyzer = market_analyzer
+        if output_dir is None:
+            script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            output_dir = os.path.join(script_dir, 'analysis', 'llm')
+        self.output_dir = output_dir
+        self.checkpoint_file = os.path.join(output_dir, 'review_checkpoint.json')
+        self.fetch_semaphore = asyncio.Semaphore(fetch_concurrency)
+        self.analysis_semaphore = asyncio.Semaphore(analysis_concurrency)
+        self.rate_limiter = AsyncRateLimiter(requests_per_second, burst=fetch_concurrency)
+        self.checkpoint = None
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    async def run(self, pairs: List[str]) -> Dict:
+        """Review all pairs, resuming from a previous checkpoint if one matches"""
+        self.checkpoint = self._load_checkpoint(pairs)
+        done = self.checkpoint['results']
+        pending = [pair for pair in pairs if pair not in done]
+        if done:
+            print(f"\nResuming review: {len(done)} of {len(pairs)} pairs already complete")
+
+        # One batched Ticker request warms the feed's cache for every pending pair
+        if pending:
+            await self.feed.get_ticker_snapshot(pending)
+
+        with tqdm(total=len(pairs), initial=len(pairs) - len(pending), desc="Reviewing pairs") as progress:
+            tasks = [self._review_pair(pair, progress) for pair in pending]
+            await asyncio.gather(*tasks)
+
+        report = self._build_report(pairs)
+        report_path = self._save_report(report)
+        if not self.checkpoint['failed']:
+            self._clear_checkpoint()
+        report['report_path'] = report_path
+        return report
+
+    async def _review_pair(self, pair: str, progress: tqdm):
+        try:
+            async with self.fetch_semaphore:
+                ticker = await self.feed.get_ticker(pair)
+                if not ticker:
+                    self._record_failure(pair, "no ticker data")
+                    return
+                await self.rate_limiter.acquire()
+                ohlcv = await self.feed.get_all_timeframe_data(pair)
+                if not ohlcv:
+                    self._record_failure(pair, "no OHLCV data")
+                    return
+
+            async with self.analysis_semaphore:
+                analysis = await self.market_analyzer.analyze_market(
+                    pair, ohlcv,
+                    self.feed.get_orderbook_metrics(pair),
+                    self.feed.get_order_flow(pair)
+                )
+
+            result = self._summarize(pair, ticker, analysis)
+            self._print_result(result)
+            self.checkpoint['results'][pair] = result
+            self.checkpoint['failed'].pop(pair, None)
+            self._save_checkpoint()
+
+        except Exception as e:
+            logger.error(f"Error analyzing {pair}: {e}")
+            self._record_failure(pair, str(e))
+        finally:
+            progress.update(1)
+
+    def _summarize(self, pair: str, ticker: Dict, analysis: Dict) -> Dict:
+        """Reduce an analysis to the JSON-safe fields kept in the checkpoint"""
+        indicators = {}
+        for name, details in analysis.get('technical_indicators', {}).items():
+            indicators[name] = {
+                'signal': details.get('signal', 'N/A'),
+                'reliability': float(details.get('reliability', 0) or 0),
+                'warnings': list(details.get('warnings', []))
+            }
+
+        return {
+            'pair': pair,
+            'price': float(ticker['price']),
+            'change24h': float(ticker.get('change24h', 0) or 0),
+            'regime': analysis['market_context']['regime'],
+            'volatility': analysis['market_context']['volatility'],
+            'liquidity': analysis['market_context'].get('liquidity', 'UNKNOWN'),
+            'risk_level': analysis['summary']['risk_level'],
+            'action': analysis['summary']['primary_action'],
+            'confidence': float(analysis['summary']['confidence']),
+            'indicators': indicators,
+            'reviewed_at': datetime.now().isoformat()
+        }
+
+    def _print_result(self, result: Dict):
+        lines = [
+            f"\n{result['pair']}:",
+            f"  Price: ${result['price']:.4f}",
+            f"  Market Regime: {result['regime']}",
+            f"  Volatility: {result['volatility']}",
+            f"  Liquidity: {result['liquidity']}",
+            f"  Risk Level: {result['risk_level']}"
+        ]
+        for indicator, details in result['indicators'].items():
+            lines.append(f"  {indicator}:")
+            lines.append(f"    Signal: {details['signal']}")
+            lines.append(f"    Reliability: {details['reliability']:.2f}")
+            if details['warnings']:
+                lines.append(f"    Warnings: {', '.join(details['warnings'])}")
+        tqdm.write("\n".join(lines))
+
+    def _record_failure(self, pair: str, reason: str):
+        self.checkpoint['failed'][pair] = reason
+        self._save_checkpoint()
+
+    def _build_report(self, pairs: List[str]) -> Dict:
+        """Consolidate per-pair results into a single review report"""
+        results = [self.checkpoint['results'][p] for p in pairs if p in self.checkpoint['results']]
+
+        indicator_stats = {}
+        for result in results:
+            for name, details in result['indicators'].items():
+                stats = indicator_stats.setdefault(name, {'reliability': [], 'signals': Counter(), 'warnings': 0})
+                stats['reliability'].append(details['reliability'])
+                stats['signals'][details['signal']] += 1
+                stats['warnings'] += len(details['warnings'])
+
+        return {
+            'generated_at': datetime.now().isoformat(),
+            'started_at': self.checkpoint['started_at'],
+            'pairs_requested': len(pairs),
+            'pairs_reviewed': len(results),
+            'failed': dict(self.checkpoint['failed']),
+            'regimes': dict(Counter(r['regime'] for r in results)),
+            'actions': dict(Counter(r['action'] for r in results)),
+            'risk_levels': dict(Counter(r['risk_level'] for r in results)),
+            'top_opportunities': [
+                {'pair': r['pair'], 'action': r['action'], 'confidence': r['confidence']}
+                for r in sorted(results, key=lambda r: r['confidence'], reverse=True)
+                if r['action'] != 'HOLD'
+            ][:5],
+            'indicators': {
+                name: {
+                    'avg_reliability': sum(s['reliability']) / len(s['reliability']),
+                    'signals': dict(s['signals']),
+                    'warnings': s['warnings']
+                }
+                for name, s in indicator_stats.items()
+            },
+            'results': results
+        }
+
+    def _load_checkpoint(self, pairs: List[str]) -> Dict:
+        """Load the previous checkpoint if it covers the requested pairs"""
+        if os.path.exists(self.checkpoint_file):
+            try:
+                with open(self.checkpoint_file, 'r') as f:
+                    checkpoint = json.load(f)
+                if set(checkpoint.get('pairs', [])) == set(pairs):
+                    return checkpoint
+                logger.info("Review checkpoint is for a different pair set, starting fresh")
+            except Exception as e:
+                logger.error(f"Error loading review checkpoint: {e}")
+
+        return {
+            'pairs': list(pairs),
+            'started_at': datetime.now().isoformat(),
+            'results': {},
+            'failed': {}
+        }
+
+    def _save_checkpoint(self):
+        """Atomically write the checkpoint so a crash never leaves it truncated"""
+        tmp_path = self.checkpoint_file + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.checkpoint, f, indent=2, default=str)
+            os.replace(tmp_path, self.checkpoint_file)
+        except Exception as e:
+            logger.error(f"Error saving review checkpoint: {e}")
+
+    def _clear_checkpoint(self):
+        if os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
+
+    def _save_report(self, report: Dict) -> Optional[str]:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        report_path = os.path.join(self.output_dir, f'review_report_{timestamp}.json')
+        try:
+            with open(report_path, 'w') as f:
+                json.dump(report, f, indent=2, default=str)
+            return report_path
+        except Exception as e:
+            logger.error(f"Error saving review report: {e}")
+            return None
+
+
+def print_report(report: Dict):
+    """Print the consolidated summary of a batch review"""
+    print("\nReview Summary:")
+    print("-" * 50)
+    print(f"  Pairs reviewed: {report['pairs_reviewed']}/{report['pairs_requested']}")
+    if report['failed']:
+        print(f"  Failed (retried on next run): {', '.join(report['failed'])}")
+    print(f"  Regimes: {report['regimes']}")
+    print(f"  Actions: {report['actions']}")
+    print(f"  Risk Levels: {report['risk_levels']}")
+
+    if report['top_opportunities']:
+        print("  Top Opportunities:")
+        for item in report['top_opportunities']:
+            print(f"    {item['pair']}: {item['action']} ({item['confidence']:.2f})")
+
+    if report['indicators']:
+        print("  Indicator Reliability:")
+        for name, stats in sorted(report['indicators'].items(),
+                                  key=lambda x: x[1]['avg_reliability'], reverse=True):
+            print(f"    {name}: {stats['avg_reliability']:.2f} ({stats['warnings']} warnings)")
+
+    if report.get('report_path'):
+        print(f"  Report saved to {report['report_path']}")
@@ -7,8 +7,11 @@ import pandas as pd
 import asyncio
 
 class PaperTrader:
-    def __init__(self, initial_balance: float = 1000.0):
+    def __init__(self, initial_balance: float = 1000.0, state_dir: str = None):
         self.initial_balance = initial_balance
+        # State file and trade log live under `state_dir` (default: the working directory)
+        self.state_dir = state_dir or ''
+        self.state_file = os.path.join(self.state_dir, 'trading_state.json')
         self.positions = {}
         self.trades = []
         self.balance = self.load_state()
@@ -16,7 +19,7 @@ class PaperTrader:
         self._setup_logging()
         
     def _setup_logging(self):
-        log_dir = "logs/trades"
+        log_dir = os.path.join(self.state_dir, 'logs', 'trades')
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
             
@@ -26,8 +29,8 @@ class PaperTrader:
 
     def load_state(self) -> float:
         try:
-            if os.path.exists('trading_state.json'):
-                with open('trading_state.json', 'r') as f:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, 'r') as f:
                     state = json.load(f)
                     return state.get('balance', self.initial_balance)
             return self.initial_balance
@@ -37,7 +40,7 @@ class PaperTrader:
     def save_state(self):
         try:
             current_time = datetime.now().isoformat()
-            with open('trading_state.json', 'w') as f:
+            with open(self.state_file, 'w') as f:
                 json.dump({
                     'balance': self.balance,
                     'last_updated': current_time,
@@ -3,6 +3,7 @@ import asyncio
 import os
 import time
 import json
+import tempfile
 from datetime import datetime
 import aiohttp
 from market_data.kraken_feed import KrakenFeed
@@ -10,6 +11,7 @@ from trading.paper_trader import PaperTrader
 from trading.crypto_strategy import CryptoStrategy
 from database.db_manager import DatabaseManager
 from core.market_analyzer import IntegratedMarketAnalyzer
+from trading.batch_review import BatchReviewJob, print_report
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +20,17 @@ class TradingManager:
         self.config = config
         self.db = db
         self.mode = mode
+        # Pair universe size and connection count (derived from pairs_per_shard unless set):
+        # environment overrides the config's "feed" section
+        feed_config = config.get('feed', {})
         self.feed = KrakenFeed(
             api_key=os.getenv('KRAKEN_API_KEY'),
-            secret_key=os.getenv('KRAKEN_SECRET_KEY')
+            secret_key=os.getenv('KRAKEN_SECRET_KEY'),
+            num_shards=int(os.getenv('KRAKEN_NUM_SHARDS', feed_config.get('num_shards') or 0)) or None,
+            max_pairs=int(os.getenv('KRAKEN_MAX_PAIRS', feed_config.get('max_pairs', 20))),
+            pairs_per_shard=int(feed_config.get('pairs_per_shard', 10)),
+            record_path=os.getenv('KRAKEN_RECORD_PATH'),
+            rest_limits=feed_config.get('rest_limits')
         )
         self.trader = PaperTrader(initial_balance=1000)
         self.strategy = CryptoStrategy(db)
@@ -51,9 +61,15 @@ class TradingManager:
             # Get initial active pairs
             logger.info("Fetching initial active pairs...")
             initial_pairs = await self.feed.get_active_pairs()
-            self.pairs = set(initial_pairs[:14])  # Top 14 pairs
+            self.pairs = set(initial_pairs)  # Top max_pairs pairs by volume
             logger.info(f"Tracking pairs: {', '.join(self.pairs)}")
             
+            # Only stream (and decode) the pairs we actually trade
+            await self.feed.update_pairs(self.pairs)
+            
+            # Seed local candle history once; afterwards the WebSocket keeps it current
+            await self.feed.seed_candles(list(self.pairs))
+            
             print(f"\nStarting trading bot with ${self.trader.get_portfolio_value({}):.2f}")
             logger.info("Starting crypto trading...")
             
@@ -67,13 +83,26 @@ class TradingManager:
                         print(f"\nPortfolio Value: ${current_balance:.2f}")
                         await self.update_trading_state(current_balance)
                     
+                    # Log feed health once a minute
+                    if time.time() % 60 < 1:
+                        stats = self.feed.get_feed_stats()
+                        logger.info(f"Feed stats - delivered: {stats['delivered']}, "
+                                    f"coalesced: {stats['coalesced']}, dropped: {stats['dropped']}, "
+                                    f"avg lag: {stats['avg_lag'] * 1000:.1f}ms")
+                        for shard in self.feed.get_shard_stats():
+                            logger.info(f"Shard {shard['shard']} - pairs: {shard['pairs']}, "
+                                        f"rate: {shard['message_rate']:.1f} msg/s, "
+                                        f"lag: {shard['lag'] * 1000:.1f}ms")
+                    
                     # Update active pairs list every hour
                     if time.time() % 3600 < 1:
                         new_pairs = await self.feed.get_active_pairs()
                         old_pairs = self.pairs
-                        self.pairs = set(new_pairs[:14])
+                        self.pairs = set(new_pairs)
                         if old_pairs != self.pairs:
                             logger.info(f"Updated tracking pairs: {', '.join(self.pairs)}")
+                            await self.feed.update_pairs(self.pairs)
+                            await self.feed.seed_candles(list(self.pairs - old_pairs))
                     
                     await asyncio.sleep(1)
                     
@@ -91,7 +120,7 @@ class TradingManager:
 
     async def price_update_callback(self, pair: str, price: float):
         """Handle real-time price updates"""
-        current_time = time.time()
+        current_time = self.feed.now()
         last_time = self.last_analysis_time.get(pair, 0)
         
         # Only analyze if enough time has passed since last analysis
@@ -100,7 +129,7 @@ class TradingManager:
                 if pair in self.pairs:  # Only analyze tracked pairs
                     logger.debug(f"Analyzing price update for {pair}: ${price:.4f}")
                     
-                    # Get fresh OHLCV data
+                    # Get OHLCV data from the local candle store
                     ohlcv_data = await self.feed.get_all_timeframe_data(pair)
                     
                     # Get current ticker data
@@ -108,7 +137,11 @@ class TradingManager:
                     
                     if ticker and ohlcv_data:
                         # Perform analysis
-                        analysis = await self.market_analyzer.analyze_market(pair, ohlcv_data)
+                        analysis = await self.market_analyzer.analyze_market(
+                            pair, ohlcv_data,
+                            self.feed.get_orderbook_metrics(pair),
+                            self.feed.get_order_flow(pair)
+                        )
                         
                         # Print analysis results
                         print(f"\n{pair} Update:")
@@ -207,50 +240,42 @@ class TradingManager:
         except Exception as e:
             logger.error(f"Error updating trading state: {e}")
 
+    async def run_replay(self, path: str, speed: float = None) -> dict:
+        """Drive the trading loop from a recorded WebSocket stream instead of Kraken"""
+        logger.info(f"Replaying {path} at {f'{speed}x' if speed else 'max'} speed")
+        # Replayed orders go to a scratch account: live paper-trading state and trade logs stay untouched
+        self.trader = PaperTrader(initial_balance=1000, state_dir=tempfile.mkdtemp(prefix='replay_'))
+        logger.info(f"Replay paper trades are kept in {self.trader.state_dir}")
+
+        async def track_and_analyze(pair: str, price: float):
+            self.pairs.add(pair)  # Trade whatever the recording contains
+            await self.price_update_callback(pair, price)
+
+        self.feed.add_price_callback(track_and_analyze)
+        stats = await self.feed.replay(path, speed)
+        logger.info(f"Replayed {stats['frames']} frames in {stats['elapsed']:.2f}s "
+                    f"({stats['frames_per_second']:.0f} msg/s, {stats['speedup']:.1f}x real time)")
+        logger.info(f"Dispatcher stats: {stats['dispatcher']}")
+        return stats
+
     async def run_llm_review(self):
-        """Perform LLM review of indicators and market conditions"""
+        """Perform LLM review of indicators and market conditions across all pairs"""
         print("\nInitiating LLM Review of Indicators...")
         try:
+            await self.feed.ensure_session()
+            # Tracked pairs, or the feed's ranked universe (already limited to its max_pairs)
             pairs = list(self.pairs) if self.pairs else await self.feed.get_active_pairs()
-            pairs = pairs[:14]  # Top 14 pairs
             
             print("\nAnalyzing Market Data:")
             print("-" * 50)
             
-            for pair in pairs:
-                try:
-                    ticker = await self.feed.get_ticker(pair)
-                    if not ticker:
-                        continue
-                        
-                    ohlcv = await self.feed.get_all_timeframe_data(pair)
-                    if not ohlcv:
-                        continue
-                        
-                    analysis = await self.market_analyzer.analyze_market(pair, ohlcv)
-                    
-                    print(f"\n{pair}:")
-                    print(f"  Price: ${float(ticker['price']):.4f}")
-                    print(f"  Market Regime: {analysis['market_context']['regime']}")
-                    print(f"  Volatility: {analysis['market_context']['volatility']}")
-                    print(f"  Risk Level: {analysis['summary']['risk_level']}")
-                    
-                    for indicator, details in analysis.get('technical_indicators', {}).items():
-                        print(f"  {indicator}:")
-                        print(f"    Signal: {details.get('signal', 'N/A')}")
-                        print(f"    Reliability: {details.get('reliability', 0):.2f}")
-                        if details.get('warnings'):
-                            print(f"    Warnings: {', '.join(details['warnings'])}")
-                    
-                    await asyncio.sleep(1)  # Rate limiting
-                    
-                except Exception as e:
-                    logger.error(f"Error analyzing {pair}: {e}")
-                    continue
+            job = BatchReviewJob(self.feed, self.market_analyzer)
+            report = await job.run(pairs)
+            print_report(report)
                     
         except Exception as e:
             logger.error(f"Error in LLM review: {e}")
             print(f"Error during LLM review: {e}")
         finally:
             print("\nLLM Review completed.")
-            input("Press Enter to continue...")
\ No newline at end of file
+            input("Press Enter to continue...")
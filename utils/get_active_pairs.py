@@ -1,54 +1,37 @@
-import aiohttp
 import asyncio
 import json
 import logging
 import os
-from typing import Dict, List
+from typing import List
+
+from market_data.pair_universe import PairUniverse
+from market_data.rest_client import KrakenRestClient, create_session
 
 async def get_kraken_pairs() -> List[str]:
+    """Refresh the shared pair universe and export the top 200 to data/kraken_usd_pairs.json"""
     # Create data directory if it doesn't exist
-    data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
     os.makedirs(data_dir, exist_ok=True)
     pairs_file = os.path.join(data_dir, 'kraken_usd_pairs.json')
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get("https://api.kraken.com/0/public/AssetPairs") as response:
-            pairs_data = await response.json()
-            if pairs_data.get('error'):
-                logging.error(f"Kraken API error: {pairs_data['error']}")
-                return []
-            
-        async with session.get("https://api.kraken.com/0/public/Ticker") as response:
-            volume_data = await response.json()
-            if volume_data.get('error'):
-                logging.error(f"Kraken API error: {volume_data['error']}")
-                return []
-
-    pairs = []
-    result = pairs_data.get('result', {})
-    volumes = volume_data.get('result', {})
-
-    for pair_name, pair_info in result.items():
-        if pair_info['quote'] in ['ZUSD', 'USD']:
-            try:
-                volume_24h = float(volumes[pair_name]['v'][1])
-                pairs.append({
-                    'pair': pair_name,
-                    'altname': pair_info['altname'],
-                    'base': pair_info['base'],
-                    'quote': pair_info['quote'],
-                    'volume_24h': volume_24h
-                })
-            except (KeyError, ValueError, TypeError) as e:
-                logging.warning(f"Error processing pair {pair_name}: {e}")
-                continue
+    async with create_session() as session:
+        universe = PairUniverse(KrakenRestClient(session).request)
+        if not await universe.refresh():
+            logging.error("Failed to rank Kraken USD pairs")
+            return []
 
-    pairs.sort(key=lambda x: x['volume_24h'], reverse=True)
+    pairs = [{
+        'pair': entry['pair'],
+        'altname': entry['altname'],
+        'base': entry['base'],
+        'quote': entry['quote'],
+        'volume_24h': entry['volume_usd_24h']
+    } for entry in universe.entries[:200]]
     
     with open(pairs_file, 'w') as f:
-        json.dump(pairs[:200], f, indent=2)
+        json.dump(pairs, f, indent=2)
         
-    return [p['altname'] for p in pairs[:200]]
+    return [p['altname'] for p in pairs]
 
 if __name__ == "__main__":
-    asyncio.run(get_kraken_pairs())
\ No newline at end of file
+    asyncio.run(get_kraken_pairs())
@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """Token bucket limiter shared by concurrent coroutines.
+
+    Allows bursts of up to `burst` calls and refills at `rate` calls per second.
+    Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until `tokens` are available and consume them"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def drain(self, penalty: float = 0.0):
+        """Empty the bucket, e.g. after the server reports a rate limit"""
+        self._refill()
+        self._tokens = -penalty * self.rate
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False